@@ -0,0 +1,281 @@
+# Benchmarks for the inventory simulation engines.
+#
+# Run from the repository root:
+#
+#     python -m benchmarks.inventory --output bench.json
+#     python -m benchmarks.inventory --quick --baseline bench.json
+#
+# Every case runs in a fresh process so peak RSS belongs to that case alone.
+# Results are written as JSON, one record per (engine, materials, days), to be
+# diffed between commits; --baseline prints the speedup against an older run.
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from inventory_sim import (material_outputs, simulate_ddmrp_inventory, simulate_ddmrp_inventory_events,
+                           simulate_ddmrp_inventory_vectorized, simulate_inventory, simulate_inventory_v2,
+                           simulate_materials_batch, simulate_materials_parallel)
+from inventory_sim.kernel import horizon_mask
+from inventory_sim.workbook import TEMPLATE_COLUMNS
+
+MATERIAL_COUNTS = [1, 100, 10000]
+HORIZONS = [90, 365, 1825]
+QUICK_MATERIAL_COUNTS = [1, 100]
+QUICK_HORIZONS = [90, 365]
+# Engines that walk one material at a time are only timed up to this many materials
+PER_MATERIAL_LIMIT = 100
+PARITY_MATERIALS = 20
+START_DATE = datetime(2024, 1, 1)
+
+LEAD_TIMES = [0, 1, 3.5, 7, 14, 30]
+MOQS = [0, 10, 50, 200]
+PACKAGES = [1, 5, 12]
+
+
+def synthetic_materials(count, sim_days, seed=0):
+    """A materials frame of the batch template with varied lead times, MOQ and package sizes."""
+    rng = np.random.default_rng(seed)
+    rop = rng.integers(0, 300, count).astype(float)
+    weights = rng.uniform(0.1, 0.4, (count, 5))
+    materials_df = pd.DataFrame({
+        'Material Name': [f'M{idx:05d}' for idx in range(count)],
+        'Monthly Usage Average': rng.integers(30, 900, count).astype(float),
+        'Current Usage': rng.integers(30, 900, count).astype(float),
+        'Beginning Inventory': rng.integers(0, 500, count).astype(float),
+        'Lead Time (days)': rng.choice(LEAD_TIMES, count),
+        'Critical Level': rng.integers(0, 150, count).astype(float),
+        'Re-Order Point (ROP)': rop,
+        'Maximum Quantity': rop + rng.integers(0, 600, count),
+        'Inventory Value per UoM': rng.uniform(0.5, 20, count).round(2),
+        'Quantity per Package': rng.choice(PACKAGES, count).astype(float),
+        'Minimum Order Quantity (MOQ)': rng.choice(MOQS, count).astype(float),
+        'Simulation Days': np.full(count, sim_days),
+        'W1': weights[:, 0], 'W2': weights[:, 1], 'W3': weights[:, 2], 'W4': weights[:, 3], 'W5': weights[:, 4],
+        'TOL': rng.choice([0, 0.1, 0.3], count),
+    })
+    return materials_df[TEMPLATE_COLUMNS]
+
+
+def _ddmrp_args(row):
+    return (row['Re-Order Point (ROP)'], row['Maximum Quantity'], row['Critical Level'],
+            row['Minimum Order Quantity (MOQ)'], row['Lead Time (days)'], row['Quantity per Package'],
+            row['Monthly Usage Average'], row['Current Usage'], row['W1'], row['W2'], row['W3'], row['W4'],
+            row['W5'], row['TOL'], row['Beginning Inventory'], row['Inventory Value per UoM'],
+            int(row['Simulation Days']), START_DATE)
+
+
+def _inventory_args(row):
+    return (row['Re-Order Point (ROP)'], row['Maximum Quantity'], row['Critical Level'],
+            row['Minimum Order Quantity (MOQ)'], row['Lead Time (days)'], row['Quantity per Package'],
+            row['Monthly Usage Average'], row['Beginning Inventory'], row['Inventory Value per UoM'],
+            int(row['Simulation Days']), START_DATE)
+
+
+def _inventory_v2_args(row):
+    return (row['Re-Order Point (ROP)'], row['Maximum Quantity'], row['Critical Level'],
+            row['Minimum Order Quantity (MOQ)'], row['Lead Time (days)'], row['Quantity per Package'],
+            row['Monthly Usage Average'], row['Current Usage'], row['Beginning Inventory'],
+            row['Inventory Value per UoM'], int(row['Simulation Days']), START_DATE)
+
+
+def _per_material(simulate, make_args):
+    def run(materials_df, seed):
+        np.random.seed(seed)
+        return [simulate(*make_args(row)) for row in materials_df.to_dict('records')]
+    return run
+
+
+# name -> (runner(materials_df, seed), True when the engine walks one material at a time)
+ENGINES = {
+    '06 simulate_inventory': (_per_material(simulate_inventory, _inventory_args), True),
+    '06B simulate_inventory_v2': (_per_material(simulate_inventory_v2, _inventory_v2_args), True),
+    '07 reference': (_per_material(simulate_ddmrp_inventory, _ddmrp_args), True),
+    '07 vectorized': (_per_material(simulate_ddmrp_inventory_vectorized, _ddmrp_args), True),
+    '07 events': (_per_material(simulate_ddmrp_inventory_events, _ddmrp_args), True),
+    '07 batch kernel': (lambda materials_df, seed: simulate_materials_batch(materials_df, START_DATE, seed), False),
+    '07 batch parallel': (lambda materials_df, seed: simulate_materials_parallel(materials_df, START_DATE, seed),
+                          False),
+}
+
+
+def _max_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(who).ru_maxrss * scale / 2 ** 20
+
+
+def run_case(engine, count, sim_days, seed, repeat):
+    """Time one engine on one synthetic set; meant to run in a fresh process."""
+    runner, _ = ENGINES[engine]
+    materials_df = synthetic_materials(count, sim_days, seed)
+    material_days = count * sim_days
+    rss_before = _max_rss_mb()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        runner(materials_df, seed)
+        timings.append(time.perf_counter() - started)
+    rss_peak = _max_rss_mb()
+
+    tracemalloc.start()
+    runner(materials_df, seed)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall = min(timings)
+    return {
+        'engine': engine,
+        'materials': count,
+        'days': sim_days,
+        'wall_s': wall,
+        'wall_s_all': timings,
+        'us_per_material_day': wall / material_days * 1e6,
+        'rss_before_mb': rss_before,
+        'rss_peak_mb': rss_peak,
+        'rss_children_peak_mb': _max_rss_mb(resource.RUSAGE_CHILDREN),
+        'traced_peak_mb': traced_peak / 2 ** 20,
+        'alloc_bytes_per_material_day': traced_peak / material_days,
+    }
+
+
+def _frames_match(expected, actual, exact):
+    try:
+        pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=exact,
+                                      rtol=0 if exact else 1e-9, atol=0 if exact else 1e-6)
+    except AssertionError as error:
+        return False, str(error).splitlines()[0]
+    return True, ''
+
+
+def parity_check(sim_days, seed, count=PARITY_MATERIALS):
+    """Compare the faster 07 engines against the reference under a fixed seed."""
+    materials_df = synthetic_materials(count, sim_days, seed)
+    reference = ENGINES['07 reference'][0](materials_df, seed)
+    checks = []
+
+    for engine, exact in (('07 vectorized', True), ('07 events', False)):
+        outputs = ENGINES[engine][0](materials_df, seed)
+        passed, detail = True, ''
+        for idx, (expected, actual) in enumerate(zip(reference, outputs)):
+            passed, detail = _frames_match(expected[0], actual[0], exact)
+            orders_match = [a['x'] for a in expected[3]] == [a['x'] for a in actual[3]]
+            if not (passed and orders_match):
+                passed, detail = False, f"material {idx}: {detail or 'order annotations differ'}"
+                break
+        checks.append({'check': f'{engine} vs 07 reference', 'days': sim_days, 'passed': passed, 'detail': detail})
+
+    # The unseeded kernel draws from the global stream in the same order as the per-material engines
+    np.random.seed(seed)
+    batch_result = simulate_materials_batch(materials_df, START_DATE)
+    passed, detail = True, ''
+    for idx, expected in enumerate(reference):
+        passed, detail = _frames_match(expected[0], material_outputs(batch_result, idx)[0], True)
+        if not passed:
+            detail = f'material {idx}: {detail}'
+            break
+    checks.append({'check': '07 batch kernel vs 07 reference', 'days': sim_days, 'passed': passed, 'detail': detail})
+
+    kernel = simulate_materials_batch(materials_df, START_DATE, seed)
+    parallel = simulate_materials_parallel(materials_df, START_DATE, seed, workers=2)
+    active = horizon_mask(kernel['params']['sim_days'])
+    passed = all(np.array_equal(kernel[name][active], parallel[name][active])
+                 for name in ('inventory_actual', 'inventory_avg', 'order_qty_actual', 'order_qty_avg'))
+    checks.append({'check': '07 batch parallel vs 07 batch kernel', 'days': sim_days, 'passed': passed,
+                   'detail': '' if passed else 'seeded matrices differ'})
+    return checks
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_baseline(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {(record['engine'], record['materials'], record['days']): record
+                    for record in json.load(baseline_file)['results'] if 'wall_s' in record}
+    print(f"\n{'engine':28} {'materials':>9} {'days':>5} {'before s':>10} {'after s':>10} {'speedup':>8}")
+    for record in results:
+        key = (record['engine'], record['materials'], record['days'])
+        if key in baseline and 'wall_s' in record:
+            before = baseline[key]['wall_s']
+            print(f"{key[0]:28} {key[1]:>9} {key[2]:>5} {before:>10.4f} {record['wall_s']:>10.4f} "
+                  f"{before / record['wall_s']:>7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.inventory',
+                                     description="Benchmark the inventory simulation engines.")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write")
+    parser.add_argument('--quick', action='store_true', help="only 1 and 100 materials over 90 and 365 days")
+    parser.add_argument('--engine', action='append', choices=sorted(ENGINES), help="engines to run (default: all)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case; the best one is reported")
+    parser.add_argument('--baseline', help="earlier JSON output to compare wall times against")
+    args = parser.parse_args(argv)
+
+    counts = QUICK_MATERIAL_COUNTS if args.quick else MATERIAL_COUNTS
+    horizons = QUICK_HORIZONS if args.quick else HORIZONS
+    engines = args.engine or list(ENGINES)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for engine in engines:
+        for count in counts:
+            for sim_days in horizons:
+                if ENGINES[engine][1] and count > PER_MATERIAL_LIMIT:
+                    results.append({'engine': engine, 'materials': count, 'days': sim_days,
+                                    'skipped': f'per-material engine above {PER_MATERIAL_LIMIT} materials'})
+                    continue
+                repeat = 1 if count * sim_days >= 1_000_000 else args.repeat
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    record = pool.submit(run_case, engine, count, sim_days, args.seed, repeat).result()
+                results.append(record)
+                print(f"{engine:28} {count:>6} x {sim_days:>4}d  {record['wall_s']:>9.4f}s  "
+                      f"{record['us_per_material_day']:>8.3f} us/day  rss {record['rss_peak_mb']:>7.1f} MB  "
+                      f"alloc {record['alloc_bytes_per_material_day']:>7.1f} B/day", flush=True)
+
+    parity = [check for sim_days in horizons for check in parity_check(sim_days, args.seed)]
+    for check in parity:
+        print(f"parity {check['check']:40} {check['days']:>4}d  {'ok' if check['passed'] else 'FAILED'} "
+              f"{check['detail']}")
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpus': multiprocessing.cpu_count(),
+            'seed': args.seed,
+        },
+        'results': results,
+        'parity': parity,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        _print_baseline(results, args.baseline)
+    return 0 if all(check['passed'] for check in parity) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
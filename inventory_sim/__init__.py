@@ -0,0 +1,24 @@
+from .ddmrp import simulate_ddmrp_inventory, simulate_ddmrp_inventory_vectorized
+from .kernel import batch_summary, material_outputs, simulate_materials_batch
+from .parallel import default_workers, iter_batch_parallel, merge_batch_results, simulate_materials_parallel
+from .montecarlo import monte_carlo_ddmrp, monte_carlo_inventory, monte_carlo_inventory_v2
+from .cache import LRUCache, load_materials_cached, simulate_materials_cached
+from .incremental import IncrementalBatch, diff_rows, row_hashes
+from .workbook import TEMPLATE_COLUMNS, MaterialStream, read_header, read_numeric_column, simulate_workbook
+from .columnar import format_from_name, period_end_table, read_materials_table, results_table, write_table
+from .events import replenish_events, simulate_ddmrp_inventory_events
+from .optimize import best_policy, cost_surface, sweep_policies
+from .reporting import (REPORTING_BUCKETS, downsample_frame, lttb_indices, month_end_mask, period_end_days,
+                        period_end_positions, simulation_dates)
+from .portfolio import portfolio_daily, portfolio_weekly
+from .simulate import simulate_inventory, simulate_inventory_v2
+from .api import (export_results, export_summary, fit_history, load_history, load_materials, run_batch,
+                  run_network, simulate_material, summarize)
+from .rng import material_rng, material_rngs, replication_rngs
+from .result import ORDER_DTYPE, CompactBatch
+from .leadtime import LEAD_TIME_COLUMNS, LEAD_TIME_DISTRIBUTIONS, lead_time_spec, sample_lead_days
+from .history import HISTORY_COLUMNS, HISTORY_SHEET, DemandProfiles, read_history_sheet
+from .network import (NETWORK_SHEET, echelon_inventory, network_summary, network_topology, read_network_sheet,
+                      simulate_network)
+from .constrained import PRIORITY_RULES, period_spend, simulate_materials_constrained
+from .jobs import BatchJob, JobRegistry, batch_jobs
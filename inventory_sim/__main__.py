@@ -0,0 +1,71 @@
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from .api import export_results, export_summary, fit_history, load_history, load_materials, run_batch
+from .columnar import FORMAT_EXTENSIONS, format_from_name
+from .history import read_history_sheet
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m inventory_sim',
+        description="Run the batch inventory simulation on a materials file without Streamlit."
+    )
+    parser.add_argument('input', help="materials workbook (.xlsx), Parquet or Arrow file")
+    parser.add_argument('-o', '--output', required=True, help="where to write the daily results")
+    parser.add_argument('--format', choices=sorted(FORMAT_EXTENSIONS),
+                        help="output format (default: from the output file name)")
+    parser.add_argument('--summary', help="also write the per-material summary to this file, in the same format")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes; 0 uses every core (default: 1)")
+    parser.add_argument('--seed', type=int, help="random seed; runs with the same seed give the same results")
+    parser.add_argument('--start-date', type=datetime.fromisoformat, default=None,
+                        help="first simulated day as YYYY-MM-DD (default: today)")
+    parser.add_argument('--history',
+                        help="daily demand history (Material Name, Date, Quantity) as a workbook, Parquet or Arrow "
+                             "file (default: the input workbook's History sheet, if any)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    file_format = args.format or format_from_name(args.output)
+    start_date = args.start_date or datetime.combine(datetime.today(), datetime.min.time())
+
+    started = time.perf_counter()
+    try:
+        materials_df, skipped_rows = load_materials(args.input)
+    except ValueError as error:
+        sys.exit(f"{args.input}: {error}")
+    if skipped_rows:
+        print(f"Skipped {len(skipped_rows)} rows with non-numeric values: "
+              f"{', '.join(map(str, skipped_rows[:10]))}{' ...' if len(skipped_rows) > 10 else ''}", file=sys.stderr)
+
+    try:
+        if args.history:
+            history = load_history(args.history)
+        elif format_from_name(args.input) == 'xlsx':
+            history = read_history_sheet(args.input)
+        else:
+            history = None
+    except ValueError as error:
+        sys.exit(f"{args.history or args.input}: {error}")
+    profiles = None if history is None else fit_history(history)
+    if profiles is not None:
+        print(f"Fitted demand history for {len(profiles)} materials", file=sys.stderr)
+
+    result = run_batch(materials_df, start_date, args.seed, args.workers, profiles)
+    names = materials_df['Material Name']
+    with open(args.output, 'wb') as output:
+        output.write(export_results(result, names, file_format))
+    if args.summary:
+        with open(args.summary, 'wb') as output:
+            output.write(export_summary(result, names, file_format))
+
+    print(f"Simulated {len(materials_df)} materials in {time.perf_counter() - started:.2f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
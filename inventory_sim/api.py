@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from .columnar import format_from_name, read_history_table, read_materials_table, results_table, write_table
+from .ddmrp import simulate_ddmrp_inventory_vectorized
+from .history import HISTORY_SHEET, DemandProfiles, read_history_sheet
+from .kernel import batch_summary
+from .network import simulate_network
+from .parallel import default_workers, simulate_materials_parallel
+from .rng import material_rng
+from .workbook import MaterialStream
+
+# A path on disk or an open binary file
+Source = Union[str, os.PathLike, BinaryIO]
+# Materials x days matrices and parameter vectors, as returned by simulate_materials_batch
+BatchResult = Dict[str, Any]
+# (df, avg_cycle, daily_avg_use, order_annotations, critical_crossing_annotations,
+#  critical_gap_annotations, critical_crossings), as returned by simulate_ddmrp_inventory
+MaterialOutputs = Tuple[pd.DataFrame, Optional[float], float, list, list, list, list]
+
+
+def load_materials(source: Source, file_format: Optional[str] = None) -> Tuple[pd.DataFrame, list]:
+    """Read a materials workbook, Parquet or Arrow file into a frame of the template columns.
+
+    The format is taken from the file name unless given. Returns
+    (materials_df, skipped_rows); skipped_rows lists the rows that had a
+    missing or non-numeric parameter (sheet rows for a workbook, 1-based
+    rows for Parquet and Arrow). Raises ValueError when template columns
+    are missing.
+    """
+    if file_format is None:
+        file_format = format_from_name(os.fspath(source) if isinstance(source, (str, os.PathLike))
+                                       else getattr(source, 'name', ''))
+    if file_format == 'xlsx':
+        stream = MaterialStream(source)
+        missing_columns = stream.missing_columns
+        materials_df = None if missing_columns else stream.read()
+        skipped_rows = stream.skipped_rows
+    else:
+        materials_df, missing_columns, skipped_rows = read_materials_table(source, file_format)
+    if missing_columns:
+        raise ValueError(f"Materials file is missing required columns: {', '.join(missing_columns)}.")
+    return materials_df, skipped_rows
+
+
+def load_history(source: Source, file_format: Optional[str] = None,
+                 sheet: Optional[str] = HISTORY_SHEET) -> pd.DataFrame:
+    """Read a demand history long table (Material Name, Date, Quantity).
+
+    A workbook is read from its History sheet, or from its active sheet
+    when sheet is None. Raises ValueError when the sheet or a column is
+    missing.
+    """
+    if file_format is None:
+        file_format = format_from_name(os.fspath(source) if isinstance(source, (str, os.PathLike))
+                                       else getattr(source, 'name', ''))
+    if file_format != 'xlsx':
+        return read_history_table(source, file_format)
+    history = read_history_sheet(source, sheet)
+    if history is None:
+        raise ValueError(f"Workbook has no {sheet} sheet.")
+    return history
+
+
+def fit_history(history: pd.DataFrame) -> DemandProfiles:
+    """Fit weekday and month seasonality and residual pools for every material in a history table."""
+    return DemandProfiles.fit(history)
+
+
+def run_batch(materials_df: pd.DataFrame, start_date: datetime, seed: Optional[int] = None,
+              workers: Optional[int] = 1, profiles: Optional[DemandProfiles] = None) -> BatchResult:
+    """Simulate every material of a batch on workers processes (all cores when None or 0).
+
+    With a seed each material draws from its own stream, so the result is
+    the same for any worker count. With profiles, materials that have
+    history resample their Actual demand from it.
+    """
+    return simulate_materials_parallel(materials_df, start_date, seed, workers or default_workers(), profiles)
+
+
+def run_network(nodes_df: pd.DataFrame, edges_df: pd.DataFrame, start_date: datetime,
+                seed: Optional[int] = None) -> Dict[str, Any]:
+    """Simulate stock points in the template columns linked by From/To replenishment edges.
+
+    Nodes with an incoming edge order from their supplier node and wait
+    for its stock; the others order from outside. Raises ValueError when
+    the edges do not form a forest over the node names.
+    """
+    return simulate_network(nodes_df, edges_df, start_date, seed)
+
+
+def summarize(result: BatchResult, material_names: Sequence[str]) -> pd.DataFrame:
+    """Headline figures, one row per material."""
+    return batch_summary(result, material_names)
+
+
+def export_results(result: BatchResult, material_names: Sequence[str], file_format: str = 'parquet') -> bytes:
+    """Long-form daily results (material, date, actual, avg, orders) serialized as parquet, arrow or xlsx."""
+    return write_table(results_table(result, material_names), file_format)
+
+
+def export_summary(result: BatchResult, material_names: Sequence[str], file_format: str = 'parquet') -> bytes:
+    """The summarize table serialized as parquet, arrow or xlsx."""
+    return write_table(summarize(result, material_names), file_format)
+
+
+def simulate_material(rop: float, max_qty: float, critical_level: float, moq: float, delivery_lead_time: float,
+                      qty_per_package: float, monthly_usage_avg: float, current_usage: float,
+                      weights: Sequence[float], tol: float, beginning_inventory: float, inventory_value: float,
+                      sim_days: int, start_date: Optional[datetime] = None, seed: Optional[int] = None,
+                      material_id: int = 0) -> MaterialOutputs:
+    """One material of the batch model, with the W1-W5 week weights passed as a sequence.
+
+    With a seed the material draws from the same stream as row material_id
+    of run_batch with that seed, so a single material can be replayed and
+    checked against a batch run. Without one it uses the global NumPy stream.
+    """
+    w1, w2, w3, w4, w5 = weights
+    rng = None if seed is None else material_rng(seed, material_id)
+    return simulate_ddmrp_inventory_vectorized(rop, max_qty, critical_level, moq, delivery_lead_time,
+                                               qty_per_package, monthly_usage_avg, current_usage,
+                                               w1, w2, w3, w4, w5, tol, beginning_inventory, inventory_value,
+                                               sim_days, start_date, rng)
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .kernel import MATERIAL_COLUMNS, WEEK_COLUMNS
+from .leadtime import LEAD_TIME_COLUMNS
+from .parallel import iter_batch_parallel, merge_batch_results
+from .result import CompactBatch
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count, total size and entry age.
+
+    Streamlit serves every session from the same process, so the caches
+    below are shared module-level instances guarded by a lock. An entry's
+    size is its value's nbytes (0 for values without one); with max_bytes
+    set, the least recently used entries are evicted until the total fits.
+    """
+
+    def __init__(self, max_entries=128, ttl=3600, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            stored_at, size, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.nbytes -= size
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = getattr(value, 'nbytes', 0)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[1]
+            self._entries[key] = (time.monotonic(), size, value)
+            self.nbytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.max_bytes is not None and self.nbytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Parsed workbooks keyed by upload hash, and per-material results keyed by row hash
+materials_cache = LRUCache(max_entries=16, ttl=3600)
+# Pieces grow with the horizon (about 18 KB each at 1825 days), so results are also bounded by size
+results_cache = LRUCache(max_entries=20000, ttl=3600, max_bytes=256 * 2 ** 20)
+# Fitted demand history profiles, keyed by the content hash of the uploaded file
+history_cache = LRUCache(max_entries=4, ttl=3600)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def material_keys(materials_df, start_date, seed, profiles=None):
+    """SHA-256 per material over everything its simulation depends on.
+
+    That is the simulation columns, any lead-time columns, its fitted
+    demand history profile, the index label that selects its random
+    stream, the start date and the seed. Editing one row only changes that
+    row's key.
+    """
+    values = np.ascontiguousarray(materials_df[list(MATERIAL_COLUMNS.values()) + WEEK_COLUMNS].to_numpy(dtype=float))
+    lead_columns = [column for column in LEAD_TIME_COLUMNS.values() if column in materials_df]
+    lead_times = (['|'.join(map(str, values)) for values in materials_df[lead_columns].itertuples(index=False)]
+                  if lead_columns else [''] * len(materials_df))
+    histories = ([''] * len(materials_df) if profiles is None
+                 else profiles.take(materials_df['Material Name']).digests())
+    suffix = f'|{start_date.isoformat()}|{seed}'.encode()
+    return [hashlib.sha256(f'{label}|{lead_time}|{history}|'.encode() + row.tobytes() + suffix).hexdigest()
+            for label, lead_time, history, row in zip(materials_df.index, lead_times, histories, values)]
+
+
+def load_materials_cached(file_bytes, loader, cache=materials_cache):
+    """Parse an uploaded workbook once per distinct content."""
+    key = content_hash(file_bytes)
+    materials_df = cache.get(key)
+    if materials_df is None:
+        materials_df = loader(file_bytes)
+        cache.set(key, materials_df)
+    return materials_df
+
+
+def cached_pieces(materials_df, start_date, seed, cache=results_cache, profiles=None):
+    """Cache keys of every material and its cached single-row CompactBatch piece, None where missing."""
+    keys = material_keys(materials_df, start_date, seed, profiles)
+    return keys, [cache.get(key) for key in keys]
+
+
+def iter_cache_misses(materials_df, keys, pieces, start_date, seed, workers=1, cache=results_cache, profiles=None,
+                      chunk_size=None):
+    """Simulate the materials whose piece is None, yielding the row positions of each finished chunk.
+
+    pieces is filled in place and every new piece is cached as its chunk
+    finishes, so a run closed early keeps what it finished. chunk_size
+    fixes the materials per chunk (see chunk_bounds).
+    """
+    missing = [pos for pos, piece in enumerate(pieces) if piece is None]
+    if not missing:
+        return
+    for (start, stop), chunk_result in iter_batch_parallel(materials_df.iloc[missing], start_date, seed, workers,
+                                                             profiles, chunk_size):
+        positions = missing[start:stop]
+        for pos, piece in zip(positions, CompactBatch.from_batch(chunk_result).split()):
+            pieces[pos] = piece
+            cache.set(keys[pos], piece)
+        yield positions
+
+
+def simulate_materials_cached(materials_df, start_date, seed, workers=1, cache=results_cache, progress=None,
+                              compact=False, profiles=None):
+    """Batch simulation that only recomputes materials missing from the cache.
+
+    Materials are cached as single-row CompactBatch pieces. progress, if
+    given, is called with (done, total) as chunks of cache misses finish.
+    Returns the batch result in row order, as a CompactBatch when compact
+    is set and expanded to batch matrices (without consumption) otherwise.
+    profiles (DemandProfiles) is passed on to the kernel.
+    """
+    keys, pieces = cached_pieces(materials_df, start_date, seed, cache, profiles)
+    total = sum(piece is None for piece in pieces)
+    done = 0
+    for positions in iter_cache_misses(materials_df, keys, pieces, start_date, seed, workers, cache, profiles):
+        done += len(positions)
+        if progress is not None:
+            progress(done, total)
+
+    if not pieces:
+        pieces = [CompactBatch.from_batch(merge_batch_results(list(iter_batch_parallel(materials_df, start_date,
+                                                                                        seed, 1, profiles))))]
+    batch = CompactBatch.concat(pieces)
+    return batch if compact else batch.to_batch()
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from plotly.subplots import make_subplots
+
+from .reporting import CHART_MAX_POINTS, downsample_frame
+
+# Text annotations drawn per layer before neighbouring ones are merged
+MAX_ANNOTATIONS = 30
+
+
+def _epoch_ms(dates):
+    # Dates as milliseconds since the epoch: a date axis reads them natively and
+    # plotly ships numeric arrays as base64 instead of one ISO string per point
+    return (pd.DatetimeIndex(dates) - pd.Timestamp(0)) / pd.Timedelta(milliseconds=1)
+
+
+def monte_carlo_figure(dates, summary, rop, max_qty, critical_level, title):
+    """P5-P95 inventory band with the median path and the policy levels."""
+    fig = go.Figure()
+    fig.add_scatter(x=dates, y=summary['p95'], mode='lines', line=dict(width=0),
+                    name='P95', showlegend=False, hoverinfo='skip')
+    fig.add_scatter(x=dates, y=summary['p5'], mode='lines', line=dict(width=0),
+                    fill='tonexty', fillcolor='rgba(65, 134, 255, 0.25)', name='P5-P95',
+                    hovertemplate='%{x|%Y-%m-%d}<br>P5: %{y:.0f}')
+    fig.add_scatter(x=dates, y=summary['p50'], mode='lines', line=dict(color='#4186ff'),
+                    name='P50', hovertemplate='%{x|%Y-%m-%d}<br>P50: %{y:.0f}')
+    fig.add_hline(y=rop, line=dict(color='orange', dash='dot'), annotation_text='ROP')
+    fig.add_hline(y=max_qty, line=dict(color='green', dash='dot'), annotation_text='Max Qty')
+    fig.add_hline(y=critical_level, line=dict(color='red', dash='dot'), annotation_text='Critical Level')
+    fig.update_layout(
+        title=title,
+        yaxis_title="Inventory Qty",
+        xaxis_title="Date",
+        legend_title="Metrics",
+        yaxis=dict(range=[0, max(max_qty, summary['p95'].max()) * 1.1])
+    )
+    return fig
+
+
+def policy_heatmap(surface, best=None):
+    """Cheapest feasible cost over ROP x Max Qty, with the chosen policy marked."""
+    fig = go.Figure(go.Heatmap(
+        z=surface.to_numpy(),
+        x=surface.columns,
+        y=surface.index,
+        colorscale='Viridis',
+        colorbar=dict(title='Total Cost'),
+        hovertemplate='ROP: %{y:.0f}<br>Max Qty: %{x:.0f}<br>Cost: %{z:,.0f}<extra></extra>'
+    ))
+    if best is not None:
+        fig.add_scatter(x=[best['Max Qty']], y=[best['ROP']], mode='markers',
+                        marker=dict(symbol='star', size=16, color='red'), name='Best Policy')
+    fig.update_layout(xaxis_title="Max Qty", yaxis_title="ROP", title="Cheapest Cost Meeting the Service Target")
+    return fig
+
+
+def inventory_figure(df, series, title, rop, max_qty, critical_level, keep=None, max_points=CHART_MAX_POINTS):
+    """WebGL version of the px.line inventory chart.
+
+    Inventory series become downsampled Scattergl traces and the constant
+    ROP / Max Qty / Critical Level columns are drawn as horizontal line
+    shapes, so the payload no longer grows with the horizon. The point budget
+    is shared by all series since their LTTB picks are merged onto one axis.
+    """
+    plot_df = downsample_frame(df, series, threshold=max(3, max_points // len(series)), keep=keep)
+    x = np.asarray(_epoch_ms(plot_df['Date']))
+    colors = qualitative.Plotly
+    fig = go.Figure()
+    for i, column in enumerate(series):
+        fig.add_trace(go.Scattergl(x=x, y=plot_df[column].to_numpy(dtype=np.float32), mode='lines', name=column,
+                                   line=dict(color=colors[i]),
+                                   hovertemplate=f'%{{x|%Y-%m-%d}}<br>{column}: %{{y:.0f}}<extra></extra>'))
+    levels = (('ROP', rop), ('Max_Qty', max_qty), ('Critical_Level', critical_level))
+    for i, (label, level) in enumerate(levels, len(series)):
+        fig.add_hline(y=level, line=dict(color=colors[i % len(colors)]), annotation_text=label,
+                      annotation_position='top left')
+    fig.update_layout(title=title)
+    fig.update_xaxes(type='date')
+    return fig
+
+
+def cap_annotations(annotations, limit=MAX_ANNOTATIONS):
+    """Merge neighbouring annotations until at most limit remain.
+
+    Annotations are grouped in date order; a group is drawn at its highest
+    point and labelled with the number of events and the dates it spans.
+    """
+    if len(annotations) <= limit:
+        return list(annotations)
+    ordered = sorted(annotations, key=lambda annotation: annotation['x'])
+    capped = []
+    for members in np.array_split(np.arange(len(ordered)), limit):
+        group = [ordered[i] for i in members]
+        if len(group) == 1:
+            capped.append(group[0])
+            continue
+        peak = max(group, key=lambda annotation: annotation['y'])
+        capped.append({
+            **peak,
+            'text': f'{len(group)} events\n{group[0]["x"]:%Y-%m-%d} - {group[-1]["x"]:%Y-%m-%d}'
+        })
+    return capped
+
+
+def annotation_layer(fig, annotations, name, limit=MAX_ANNOTATIONS):
+    """Annotations to put in the layout, with a hover-only fallback above limit.
+
+    When there are more than limit annotations every one of them is also
+    added as an invisible-until-hovered marker, so merging loses no detail.
+    """
+    if len(annotations) > limit:
+        fig.add_trace(go.Scattergl(
+            x=np.asarray(_epoch_ms([annotation['x'] for annotation in annotations])),
+            y=np.array([annotation['y'] for annotation in annotations], dtype=np.float32),
+            mode='markers',
+            marker=dict(size=6, color='rgba(0, 0, 0, 0.35)'),
+            name=name,
+            hovertext=[annotation['text'].replace('\n', '<br>') for annotation in annotations],
+            hovertemplate='%{x|%Y-%m-%d}<br>%{hovertext}<extra></extra>'
+        ))
+    return cap_annotations(annotations, limit)
+
+
+def portfolio_dashboard(daily, weekly):
+    """Portfolio totals of a batch run stacked on one shared date axis."""
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        subplot_titles=('Inventory Value', 'Open Purchase Orders by Week',
+                                        'Cash Outflow by Delivery Date', 'Materials Below Critical Level'))
+    fig.add_trace(go.Scattergl(x=daily.index, y=daily['Inventory Value'], mode='lines', name='Inventory Value',
+                               hovertemplate='%{x|%Y-%m-%d}<br>Value: %{y:,.0f}<extra></extra>'), row=1, col=1)
+    fig.add_trace(go.Bar(x=weekly.index, y=weekly['Open POs'], name='Open POs', customdata=weekly['Open PO Value'],
+                         hovertemplate='Week of %{x|%Y-%m-%d}<br>Open POs: %{y}<br>Value: %{customdata:,.0f}'
+                                       '<extra></extra>'), row=2, col=1)
+    fig.add_trace(go.Bar(x=daily.index, y=daily['Cash Outflow'], name='Cash Outflow',
+                         hovertemplate='%{x|%Y-%m-%d}<br>Outflow: %{y:,.0f}<extra></extra>'), row=3, col=1)
+    fig.add_trace(go.Scattergl(x=daily.index, y=daily['Materials Below Critical'], mode='lines',
+                               line=dict(shape='hv', color='red'), name='Below Critical',
+                               hovertemplate='%{x|%Y-%m-%d}<br>Materials: %{y}<extra></extra>'), row=4, col=1)
+    fig.update_layout(height=900, showlegend=False, title="Portfolio Totals (Actual Usage)")
+    return fig
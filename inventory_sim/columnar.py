@@ -0,0 +1,198 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from .history import HISTORY_COLUMNS, clean_history
+from .kernel import horizon_mask
+from .leadtime import LEAD_TIME_COLUMNS, check_lead_time
+from .reporting import period_end_days
+from .workbook import INTEGER_COLUMNS, OPTIONAL_COLUMNS, TEMPLATE_COLUMNS, TEXT_COLUMNS
+
+# File extension for each export format
+FORMAT_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow', 'xlsx': 'xlsx'}
+FORMAT_MIME_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def format_from_name(file_name):
+    """Input format from a file name: parquet, arrow (IPC/Feather) or xlsx."""
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    if extension == 'parquet':
+        return 'parquet'
+    if extension in ('arrow', 'feather', 'ipc'):
+        return 'arrow'
+    return 'xlsx'
+
+
+def _usable_lead_time(distribution, history):
+    try:
+        check_lead_time(distribution, history)
+    except ValueError:
+        return False
+    return True
+
+
+def read_materials_table(source, file_format):
+    """Read the template columns of a Parquet or Arrow IPC materials file.
+
+    Returns (materials_df, missing_columns, skipped_rows). Only the template
+    columns, and whichever optional lead-time columns the file has, are
+    read from the file, and rows are checked like the workbook stream: rows
+    with a non-numeric or missing parameter, or an unusable lead-time
+    distribution, are skipped and their 1-based row numbers collected in
+    skipped_rows, and completely blank rows are ignored.
+    """
+    schema = pq.read_schema(source) if file_format == 'parquet' else pa.ipc.open_file(source).schema
+    missing_columns = [column for column in TEMPLATE_COLUMNS if column not in schema.names]
+    if missing_columns:
+        return None, missing_columns, []
+    columns = TEMPLATE_COLUMNS + [column for column in OPTIONAL_COLUMNS if column in schema.names]
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    if file_format == 'parquet':
+        table = pq.read_table(source, columns=columns)
+    else:
+        table = feather.read_table(source, columns=columns)
+
+    materials_df = table.to_pandas()
+    blank = materials_df.isna().all(axis=1).to_numpy()
+    for column in columns:
+        values = materials_df[column]
+        if column in TEXT_COLUMNS:
+            materials_df[column] = values.fillna('').astype(str)
+        elif pd.api.types.is_numeric_dtype(values):
+            materials_df[column] = values.astype(float)
+        else:
+            # Text cells such as '1,200' are read like the workbook stream; anything else becomes NaN
+            materials_df[column] = pd.to_numeric(values.astype(str).str.replace(',', '', regex=False),
+                                                 errors='coerce').astype(float)
+
+    numeric_columns = [column for column in TEMPLATE_COLUMNS if column not in TEXT_COLUMNS]
+    usable = ~materials_df[numeric_columns].isna().any(axis=1).to_numpy()
+    distribution = LEAD_TIME_COLUMNS['lead_distribution']
+    if distribution in materials_df.columns:
+        history = LEAD_TIME_COLUMNS['lead_history']
+        histories = materials_df[history] if history in materials_df.columns else [None] * len(materials_df)
+        usable &= np.array([_usable_lead_time(name, values)
+                            for name, values in zip(materials_df[distribution], histories)], dtype=bool)
+    skipped_rows = (np.flatnonzero(~usable & ~blank) + 1).tolist()
+
+    materials_df = materials_df[usable].reset_index(drop=True)
+    for column in INTEGER_COLUMNS:
+        materials_df[column] = materials_df[column].astype(int)
+    return materials_df, [], skipped_rows
+
+
+def read_history_table(source, file_format):
+    """Read a demand history long table (Material Name, Date, Quantity) from a Parquet or Arrow IPC file.
+
+    Raises ValueError when one of the history columns is missing.
+    """
+    schema = pq.read_schema(source) if file_format == 'parquet' else pa.ipc.open_file(source).schema
+    missing_columns = [column for column in HISTORY_COLUMNS if column not in schema.names]
+    if missing_columns:
+        raise ValueError(f"History file is missing required columns: {', '.join(missing_columns)}.")
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    if file_format == 'parquet':
+        table = pq.read_table(source, columns=HISTORY_COLUMNS)
+    else:
+        table = feather.read_table(source, columns=HISTORY_COLUMNS)
+    return clean_history(table.to_pandas())
+
+
+def results_table(batch_result, material_names):
+    """Long-form Arrow table of a batch result: one row per material and simulated day.
+
+    Columns are material, date, actual, avg and orders (the Actual order
+    quantity placed that day). Levels are capped at Max Qty like the charts.
+    Numeric columns are handed to Arrow straight from the NumPy buffers.
+    When every material shares one horizon, the materials x days matrices
+    are used as-is. Otherwise they are compacted once to drop padding.
+    """
+    params = batch_result['params']
+    sim_days = params['sim_days']
+    width = batch_result['inventory_actual'].shape[1]
+
+    actual = np.minimum(batch_result['inventory_actual'], params['max_qty'][:, None])
+    avg = np.minimum(batch_result['inventory_avg'], params['max_qty'][:, None])
+    orders = batch_result['order_qty_actual']
+    day_offsets = np.broadcast_to(np.arange(width, dtype=np.int32), actual.shape)
+    material_codes = np.broadcast_to(np.arange(len(sim_days), dtype=np.int32)[:, None], actual.shape)
+
+    if len(sim_days) and (sim_days == width).all():
+        columns = [matrix.reshape(-1) for matrix in (actual, avg, orders)]
+        day_offsets, material_codes = day_offsets.reshape(-1), material_codes.reshape(-1)
+    else:
+        active = horizon_mask(sim_days)
+        columns = [matrix[active] for matrix in (actual, avg, orders)]
+        day_offsets, material_codes = day_offsets[active], material_codes[active]
+
+    start = np.datetime64(batch_result['start_date'].date(), 'D')
+    return pa.table({
+        'material': pa.DictionaryArray.from_arrays(pa.array(material_codes),
+                                                   pa.array(np.asarray(material_names, dtype=str))),
+        'date': pa.array(start + day_offsets.astype('timedelta64[D]')),
+        'actual': pa.array(columns[0]),
+        'avg': pa.array(columns[1]),
+        'orders': pa.array(columns[2]),
+    })
+
+
+def period_end_table(batch_result, material_names, bucket='month'):
+    """Long-form Arrow table of a batch result at the end of every reporting period.
+
+    One row per material and period-end day inside its horizon: material,
+    date, actual and avg (capped at Max Qty), value (actual x Inventory
+    Value per UoM) and orders, the Actual quantity ordered during the
+    period. Levels are gathered with one take over the period-end day
+    offsets and orders as differences of one cumulative sum, not a scan
+    per date.
+    """
+    params = batch_result['params']
+    sim_days = params['sim_days']
+    width = batch_result['inventory_actual'].shape[1]
+    ends = period_end_days(batch_result['start_date'], width, bucket)
+
+    actual = np.minimum(np.take(batch_result['inventory_actual'], ends, axis=1), params['max_qty'][:, None])
+    avg = np.minimum(np.take(batch_result['inventory_avg'], ends, axis=1), params['max_qty'][:, None])
+    ordered_to_date = np.take(np.cumsum(batch_result['order_qty_actual'], axis=1), ends, axis=1)
+    orders = np.diff(ordered_to_date, axis=1, prepend=0)
+    active = ends < sim_days[:, None]
+    material_codes = np.broadcast_to(np.arange(len(sim_days), dtype=np.int32)[:, None], active.shape)[active]
+
+    start = np.datetime64(batch_result['start_date'].date(), 'D')
+    return pa.table({
+        'material': pa.DictionaryArray.from_arrays(pa.array(material_codes),
+                                                   pa.array(np.asarray(material_names, dtype=str))),
+        'date': pa.array(start + np.broadcast_to(ends, active.shape)[active].astype('timedelta64[D]')),
+        'actual': pa.array(actual[active]),
+        'avg': pa.array(avg[active]),
+        'value': pa.array((actual * params['inventory_value'][:, None])[active]),
+        'orders': pa.array(orders[active]),
+    })
+
+
+def write_table(table, file_format):
+    """Serialize an Arrow table or a DataFrame as parquet, arrow (IPC file) or xlsx bytes."""
+    output = BytesIO()
+    if file_format == 'xlsx':
+        frame = table.to_pandas() if isinstance(table, pa.Table) else table
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            frame.to_excel(writer, index=False, sheet_name='Sheet1')
+        return output.getvalue()
+
+    if isinstance(table, pd.DataFrame):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    if file_format == 'parquet':
+        pq.write_table(table, output)
+    else:
+        feather.write_feather(table, output, compression='uncompressed')
+    return output.getvalue()
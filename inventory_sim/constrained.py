@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from .kernel import batch_consumption, material_arrays
+from .leadtime import batch_lead_days
+from .rng import material_rngs
+
+# Order in which a day's reorder requests claim the shared budget and capacity:
+# 'urgency' serves the fewest days of cover above the Critical Level first,
+# 'value' the largest purchase value first
+PRIORITY_RULES = ('urgency', 'value')
+
+
+def budget_periods(start_date, sim_days):
+    """Budget period of every simulated day: weeks starting on Monday, like portfolio_weekly."""
+    return np.cumsum(pd.date_range(start_date, periods=sim_days, freq='D').weekday == 0)
+
+
+def allocate(priority, cost, units, budget_left, capacity_left):
+    """Approve requests in priority order (lowest first), skipping any that no longer fit.
+
+    Walks the ranked queue a run at a time: the leading run whose running
+    cost and units fit is approved with one cumulative sum, the request
+    that broke the run is skipped, and the walk goes on with what is left.
+    A request that does not fit never holds back the ones ranked after it.
+    Returns a boolean mask over the requests.
+    """
+    approved = np.zeros(len(priority), dtype=bool)
+    queue = np.argsort(priority, kind='stable')
+    while len(queue):
+        queue = queue[(cost[queue] <= budget_left) & (units[queue] <= capacity_left)]
+        if not len(queue):
+            break
+        fits = (np.cumsum(cost[queue]) <= budget_left) & (np.cumsum(units[queue]) <= capacity_left)
+        run = len(queue) if fits.all() else int(fits.argmin())
+        approved[queue[:run]] = True
+        budget_left -= cost[queue[:run]].sum()
+        capacity_left -= units[queue[:run]].sum()
+        queue = queue[run + 1:]
+    return approved
+
+
+def replenish_constrained(consumption, params, lead_days, periods, budget=None, capacity=None,
+                          priority='urgency'):
+    """replenish_batch with every row's reorder requests drawing on one shared budget and capacity.
+
+    Each day the rows at or below ROP with nothing on the way ask for the
+    usual quantity. Requests are ranked by the priority rule and approved
+    while their purchase value fits the budget left in the period and their
+    quantity fits the capacity left; the rest are deferred and ask again
+    the next day. A request worth more than a whole period's budget, or
+    larger than its capacity, could never be placed; it is rejected
+    instead of deferred, and the row asks again (and is rejected again)
+    each day until its stock rises above ROP. budget and capacity are per
+    period (None for no limit) and periods gives each day's period number.
+    Returns what replenish_batch returns plus masks of the days a row's
+    request was deferred and rejected.
+    """
+    if priority not in PRIORITY_RULES:
+        raise ValueError(f"Unknown priority rule {priority!r}; expected one of: {', '.join(PRIORITY_RULES)}.")
+    rows, sim_days = consumption.shape
+    rop, max_qty, moq, qty_per_package = params['rop'], params['max_qty'], params['moq'], params['qty_per_package']
+    unit_value = params['inventory_value']
+    daily_use = params['monthly_usage_avg'] / 30
+    horizon = params['sim_days']
+
+    levels = np.empty((rows, sim_days))
+    order_qty = np.zeros((rows, sim_days))
+    received_qty = np.zeros((rows, sim_days))
+    ordered = np.zeros((rows, sim_days), dtype=bool)
+    received = np.zeros((rows, sim_days), dtype=bool)
+    deferred = np.zeros((rows, sim_days), dtype=bool)
+    rejected = np.zeros((rows, sim_days), dtype=bool)
+
+    inventory = params['beginning_inventory'].copy()
+    due_day = np.full(rows, -1)
+    due_qty = np.zeros(rows)
+    lead_days = np.asarray(lead_days)
+    order_count = np.zeros(rows, dtype=int)
+    budget = np.inf if budget is None else budget
+    capacity = np.inf if capacity is None else capacity
+    period = -1
+
+    for day in range(sim_days):
+        if periods[day] != period:
+            period = periods[day]
+            budget_left, capacity_left = budget, capacity
+
+        inventory = np.maximum(0, inventory - consumption[:, day])
+
+        arriving = due_day == day
+        inventory += np.where(arriving, due_qty, 0.0)
+        due_day[arriving] = -1
+        received[:, day] = arriving
+        received_qty[:, day] = np.where(arriving, due_qty, 0.0)
+
+        # Days past a row's own horizon make no requests, so padding never spends the budget
+        requests = np.flatnonzero((inventory <= rop) & (due_day < 0) & (day < horizon))
+        if len(requests):
+            qty = np.maximum(moq[requests], np.ceil((max_qty[requests] - inventory[requests])
+                                                    / qty_per_package[requests]) * qty_per_package[requests])
+            qty = np.minimum(qty, max_qty[requests] - inventory[requests])
+            cost = qty * unit_value[requests]
+            if priority == 'urgency':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    rank = (inventory[requests] - params['critical_level'][requests]) / daily_use[requests]
+                rank = np.nan_to_num(rank, nan=np.inf)
+            else:
+                rank = -cost
+            approved = allocate(rank, cost, qty, budget_left, capacity_left)
+            budget_left -= cost[approved].sum()
+            capacity_left -= qty[approved].sum()
+            oversize = (cost > budget) | (qty > capacity)
+            deferred[requests[~approved & ~oversize], day] = True
+            rejected[requests[oversize], day] = True
+
+            placed, qty = requests[approved], qty[approved]
+            lead = (lead_days[placed, order_count[placed]] if lead_days.ndim == 2
+                    else np.broadcast_to(lead_days, rows)[placed])
+            order_count[placed] += 1
+            due_day[placed] = day + lead
+            due_qty[placed] = qty
+            ordered[placed, day] = True
+            order_qty[placed, day] = qty
+
+        levels[:, day] = inventory
+
+    return levels, order_qty, received_qty, ordered, received, deferred, rejected
+
+
+def simulate_materials_constrained(materials_df, start_date, seed=None, budget=None, capacity=None,
+                                   priority='urgency', profiles=None):
+    """simulate_materials_batch with orders allocated against a shared weekly budget and capacity.
+
+    budget limits the purchase value (quantity x Inventory Value per UoM)
+    and capacity the quantity ordered across all materials in each Monday
+    week; None leaves that limit off. Both streams are constrained on
+    their own. Demand and lead times are drawn exactly as in the batch
+    kernel, so with no limits the result matches it. Adds deferred_ and
+    rejected_ masks per stream: the days a material's request was held
+    back for lack of budget or capacity left, and the days it asked for
+    more than a whole week's budget or capacity.
+    """
+    params = material_arrays(materials_df)
+    rngs = None if seed is None else material_rngs(seed, materials_df.index)
+    if profiles is not None:
+        profiles = profiles.take(materials_df['Material Name'])
+    params['history'] = np.zeros(len(materials_df), dtype=bool) if profiles is None else profiles.has_history
+    consumption_actual, consumption_avg = batch_consumption(params, start_date, rngs, profiles)
+    order_leads = batch_lead_days(params, rngs)
+    periods = budget_periods(start_date, consumption_actual.shape[1])
+
+    result = {'params': params, 'start_date': start_date, 'material_ids': materials_df.index.to_numpy(),
+              'consumption_actual': consumption_actual, 'consumption_avg': consumption_avg,
+              'order_leads': order_leads}
+    for stream, consumption in (('actual', consumption_actual), ('avg', consumption_avg)):
+        levels, order_qty, received_qty, ordered, received, deferred, rejected = replenish_constrained(
+            consumption, params, params['lead_days'] if order_leads is None else order_leads, periods,
+            budget, capacity, priority)
+        result[f'inventory_{stream}'] = levels
+        result[f'order_qty_{stream}'] = order_qty
+        result[f'received_qty_{stream}'] = received_qty
+        result[f'ordered_{stream}'] = ordered
+        result[f'received_{stream}'] = received
+        result[f'deferred_{stream}'] = deferred
+        result[f'rejected_{stream}'] = rejected
+    return result
+
+
+def period_spend(result, stream='actual'):
+    """Purchase value and quantity ordered in each budget week, with the numbers of deferred and rejected requests."""
+    params = result['params']
+    periods = budget_periods(result['start_date'], result[f'order_qty_{stream}'].shape[1])
+    starts = np.flatnonzero(np.diff(periods, prepend=-1))
+    if not len(starts):
+        return pd.DataFrame(columns=['Order Value', 'Order Quantity', 'Orders Placed', 'Deferred Requests',
+                                     'Rejected Requests'],
+                            index=pd.DatetimeIndex([], name='Week'))
+    order_qty = result[f'order_qty_{stream}']
+    return pd.DataFrame({
+        'Order Value': np.add.reduceat((order_qty * params['inventory_value'][:, None]).sum(axis=0), starts),
+        'Order Quantity': np.add.reduceat(order_qty.sum(axis=0), starts),
+        'Orders Placed': np.add.reduceat(result[f'ordered_{stream}'].sum(axis=0), starts),
+        'Deferred Requests': np.add.reduceat(result[f'deferred_{stream}'].sum(axis=0), starts),
+        'Rejected Requests': np.add.reduceat(result[f'rejected_{stream}'].sum(axis=0), starts),
+    }, index=pd.DatetimeIndex(pd.Timestamp(result['start_date']) + pd.to_timedelta(starts, unit='D'), name='Week'))
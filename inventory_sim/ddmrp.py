@@ -0,0 +1,359 @@
+import heapq
+import math
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from .reporting import simulation_dates
+from .rng import resolve_rng
+
+# Reference implementation of the batch page simulator. It walks every day with
+# datetime objects and is kept as the parity baseline for the array engines below.
+def simulate_ddmrp_inventory(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package, 
+                            monthly_usage_avg, current_usage, w1, w2, w3, w4, w5, tol, 
+                            beginning_inventory, inventory_value, sim_days, start_date=None, rng=None):
+    if start_date is None:
+        start_date = datetime.now()
+    random = resolve_rng(rng)
+    daily_avg_use = monthly_usage_avg / 30 
+    inventory_actual = beginning_inventory
+    inventory_avg = beginning_inventory
+    dates = [start_date]
+    inventory_actual_levels = [inventory_actual]
+    inventory_avg_levels = [inventory_avg]
+    pending_orders_actual = []  # min-heap of (delivery_date, order_seq, quantity, order_day) for Inventory_Actual
+    pending_orders_avg = []     # min-heap of (delivery_date, order_seq, quantity, order_day) for Inventory_Avg
+    order_seq = 0
+    order_annotations = []
+    critical_crossings = []  # Store (date, inventory_actual) when crossing critical_level going down
+
+    for day in range(sim_days):
+        current_date = start_date + timedelta(days=day)
+        dates.append(current_date)
+        previous_inventory_actual = inventory_actual
+        previous_inventory_avg = inventory_avg
+        
+        # Determine which week (W1-W5) this day belongs to in the month
+        days_into_month = (current_date - start_date.replace(day=1)).days % 30
+        if days_into_month < 6:  # Week 1 (days 0-5)
+            weekly_proportion = w1
+        elif days_into_month < 12:  # Week 2 (days 6-11)
+            weekly_proportion = w2
+        elif days_into_month < 18:  # Week 3 (days 12-17)
+            weekly_proportion = w3
+        elif days_into_month < 24:  # Week 4 (days 18-23)
+            weekly_proportion = w4
+        else:  # Week 5 (days 24-29)
+            weekly_proportion = w5
+        
+        # Calculate daily consumption for Inventory_Actual with tolerance
+        base_daily_use = (current_usage * weekly_proportion) / 6
+        tolerance_factor = random.uniform(1 - tol, 1 + tol)
+        daily_consumption_actual = base_daily_use * tolerance_factor
+        
+        # Update inventories
+        inventory_actual = max(0, inventory_actual - daily_consumption_actual)
+        inventory_avg = max(0, inventory_avg - daily_avg_use)
+        
+        # Check for delivered orders for Inventory_Actual
+        while pending_orders_actual and pending_orders_actual[0][0] <= current_date:
+            delivery_date, _, qty, order_date = heapq.heappop(pending_orders_actual)
+            inventory_actual += qty
+            order_amount = qty * inventory_value
+            order_annotations.append({
+                'x': delivery_date,
+                'y': inventory_actual,
+                'text': f'Actual Order: {int(qty)}\n({order_amount:,.0f})',
+                'showarrow': True,
+                'arrowhead': 1,
+                'ax': 20,
+                'ay': -30,
+                'font': {'color': 'green', 'size': 10},
+                'bgcolor': 'rgba(255, 255, 255, 0.8)',
+                'bordercolor': 'green',
+                'borderwidth': 1
+            })
+        
+        # Check for delivered orders for Inventory_Avg
+        while pending_orders_avg and pending_orders_avg[0][0] <= current_date:
+            delivery_date, _, qty, order_date = heapq.heappop(pending_orders_avg)
+            inventory_avg += qty
+            order_amount = qty * inventory_value
+            order_annotations.append({
+                'x': delivery_date,
+                'y': inventory_avg,
+                'text': f'Avg Order: {int(qty)}\n({order_amount:,.0f})',
+                'showarrow': True,
+                'arrowhead': 1,
+                'ax': 20,
+                'ay': -30,
+                'font': {'color': 'purple', 'size': 10},
+                'bgcolor': 'rgba(255, 255, 255, 0.8)',
+                'bordercolor': 'purple',
+                'borderwidth': 1
+            })
+        
+        # Only future deliveries remain in the heaps, so the earliest one tells whether an order is in transit
+        # Check if Inventory_Actual falls below ROP and place order
+        if inventory_actual <= rop and not (pending_orders_actual and
+                                            pending_orders_actual[0][0] < current_date + timedelta(days=delivery_lead_time)):
+            actual_order_qty = max(moq, 
+                                 np.ceil((max_qty - inventory_actual) / qty_per_package) * qty_per_package)
+            actual_order_qty = min(actual_order_qty, max_qty - inventory_actual)
+            delivery_date = current_date + timedelta(days=delivery_lead_time)
+            heapq.heappush(pending_orders_actual, (delivery_date, order_seq, actual_order_qty, current_date))
+            order_seq += 1
+
+        # Check if Inventory_Avg falls below ROP and place order
+        if inventory_avg <= rop and not (pending_orders_avg and
+                                         pending_orders_avg[0][0] < current_date + timedelta(days=delivery_lead_time)):
+            avg_order_qty = max(moq, 
+                               np.ceil((max_qty - inventory_avg) / qty_per_package) * qty_per_package)
+            avg_order_qty = min(avg_order_qty, max_qty - inventory_avg)
+            delivery_date = current_date + timedelta(days=delivery_lead_time)
+            heapq.heappush(pending_orders_avg, (delivery_date, order_seq, avg_order_qty, current_date))
+            order_seq += 1
+
+        # Detect crossing below critical_level when inventory_actual is going down
+        if (inventory_actual <= critical_level and 
+            (day == 0 or (previous_inventory_actual > critical_level and inventory_actual < previous_inventory_actual))):
+            critical_crossings.append((current_date, inventory_actual))
+
+        inventory_actual_levels.append(min(inventory_actual, max_qty))
+        inventory_avg_levels.append(min(inventory_avg, max_qty))
+
+    df = pd.DataFrame({
+        'Date': dates,
+        'Inventory_Actual': inventory_actual_levels,
+        'Inventory_Avg': inventory_avg_levels,
+        'ROP': [rop] * len(dates),
+        'Max_Qty': [max_qty] * len(dates),
+        'Critical_Level': [critical_level] * len(dates)
+    })
+    
+    order_dates_actual = sorted(d[3] for d in pending_orders_actual)
+    if len(order_dates_actual) > 1:
+        avg_cycle_actual = np.mean([(order_dates_actual[i+1] - order_dates_actual[i]).days 
+                                   for i in range(len(order_dates_actual)-1)])
+    else:
+        avg_cycle_actual = None
+
+    # Annotations for critical crossings (markers with date and value)
+    critical_crossing_annotations = []
+    for crossing_date, crossing_inventory in critical_crossings:
+        critical_crossing_annotations.append({
+            'x': crossing_date,
+            'y': crossing_inventory,
+            'text': f'{crossing_date.strftime("%Y-%m-%d")}\n{crossing_inventory:.0f}',
+            'showarrow': True,
+            'arrowhead': 1,
+            'ax': 0,
+            'ay': -40,
+            'font': {'color': 'blue', 'size': 10},
+            'bgcolor': 'rgba(255, 255, 255, 0.8)',
+            'bordercolor': 'blue',
+            'borderwidth': 1
+        })
+
+    # Calculate time gaps and horizontal lines between critical crossings
+    critical_gap_annotations = []
+    if len(critical_crossings) > 1:
+        for i in range(1, len(critical_crossings)):
+            prev_date, prev_inventory = critical_crossings[i-1]
+            curr_date, curr_inventory = critical_crossings[i]
+            gap_days = (curr_date - prev_date).days
+            mid_date = prev_date + timedelta(days=gap_days // 2)
+            critical_gap_annotations.append({
+                'x': mid_date,
+                'y': critical_level,
+                'text': f'<- {gap_days} days ->',
+                'showarrow': False,
+                'font': {'color': 'red', 'size': 12},
+                'bgcolor': 'rgba(255, 255, 255, 0.8)',
+                'bordercolor': 'red',
+                'borderwidth': 1
+            })
+            df['Critical_Crossing_Line'] = np.nan
+            df.loc[df['Date'].isin([prev_date, curr_date]), 'Critical_Crossing_Line'] = critical_level
+
+    return df, avg_cycle_actual, daily_avg_use, order_annotations, critical_crossing_annotations, critical_gap_annotations, critical_crossings
+
+def week_bucket_index(start_date, sim_days):
+    # Same W1-W5 split as the reference: 30-day "months" cut into 6-day weeks
+    days_into_month = (np.arange(sim_days) + start_date.day - 1) % 30
+    return np.minimum(days_into_month // 6, 4)
+
+
+def arrival_offset(delivery_lead_time):
+    # An order placed on day d is received on the first simulated day that is
+    # not earlier than its delivery date, and never on the day it was placed
+    return max(1, math.ceil(delivery_lead_time))
+
+
+def replenish(consumption, beginning_inventory, rop, max_qty, moq, qty_per_package, lead_days):
+    """Run one inventory stream over a precomputed consumption array.
+
+    Returns the unclipped end-of-day levels and the placed orders as
+    (order_day, arrival_day, quantity) tuples.
+    """
+    sim_days = len(consumption)
+    levels = np.empty(sim_days)
+    arrival_order = np.full(sim_days + lead_days, -1)  # order index due on each day
+    orders = []
+    in_transit = False
+    inventory = beginning_inventory
+
+    for day, used in enumerate(consumption.tolist()):
+        inventory = max(0, inventory - used)
+
+        order_idx = arrival_order[day]
+        if order_idx >= 0:
+            inventory += orders[order_idx][2]
+            in_transit = False
+
+        if inventory <= rop and not in_transit:
+            qty = max(moq, math.ceil((max_qty - inventory) / qty_per_package) * qty_per_package)
+            qty = min(qty, max_qty - inventory)
+            arrival_order[day + lead_days] = len(orders)
+            orders.append((day, day + lead_days, qty))
+            in_transit = True
+
+        levels[day] = inventory
+
+    return levels, orders
+
+
+def critical_crossing_days(levels, beginning_inventory, critical_level):
+    previous = np.concatenate(([beginning_inventory], levels[:-1]))
+    crossed = (levels <= critical_level) & (previous > critical_level) & (levels < previous)
+    if len(levels):
+        crossed[0] = levels[0] <= critical_level
+    return np.flatnonzero(crossed)
+
+
+def order_annotation(x, y, label, qty, inventory_value, color):
+    return {
+        'x': x,
+        'y': y,
+        'text': f'{label} Order: {int(qty)}\n({qty * inventory_value:,.0f})',
+        'showarrow': True,
+        'arrowhead': 1,
+        'ax': 20,
+        'ay': -30,
+        'font': {'color': color, 'size': 10},
+        'bgcolor': 'rgba(255, 255, 255, 0.8)',
+        'bordercolor': color,
+        'borderwidth': 1
+    }
+
+
+def build_outputs(start_date, sim_days, beginning_inventory, rop, max_qty, critical_level,
+                  delivery_lead_time, inventory_value, daily_avg_use,
+                  levels_actual, levels_avg, orders_actual, orders_avg):
+    """Turn raw stream arrays into the same tuple the reference returns."""
+    dates = simulation_dates(start_date, sim_days)
+
+    df = pd.DataFrame({
+        'Date': dates,
+        'Inventory_Actual': np.concatenate(([beginning_inventory], np.minimum(levels_actual, max_qty))),
+        'Inventory_Avg': np.concatenate(([beginning_inventory], np.minimum(levels_avg, max_qty))),
+        'ROP': rop,
+        'Max_Qty': max_qty,
+        'Critical_Level': critical_level
+    })
+
+    # Deliveries in the order the reference loop records them: by day, Actual before Avg
+    deliveries = sorted(
+        [(arrival, 0, order_day, qty) for order_day, arrival, qty in orders_actual if arrival < sim_days] +
+        [(arrival, 1, order_day, qty) for order_day, arrival, qty in orders_avg if arrival < sim_days]
+    )
+    order_annotations = []
+    lead_days = arrival_offset(delivery_lead_time)
+    for arrival, stream, order_day, qty in deliveries:
+        # Orders on the quoted lead time keep its fractional delivery date; sampled lead times are whole days
+        lead_time = delivery_lead_time if arrival - order_day == lead_days else arrival - order_day
+        delivery_date = start_date + timedelta(days=order_day + lead_time)
+        if stream == 0:
+            order_annotations.append(order_annotation(delivery_date, levels_actual[arrival], 'Actual',
+                                                      qty, inventory_value, 'green'))
+        else:
+            order_annotations.append(order_annotation(delivery_date, levels_avg[arrival], 'Avg',
+                                                      qty, inventory_value, 'purple'))
+
+    # The reference derives the cycle from orders still in transit at the end of the horizon
+    order_dates_actual = [order_day for order_day, arrival, qty in orders_actual if arrival >= sim_days]
+    if len(order_dates_actual) > 1:
+        avg_cycle_actual = np.mean(np.diff(order_dates_actual))
+    else:
+        avg_cycle_actual = None
+
+    critical_crossings = [(dates[day + 1], levels_actual[day])
+                          for day in critical_crossing_days(levels_actual, beginning_inventory, critical_level)]
+
+    critical_crossing_annotations = []
+    for crossing_date, crossing_inventory in critical_crossings:
+        critical_crossing_annotations.append({
+            'x': crossing_date,
+            'y': crossing_inventory,
+            'text': f'{crossing_date.strftime("%Y-%m-%d")}\n{crossing_inventory:.0f}',
+            'showarrow': True,
+            'arrowhead': 1,
+            'ax': 0,
+            'ay': -40,
+            'font': {'color': 'blue', 'size': 10},
+            'bgcolor': 'rgba(255, 255, 255, 0.8)',
+            'bordercolor': 'blue',
+            'borderwidth': 1
+        })
+
+    critical_gap_annotations = []
+    for (prev_date, _), (curr_date, _) in zip(critical_crossings, critical_crossings[1:]):
+        gap_days = (curr_date - prev_date).days
+        critical_gap_annotations.append({
+            'x': prev_date + timedelta(days=gap_days // 2),
+            'y': critical_level,
+            'text': f'<- {gap_days} days ->',
+            'showarrow': False,
+            'font': {'color': 'red', 'size': 12},
+            'bgcolor': 'rgba(255, 255, 255, 0.8)',
+            'bordercolor': 'red',
+            'borderwidth': 1
+        })
+    if len(critical_crossings) > 1:
+        # Only the last pair of crossings gets the dashed gap line, as in the reference
+        df['Critical_Crossing_Line'] = np.nan
+        last_pair = [critical_crossings[-2][0], critical_crossings[-1][0]]
+        df.loc[df['Date'].isin(last_pair), 'Critical_Crossing_Line'] = critical_level
+
+    return df, avg_cycle_actual, daily_avg_use, order_annotations, critical_crossing_annotations, critical_gap_annotations, critical_crossings
+
+
+def simulate_ddmrp_inventory_vectorized(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
+                                        monthly_usage_avg, current_usage, w1, w2, w3, w4, w5, tol,
+                                        beginning_inventory, inventory_value, sim_days, start_date=None, rng=None):
+    """Array-based engine with the same inputs and outputs as simulate_ddmrp_inventory.
+
+    Week-bucket proportions and tolerance draws are computed for the whole
+    horizon up front, and pending deliveries live in an integer-day arrival
+    array instead of a list of datetime tuples. Under the same global NumPy
+    seed, or the same Generator as rng, it reproduces the reference results;
+    with rng=material_rng(seed, id) it reproduces row id of a seeded batch.
+    """
+    if start_date is None:
+        start_date = datetime.now()
+    daily_avg_use = monthly_usage_avg / 30
+
+    weekly_proportions = np.array([w1, w2, w3, w4, w5], dtype=float)[week_bucket_index(start_date, sim_days)]
+    base_daily_use = (current_usage * weekly_proportions) / 6
+    consumption_actual = base_daily_use * resolve_rng(rng).uniform(1 - tol, 1 + tol, sim_days)
+    consumption_avg = np.full(sim_days, daily_avg_use)
+
+    lead_days = arrival_offset(delivery_lead_time)
+    levels_actual, orders_actual = replenish(consumption_actual, beginning_inventory, rop, max_qty,
+                                             moq, qty_per_package, lead_days)
+    levels_avg, orders_avg = replenish(consumption_avg, beginning_inventory, rop, max_qty,
+                                       moq, qty_per_package, lead_days)
+
+    return build_outputs(start_date, sim_days, beginning_inventory, rop, max_qty, critical_level,
+                         delivery_lead_time, inventory_value, daily_avg_use,
+                         levels_actual, levels_avg, orders_actual, orders_avg)
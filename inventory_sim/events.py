@@ -0,0 +1,89 @@
+import numpy as np
+
+from .ddmrp import arrival_offset, build_outputs, replenish, week_bucket_index
+from .rng import resolve_rng
+
+
+def replenish_events(consumption, beginning_inventory, rop, max_qty, moq, qty_per_package, lead_days):
+    """Event-skipping equivalent of ddmrp.replenish.
+
+    Between deliveries the level is a clipped running total,
+    max(0, anchor - consumed since the anchor), so the next reorder day is
+    found with np.searchsorted over the cumulative consumption. The loop
+    then jumps from order to delivery to order, and its cost grows with
+    the number of orders rather than the horizon. Levels for each stretch
+    between deliveries are filled in with one vectorized expression.
+
+    Results match replenish up to floating-point rounding of the cumulative
+    sums; negative consumption (TOL above 1) falls back to replenish.
+    """
+    sim_days = len(consumption)
+    if (consumption < 0).any():
+        return replenish(consumption, beginning_inventory, rop, max_qty, moq, qty_per_package, lead_days)
+
+    consumed = np.concatenate(([0.0], np.cumsum(consumption)))  # consumed[k]: total of days 0..k-1
+    levels = np.empty(sim_days)
+    orders = []
+
+    def level_on(day, anchor_day, anchor_level):
+        return max(0, anchor_level - (consumed[day + 1] - consumed[anchor_day + 1]))
+
+    def order_qty(inventory):
+        qty = max(moq, np.ceil((max_qty - inventory) / qty_per_package) * qty_per_package)
+        return min(qty, max_qty - inventory)
+
+    # The anchor is the last day whose end level is known without a later delivery (-1 = start)
+    anchor_day, anchor_level = -1, beginning_inventory
+    order_day = None
+    if rop >= 0:
+        target = consumed[0] + anchor_level - rop
+        order_day = max(0, int(np.searchsorted(consumed, target, side='left')) - 1)
+
+    while order_day is not None and order_day < sim_days:
+        qty = order_qty(level_on(order_day, anchor_day, anchor_level))
+        arrival = order_day + lead_days
+        orders.append((order_day, arrival, qty))
+        if arrival >= sim_days:
+            break
+
+        # Fill the stretch up to the delivery day, then re-anchor on the delivered level
+        span = slice(anchor_day + 1, arrival + 1)
+        levels[span] = np.maximum(0, anchor_level - (consumed[anchor_day + 2:arrival + 2] - consumed[anchor_day + 1]))
+        levels[arrival] += qty
+        anchor_day, anchor_level = arrival, levels[arrival]
+
+        if anchor_level <= rop:
+            order_day = anchor_day
+        else:
+            target = consumed[anchor_day + 1] + anchor_level - rop
+            order_day = max(anchor_day + 1, int(np.searchsorted(consumed, target, side='left')) - 1)
+
+    levels[anchor_day + 1:] = np.maximum(0, anchor_level - (consumed[anchor_day + 2:] - consumed[anchor_day + 1]))
+    return levels, orders
+
+
+def simulate_ddmrp_inventory_events(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
+                                    monthly_usage_avg, current_usage, w1, w2, w3, w4, w5, tol,
+                                    beginning_inventory, inventory_value, sim_days, start_date, rng=None):
+    """simulate_ddmrp_inventory_vectorized on the event-skipping engine.
+
+    Draws the same random numbers as the vectorized engine, so results agree
+    with it to rounding, and multi-year horizons cost little more than one
+    year.
+    """
+    daily_avg_use = monthly_usage_avg / 30
+
+    weekly_proportions = np.array([w1, w2, w3, w4, w5], dtype=float)[week_bucket_index(start_date, sim_days)]
+    base_daily_use = (current_usage * weekly_proportions) / 6
+    consumption_actual = base_daily_use * resolve_rng(rng).uniform(1 - tol, 1 + tol, sim_days)
+    consumption_avg = np.full(sim_days, daily_avg_use)
+
+    lead_days = arrival_offset(delivery_lead_time)
+    levels_actual, orders_actual = replenish_events(consumption_actual, beginning_inventory, rop, max_qty,
+                                                    moq, qty_per_package, lead_days)
+    levels_avg, orders_avg = replenish_events(consumption_avg, beginning_inventory, rop, max_qty,
+                                              moq, qty_per_package, lead_days)
+
+    return build_outputs(start_date, sim_days, beginning_inventory, rop, max_qty, critical_level,
+                         delivery_lead_time, inventory_value, daily_avg_use,
+                         levels_actual, levels_avg, orders_actual, orders_avg)
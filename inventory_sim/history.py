@@ -0,0 +1,194 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+# Daily issue history: one row per material and day (or per issue; same-day rows are summed)
+HISTORY_SHEET = 'History'
+HISTORY_COLUMNS = ['Material Name', 'Date', 'Quantity']
+# Days of average demand each weekday and month factor is shrunk towards 1 with,
+# so a month seen in only a few days of history does not get an extreme factor
+PROFILE_PRIOR_DAYS = 7
+
+
+def read_history_sheet(source, sheet=HISTORY_SHEET):
+    """The history long table from a workbook sheet, or None when the workbook has no such sheet.
+
+    sheet=None reads the active sheet. Raises ValueError when the sheet
+    lacks one of HISTORY_COLUMNS.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet is not None and sheet not in workbook.sheetnames:
+            return None
+        rows = (workbook.active if sheet is None else workbook[sheet]).iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+        missing_columns = [column for column in HISTORY_COLUMNS if column not in header]
+        if missing_columns:
+            raise ValueError(f"{sheet or 'History'} sheet is missing required columns: "
+                             f"{', '.join(missing_columns)}.")
+        positions = [header.index(column) for column in HISTORY_COLUMNS]
+        values = [[row[position] if position < len(row) else None for position in positions] for row in rows]
+    finally:
+        workbook.close()
+    return clean_history(pd.DataFrame(values, columns=HISTORY_COLUMNS))
+
+
+def clean_history(history):
+    """Typed history: material names as text, dates as days, quantities as floats; unusable rows dropped."""
+    history = pd.DataFrame({
+        'Material Name': history['Material Name'].astype(str),
+        'Date': pd.to_datetime(history['Date'], errors='coerce').to_numpy().astype('datetime64[D]'),
+        'Quantity': pd.to_numeric(history['Quantity'], errors='coerce'),
+    })
+    return history[history['Date'].notna() & history['Quantity'].notna()].reset_index(drop=True)
+
+
+class DemandProfiles:
+    """Per-material seasonality profiles and residual pools fitted from daily issue history.
+
+    Demand on a day is level x weekday factor x month factor x residual,
+    with the residual resampled from the material's own history. Residuals
+    are kept only for days with issues; the other days of a material's
+    history span are zero residuals, so a pool is offsets[i]:offsets[i + 1]
+    of residuals padded with zeros up to span[i] days. A span of 0 marks a
+    material without history.
+    """
+
+    __slots__ = ('names', 'level', 'weekday', 'month', 'span', 'offsets', 'residuals')
+
+    def __init__(self, names, level, weekday, month, span, offsets, residuals):
+        self.names = names
+        self.level = level
+        self.weekday = weekday
+        self.month = month
+        self.span = span
+        self.offsets = offsets
+        self.residuals = residuals
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def fit(cls, history):
+        """Fit every material of a history long table at once.
+
+        Same-day rows are summed and days without issues inside a material's
+        first-to-last history date count as zero demand. Weekday and month
+        sums come from one bincount over all materials, and the number of
+        each weekday and month inside every span from cumulative calendar
+        counts, so nothing loops over materials.
+        """
+        codes, names = pd.factorize(history['Material Name'], sort=True)
+        dates = history['Date'].to_numpy().astype('datetime64[D]')
+        if not len(dates):
+            return cls(np.zeros(0, dtype=object), np.zeros(0), np.ones((0, 7)), np.ones((0, 12)),
+                       np.zeros(0, dtype=int), np.zeros(1, dtype=int), np.zeros(0, dtype=np.float32))
+        first_date = dates.min()
+        day = (dates - first_date).astype(np.int64)
+        days = int(day.max()) + 1
+        quantity = np.maximum(history['Quantity'].to_numpy(dtype=float), 0)
+
+        # One total per (material, day), in material then day order
+        key = codes.astype(np.int64) * days + day
+        if len(key) > 1 and not (np.diff(key) > 0).all():
+            key, inverse = np.unique(key, return_inverse=True)
+            quantity = np.bincount(inverse, weights=quantity)
+        codes, day = key // days, key % days
+        count = len(names)
+        offsets = np.searchsorted(codes, np.arange(count + 1))
+        first, last = day[offsets[:-1]], day[offsets[1:] - 1]
+        span = last - first + 1
+
+        calendar = pd.DatetimeIndex(first_date + np.arange(days))
+        weekday_of, month_of = calendar.weekday.to_numpy(), calendar.month.to_numpy() - 1
+        level = np.bincount(codes, weights=quantity, minlength=count) / span
+        weekday = _factors(codes, weekday_of[day], quantity, weekday_of, first, last, level, 7)
+        month = _factors(codes, month_of[day], quantity, month_of, first, last, level, 12)
+
+        fitted = level[codes] * weekday[codes, weekday_of[day]] * month[codes, month_of[day]]
+        residuals = np.divide(quantity, fitted, out=np.zeros_like(quantity), where=fitted > 0)
+        # Scale each pool to a mean of 1 over its span, zero days included
+        scale = np.bincount(codes, weights=residuals, minlength=count)
+        scale = np.divide(span, scale, out=np.zeros(count), where=scale > 0)
+        residuals = (residuals * scale[codes]).astype(np.float32)
+        return cls(np.asarray(names, dtype=object), level, weekday, month, span, offsets, residuals)
+
+    def take(self, names):
+        """Profiles for names in that order; names without history get an empty profile (span 0)."""
+        names = np.asarray(names, dtype=object)
+        positions = (pd.Index(self.names).get_indexer(pd.Index(names)) if len(self)
+                     else np.full(len(names), -1))
+        found = positions >= 0
+        positions = positions[found]
+
+        level, span = np.zeros(len(names)), np.zeros(len(names), dtype=int)
+        weekday, month = np.ones((len(names), 7)), np.ones((len(names), 12))
+        starts, lengths = np.zeros(len(names), dtype=int), np.zeros(len(names), dtype=int)
+        level[found], span[found] = self.level[positions], self.span[positions]
+        weekday[found], month[found] = self.weekday[positions], self.month[positions]
+        starts[found] = self.offsets[positions]
+        lengths[found] = self.offsets[positions + 1] - starts[found]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return DemandProfiles(names, level, weekday, month, span, offsets, self.residuals[gather])
+
+    @property
+    def has_history(self):
+        return self.span > 0
+
+    def digests(self):
+        """SHA-256 of each material's fitted profile for cache keys; '' for a material without history."""
+        return [hashlib.sha256(self.level[idx:idx + 1].tobytes() + self.weekday[idx].tobytes()
+                               + self.month[idx].tobytes() + self.span[idx:idx + 1].tobytes()
+                               + self.residuals[self.offsets[idx]:self.offsets[idx + 1]].tobytes()).hexdigest()
+                if self.span[idx] else '' for idx in range(len(self))]
+
+    def demand(self, rows, start_date, uniforms):
+        """Daily demand of profile rows from a (rows, days) block of uniform draws on [0, 1).
+
+        Each draw picks one day of the material's history span; days
+        without issues give a zero residual. Every row must have history.
+        """
+        calendar = pd.DatetimeIndex(np.datetime64(start_date, 'D') + np.arange(uniforms.shape[1]))
+        weekday = self.weekday[rows][:, calendar.weekday.to_numpy()]
+        month = self.month[rows][:, calendar.month.to_numpy() - 1]
+        pick = (uniforms * self.span[rows, None]).astype(np.int64)
+        observed = (self.offsets[rows + 1] - self.offsets[rows])[:, None]
+        residual = np.where(pick < observed,
+                            self.residuals[self.offsets[rows, None] + np.minimum(pick, observed - 1)], 0.0)
+        return self.level[rows, None] * weekday * month * residual
+
+
+def _factors(codes, bucket, quantity, calendar_bucket, first, last, level, buckets):
+    # Mean demand per calendar bucket over each material's span, relative to its level
+    sums = np.bincount(codes * buckets + bucket, weights=quantity,
+                       minlength=len(level) * buckets).reshape(-1, buckets)
+    cumulative = np.vstack((np.zeros(buckets), np.cumsum(np.eye(buckets)[calendar_bucket], axis=0)))
+    days = cumulative[last + 1] - cumulative[first]
+    prior = PROFILE_PRIOR_DAYS * level[:, None]
+    mean = (sums + prior) / (days + PROFILE_PRIOR_DAYS)
+    return np.divide(mean, level[:, None], out=np.ones_like(mean), where=level[:, None] > 0)
+
+
+def bootstrap_demand(profiles, start_date, sim_days, rngs=None):
+    """Actual consumption resampled from history for the rows of aligned profiles that have one.
+
+    Returns (rows, consumption) where consumption is a (rows with history,
+    days) matrix zeroed past each material's own horizon. With rngs each
+    material draws its uniforms from its own Generator; without, they come
+    from one call on the global NumPy stream in row order.
+    """
+    rows = np.flatnonzero(profiles.has_history)
+    width = sim_days.max(initial=0)
+    active = np.arange(width) < sim_days[rows, None]
+    uniforms = np.zeros(active.shape)
+    if rngs is None:
+        uniforms[active] = np.random.random(active.sum())
+    else:
+        for position, row in enumerate(rows):
+            uniforms[position, :sim_days[row]] = rngs[row].random(sim_days[row])
+    return rows, np.where(active, profiles.demand(rows, start_date, uniforms), 0.0)
@@ -0,0 +1,89 @@
+import pandas as pd
+
+from .cache import simulate_materials_cached
+from .result import CompactBatch
+
+
+def row_hashes(materials_df, profiles=None):
+    """Content hash of every row, including its index label, keyed by label.
+
+    With demand history profiles the hash also covers the row's fitted profile.
+    """
+    hashes = dict(zip(materials_df.index, pd.util.hash_pandas_object(materials_df, index=True).to_numpy()))
+    if profiles is not None:
+        digests = profiles.take(materials_df['Material Name']).digests()
+        hashes = {label: f'{row_hash}|{digest}' for (label, row_hash), digest in zip(hashes.items(), digests)}
+    return hashes
+
+
+def diff_rows(previous_hashes, current_hashes):
+    """Labels that were inserted or edited, and labels that were deleted."""
+    changed = [label for label, row_hash in current_hashes.items() if previous_hashes.get(label) != row_hash]
+    removed = [label for label in previous_hashes if label not in current_hashes]
+    return changed, removed
+
+
+class IncrementalBatch:
+    """Batch result that survives reruns and only re-simulates edited rows.
+
+    Holds one single-material CompactBatch piece per index label. Each
+    update diffs the edited frame against the previous one and simulates
+    only the inserted or changed rows. A new start date or seed starts over;
+    with demand history profiles, a row also counts as changed when its
+    material's fitted profile does.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.hashes = {}
+        self.pieces = {}
+        self.changed = []
+
+    def _start(self, start_date, seed):
+        if self.context != (start_date, seed):
+            self.context = (start_date, seed)
+            self.hashes, self.pieces = {}, {}
+
+    def update(self, materials_df, start_date, seed, workers=1, progress=None, profiles=None):
+        hashes = row_hashes(materials_df, profiles)
+        self._start(start_date, seed)
+        changed, removed = diff_rows(self.hashes, hashes)
+        for label in removed:
+            self.pieces.pop(label, None)
+        if changed:
+            positions = materials_df.index.get_indexer(changed)
+            result = simulate_materials_cached(materials_df.iloc[positions], start_date, seed, workers,
+                                               progress=progress, compact=True, profiles=profiles)
+            self.pieces.update(zip(changed, result.split()))
+
+        self.hashes = hashes
+        self.changed = changed
+        if not len(materials_df):
+            return simulate_materials_cached(materials_df, start_date, seed)
+        return CompactBatch.concat(self.pieces[label] for label in materials_df.index).to_batch()
+
+    def adopt(self, materials_df, start_date, seed, pieces, profiles=None):
+        """Take one finished single-material piece per row (e.g. from a BatchJob) instead of simulating.
+
+        Rows inserted or edited since the pieces held count as changed, like update.
+        """
+        hashes = row_hashes(materials_df, profiles)
+        self._start(start_date, seed)
+        self.changed = [label for label, row_hash in hashes.items() if self.hashes.get(label) != row_hash]
+        self.pieces = dict(zip(materials_df.index, pieces))
+        self.hashes = hashes
+        if not len(materials_df):
+            return simulate_materials_cached(materials_df, start_date, seed)
+        return CompactBatch.concat(pieces).to_batch()
+
+    def held_pieces(self, materials_df, start_date, seed, profiles=None):
+        """The piece held for every row unchanged since the last run, None for the others."""
+        if self.context != (start_date, seed):
+            return [None] * len(materials_df)
+        hashes = row_hashes(materials_df, profiles)
+        return [self.pieces.get(label) if self.hashes.get(label) == row_hash else None
+                for label, row_hash in hashes.items()]
+
+    def view_key(self, label):
+        """Key for anything rendered from one material: stale as soon as the row or context changes."""
+        return (label, self.hashes.get(label), self.context)
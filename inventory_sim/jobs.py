@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import iter_cache_misses, material_keys, results_cache, simulate_materials_cached
+from .result import CompactBatch
+
+# Materials per chunk of a job: progress and cancellation act between chunks, so they stay small
+JOB_CHUNK_SIZE = 500
+
+
+class BatchJob:
+    """A batch simulation running on a background thread.
+
+    Cached materials are available at once; the rest are simulated in
+    chunks (on a process pool when workers > 1) and become available as
+    each chunk finishes. cancel() stops the run after the chunks already
+    being simulated; everything finished stays in the results cache, so
+    running the same inputs again resumes where this run stopped. Misses
+    are simulated chunk_size materials at a time. held
+    optionally gives a piece already known for some rows (None elsewhere),
+    e.g. IncrementalBatch.held_pieces, so they are not simulated again.
+    state is 'running', 'done', 'cancelled' or 'failed' (see error).
+    """
+
+    def __init__(self, job_id, materials_df, keys, start_date, seed, workers=1, profiles=None,
+                 cache=results_cache, held=None, chunk_size=JOB_CHUNK_SIZE):
+        self.job_id = job_id
+        self.owners = set()
+        self.total = len(materials_df)
+        self.state = 'running'
+        self.error = None
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.simulated = 0
+        self._materials_df = materials_df.copy()
+        self._start_date = start_date
+        self._seed = seed
+        held = [None] * len(keys) if held is None else held
+        self._pieces = [piece if piece is not None else cache.get(key) for piece, key in zip(held, keys)]
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(keys, workers, profiles, cache, chunk_size),
+                                        daemon=True, name=f'batch-job-{job_id}')
+        self._thread.start()
+
+    def _run(self, keys, workers, profiles, cache, chunk_size):
+        misses = iter_cache_misses(self._materials_df, keys, self._pieces, self._start_date, self._seed, workers,
+                                   cache, profiles, chunk_size)
+        try:
+            for positions in misses:
+                self.simulated += len(positions)
+                if self._cancelled.is_set():
+                    break
+            self.state = 'done' if self.done == self.total else 'cancelled'
+        except Exception as error:
+            self.error = error
+            self.state = 'failed'
+        finally:
+            misses.close()
+            self.finished_at = time.monotonic()
+
+    @property
+    def done(self):
+        """Materials with a result so far, cached or simulated."""
+        return sum(piece is not None for piece in self._pieces)
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """Materials simulated per second (cache hits not counted)."""
+        return self.simulated / self.elapsed if self.elapsed > 0 else 0.0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.state != 'running'
+
+    def partial(self, limit=None):
+        """(positions, CompactBatch) of the first limit materials with a result, in row order, or None."""
+        positions = [pos for pos, piece in enumerate(list(self._pieces)) if piece is not None][:limit]
+        if not positions:
+            return None
+        return np.array(positions), CompactBatch.concat(self._pieces[pos] for pos in positions)
+
+    def pieces(self):
+        """The single-material CompactBatch pieces in row order once the job is done, else None."""
+        return list(self._pieces) if self.state == 'done' else None
+
+    def result(self):
+        """The whole batch as a CompactBatch once the job is done, else None."""
+        if self.state != 'done':
+            return None
+        if not self.total:
+            return simulate_materials_cached(self._materials_df, self._start_date, self._seed, compact=True)
+        return CompactBatch.concat(self._pieces)
+
+
+class JobRegistry:
+    """Background batch jobs by id, shared by every session of the server process.
+
+    Jobs are also keyed by their inputs: submitting the same materials,
+    start date, seed and history again returns the existing job, so a
+    script rerun picks up a running or finished job instead of starting
+    over. A cancelled or failed job is only replaced when restart is set.
+    Sessions share a job, so each submit names its owner (e.g. a session
+    id) and release() only cancels a job once no owner holds it any more.
+    The oldest finished jobs are dropped beyond max_jobs.
+    """
+
+    def __init__(self, max_jobs=8):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._by_inputs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, materials_df, start_date, seed, workers=1, profiles=None, restart=False, cache=results_cache,
+               held=None, owner=None):
+        keys = material_keys(materials_df, start_date, seed, profiles)
+        inputs = hashlib.sha256('\n'.join(keys).encode()).hexdigest()
+        with self._lock:
+            job = self._jobs.get(self._by_inputs.get(inputs))
+            if job is not None and not (restart and job.state in ('cancelled', 'failed')):
+                job.owners.add(owner)
+                return job
+            job = BatchJob(uuid.uuid4().hex[:12], materials_df, keys, start_date, seed, workers, profiles, cache,
+                           held)
+            job.owners.add(owner)
+            self._jobs[job.job_id] = job
+            self._by_inputs[inputs] = job.job_id
+            finished = [job_id for job_id, old in self._jobs.items() if old.state != 'running']
+            for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[job_id]
+            self._by_inputs = {key: job_id for key, job_id in self._by_inputs.items() if job_id in self._jobs}
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def release(self, job_id, owner=None):
+        """Drop owner from the job and cancel it when no other owner is left. Returns the job, or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.owners.discard(owner)
+                if not job.owners:
+                    job.cancel()
+            return job
+
+
+batch_jobs = JobRegistry()
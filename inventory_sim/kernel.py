@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+from .ddmrp import build_outputs, week_bucket_index
+from .history import bootstrap_demand
+from .leadtime import batch_lead_days, lead_time_params
+from .rng import material_rngs
+
+# Batch workbook column for each simulation parameter
+MATERIAL_COLUMNS = {
+    'monthly_usage_avg': 'Monthly Usage Average',
+    'current_usage': 'Current Usage',
+    'beginning_inventory': 'Beginning Inventory',
+    'delivery_lead_time': 'Lead Time (days)',
+    'critical_level': 'Critical Level',
+    'rop': 'Re-Order Point (ROP)',
+    'max_qty': 'Maximum Quantity',
+    'inventory_value': 'Inventory Value per UoM',
+    'qty_per_package': 'Quantity per Package',
+    'moq': 'Minimum Order Quantity (MOQ)',
+    'sim_days': 'Simulation Days',
+    'tol': 'TOL',
+}
+WEEK_COLUMNS = ['W1', 'W2', 'W3', 'W4', 'W5']
+
+
+def material_arrays(materials_df):
+    """Pull the simulation parameters out of a materials frame as column vectors."""
+    params = {name: materials_df[column].to_numpy(dtype=float) for name, column in MATERIAL_COLUMNS.items()}
+    params['sim_days'] = params['sim_days'].astype(int)
+    params['weights'] = materials_df[WEEK_COLUMNS].to_numpy(dtype=float)
+    params['lead_days'] = np.maximum(1, np.ceil(params['delivery_lead_time'])).astype(int)
+    params.update(lead_time_params(materials_df))
+    return params
+
+
+def horizon_mask(sim_days):
+    return np.arange(sim_days.max(initial=0)) < sim_days[:, None]
+
+
+def batch_consumption(params, start_date, rngs=None, profiles=None):
+    """Daily Actual and Avg consumption as materials x days arrays.
+
+    Without rngs the tolerance factors are drawn in one call, material by
+    material, so the global NumPy stream lines up with one vectorized call
+    per material. With rngs each material draws from its own Generator.
+    Days past a material's own horizon consume nothing. Rows of profiles
+    (DemandProfiles aligned to the materials) that have history replace
+    their Actual consumption with demand resampled from it, drawn after
+    the tolerance factors.
+    """
+    active = horizon_mask(params['sim_days'])
+    buckets = week_bucket_index(start_date, active.shape[1])
+    base_daily_use = (params['current_usage'][:, None] * params['weights'][:, buckets]) / 6
+
+    tolerance_factors = np.zeros(active.shape)
+    if rngs is None:
+        tol = np.repeat(params['tol'], params['sim_days'])
+        tolerance_factors[active] = np.random.uniform(1 - tol, 1 + tol)
+    else:
+        for idx, (rng, tol, sim_days) in enumerate(zip(rngs, params['tol'], params['sim_days'])):
+            tolerance_factors[idx, :sim_days] = rng.uniform(1 - tol, 1 + tol, sim_days)
+
+    consumption_actual = base_daily_use * tolerance_factors
+    if profiles is not None and profiles.has_history.any():
+        rows, demand = bootstrap_demand(profiles, start_date, params['sim_days'], rngs)
+        consumption_actual[rows] = demand
+    consumption_avg = np.where(active, (params['monthly_usage_avg'] / 30)[:, None], 0.0)
+    return consumption_actual, consumption_avg
+
+
+def replenish_batch(consumption, beginning_inventory, rop, max_qty, moq, qty_per_package, lead_days):
+    """Advance every row one day per step with masked reorder decisions.
+
+    Mirrors ddmrp.replenish for a whole matrix of streams: at most one order
+    per row is in transit, and a row reorders when it is at or below ROP with
+    nothing on the way. lead_days is one lead time for every row, one per
+    row, or a (rows, orders) matrix of pre-drawn per-order lead times where
+    a row's n-th order takes column n. Returns the unclipped end-of-day
+    levels, the quantity ordered on each day, the quantity received on each
+    day, and boolean masks marking order and delivery days.
+    """
+    rows, sim_days = consumption.shape
+    levels = np.empty((rows, sim_days))
+    order_qty = np.zeros((rows, sim_days))
+    received_qty = np.zeros((rows, sim_days))
+    ordered = np.zeros((rows, sim_days), dtype=bool)
+    received = np.zeros((rows, sim_days), dtype=bool)
+
+    inventory = np.asarray(beginning_inventory, dtype=float).copy()
+    due_day = np.full(rows, -1)
+    due_qty = np.zeros(rows)
+    lead_days = np.asarray(lead_days)
+    if lead_days.ndim == 2:
+        row_index = np.arange(rows)
+        order_count = np.zeros(rows, dtype=int)
+
+    for day in range(sim_days):
+        inventory = np.maximum(0, inventory - consumption[:, day])
+
+        arriving = due_day == day
+        inventory += np.where(arriving, due_qty, 0.0)
+        due_day[arriving] = -1
+        received[:, day] = arriving
+        received_qty[:, day] = np.where(arriving, due_qty, 0.0)
+
+        reorder = (inventory <= rop) & (due_day < 0)
+        if reorder.any():
+            qty = np.maximum(moq, np.ceil((max_qty - inventory) / qty_per_package) * qty_per_package)
+            qty = np.minimum(qty, max_qty - inventory)
+            if lead_days.ndim == 2:
+                due_day = np.where(reorder, day + lead_days[row_index, order_count], due_day)
+                order_count += reorder
+            else:
+                due_day = np.where(reorder, day + lead_days, due_day)
+            due_qty = np.where(reorder, qty, due_qty)
+            ordered[:, day] = reorder
+            order_qty[:, day] = np.where(reorder, qty, 0.0)
+
+        levels[:, day] = inventory
+
+    return levels, order_qty, received_qty, ordered, received
+
+
+def simulate_materials_batch(materials_df, start_date, seed=None, profiles=None):
+    """Simulate every row of a batch workbook in one call.
+
+    Returns a dict of materials x days arrays (Actual and Avg consumption,
+    unclipped inventory, ordered and received quantities with their masks)
+    alongside the parameter vectors they were built from. With a seed, each
+    material draws from its own stream keyed by its index label.
+
+    Materials with a stochastic lead time draw their per-order lead days up
+    front, after their consumption; order_leads holds them, and is None when
+    every lead time is fixed. Both streams read the same draws by order
+    number.
+
+    With profiles (DemandProfiles), materials whose name has history take
+    their Actual demand from it instead of W1-W5 and TOL; params['history']
+    marks them. The Avg stream keeps the Monthly Usage Average.
+    """
+    params = material_arrays(materials_df)
+    rngs = None if seed is None else material_rngs(seed, materials_df.index)
+    if profiles is not None:
+        profiles = profiles.take(materials_df['Material Name'])
+    params['history'] = np.zeros(len(materials_df), dtype=bool) if profiles is None else profiles.has_history
+    consumption_actual, consumption_avg = batch_consumption(params, start_date, rngs, profiles)
+    order_leads = batch_lead_days(params, rngs)
+    replenish_args = (params['beginning_inventory'], params['rop'], params['max_qty'], params['moq'],
+                      params['qty_per_package'], params['lead_days'] if order_leads is None else order_leads)
+
+    result = {'params': params, 'start_date': start_date, 'material_ids': materials_df.index.to_numpy(),
+              'consumption_actual': consumption_actual, 'consumption_avg': consumption_avg,
+              'order_leads': order_leads}
+    for stream, consumption in (('actual', consumption_actual), ('avg', consumption_avg)):
+        levels, order_qty, received_qty, ordered, received = replenish_batch(consumption, *replenish_args)
+        result[f'inventory_{stream}'] = levels
+        result[f'order_qty_{stream}'] = order_qty
+        result[f'received_qty_{stream}'] = received_qty
+        result[f'ordered_{stream}'] = ordered
+        result[f'received_{stream}'] = received
+    return result
+
+
+def order_arrivals(result, rows, days):
+    """Arrival days of the orders at (rows, days), given in row then day order like np.nonzero."""
+    order_leads = result.get('order_leads')
+    if order_leads is None:
+        return days + result['params']['lead_days'][rows]
+    # The n-th order of a row took the n-th pre-drawn lead time
+    order_number = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    return days + order_leads[rows, order_number]
+
+
+def _orders(result, stream, idx, sim_days):
+    order_days = np.flatnonzero(result[f'ordered_{stream}'][idx, :sim_days])
+    arrivals = order_arrivals(result, np.full(len(order_days), idx), order_days)
+    quantities = result[f'order_qty_{stream}'][idx, order_days]
+    return [(day, arrival, qty) for day, arrival, qty in zip(order_days.tolist(), arrivals.tolist(), quantities)]
+
+
+def material_outputs(result, idx):
+    """Materialize one material of a batch result in the single-material return format."""
+    params = result['params']
+    sim_days = params['sim_days'][idx]
+    scalar = {name: params[name][idx] for name in MATERIAL_COLUMNS if name != 'sim_days'}
+    return build_outputs(result['start_date'], sim_days, scalar['beginning_inventory'], scalar['rop'],
+                         scalar['max_qty'], scalar['critical_level'], scalar['delivery_lead_time'],
+                         scalar['inventory_value'], scalar['monthly_usage_avg'] / 30,
+                         result['inventory_actual'][idx, :sim_days], result['inventory_avg'][idx, :sim_days],
+                         _orders(result, 'actual', idx, sim_days), _orders(result, 'avg', idx, sim_days))
+
+
+def batch_summary(result, material_names):
+    """One row of headline figures per material, computed straight from the batch arrays."""
+    params = result['params']
+    sim_days = params['sim_days']
+    rows = np.arange(len(sim_days))
+    beginning = params['beginning_inventory'][:, None]
+
+    # Column 0 holds the beginning inventory so a zero-day horizon still has a level
+    active = np.concatenate((np.ones((len(rows), 1), dtype=bool), horizon_mask(sim_days)), axis=1)
+    levels = np.concatenate((beginning, result['inventory_actual'][:, :active.shape[1] - 1]), axis=1)
+    displayed = np.minimum(levels, params['max_qty'][:, None])
+    on_horizon = active[:, 1:]
+
+    return pd.DataFrame({
+        'Material Name': np.asarray(material_names),
+        'Simulation Days': sim_days,
+        'Ending Inventory': displayed[rows, sim_days],
+        'Minimum Inventory': np.where(active, displayed, np.inf).min(axis=1),
+        'Days Below Critical': ((levels[:, 1:] < params['critical_level'][:, None]) & on_horizon).sum(axis=1),
+        'Stockout Days': ((levels[:, 1:] <= 0) & on_horizon).sum(axis=1),
+        'Actual Orders': (result['ordered_actual'][:, :on_horizon.shape[1]] & on_horizon).sum(axis=1),
+        'Average Inventory Value': (np.where(active, displayed, 0).sum(axis=1) / active.sum(axis=1)
+                                    * params['inventory_value']),
+    })
@@ -0,0 +1,144 @@
+import math
+
+import numpy as np
+
+from .ddmrp import arrival_offset
+from .rng import resolve_rng
+
+LEAD_TIME_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal', 'empirical')
+# Optional batch workbook columns describing each material's lead-time distribution
+LEAD_TIME_COLUMNS = {
+    'lead_distribution': 'Lead Time Distribution',
+    'lead_low': 'Lead Time Min',
+    'lead_high': 'Lead Time Max',
+    'lead_sigma': 'Lead Time Sigma',
+    'lead_history': 'Lead Time History',
+}
+# Defaults when a distribution's own columns are blank: receipts within +/-40% of the
+# quoted lead time (uniform), or a lognormal with the quoted lead time as its mean
+LEAD_TIME_SPREAD = 0.4
+LOGNORMAL_SIGMA = 0.25
+# Longest sampled lead time; keeps lognormal tails finite as whole days
+MAX_LEAD_DAYS = 3650
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def parse_history(value):
+    """Observed lead times from a cell such as '5, 7, 12' or a single number, as a float array."""
+    if _missing(value):
+        return np.empty(0)
+    if isinstance(value, (int, float)):
+        return np.array([float(value)])
+    parts = str(value).replace(';', ',').split(',')
+    return np.array([float(part) for part in parts if part.strip()])
+
+
+def normalize_distribution(value):
+    """Lower-cased distribution name, 'fixed' for a blank cell; ValueError for an unknown one."""
+    name = '' if _missing(value) else str(value).strip().lower()
+    name = name or 'fixed'
+    if name not in LEAD_TIME_DISTRIBUTIONS:
+        raise ValueError(f"Unknown lead time distribution {value!r}; "
+                         f"expected one of: {', '.join(LEAD_TIME_DISTRIBUTIONS)}.")
+    return name
+
+
+def check_lead_time(distribution, history=None):
+    """Raise ValueError unless the distribution name is known and an empirical one has a usable history."""
+    if normalize_distribution(distribution) == 'empirical' and not len(parse_history(history)):
+        raise ValueError("The empirical lead time distribution needs a Lead Time History.")
+
+
+def sample_lead_days(rng, delivery_lead_time, size, distribution='fixed', low=None, high=None, sigma=None,
+                     history=None):
+    """Lead times for size consecutive orders, in whole days of at least one.
+
+    Draws are rounded up the same way as a fixed lead time, so 'fixed' gives
+    the deterministic arrival offset without touching the random stream.
+    Blank parameters fall back to +/-40% of delivery_lead_time (uniform) and
+    a lognormal whose mean is delivery_lead_time. 'empirical' resamples the
+    history values with replacement.
+    """
+    distribution = normalize_distribution(distribution)
+    if distribution == 'fixed':
+        return np.full(size, arrival_offset(delivery_lead_time))
+    random = resolve_rng(rng)
+    if distribution == 'uniform':
+        low = delivery_lead_time * (1 - LEAD_TIME_SPREAD) if _missing(low) else low
+        high = delivery_lead_time * (1 + LEAD_TIME_SPREAD) if _missing(high) else high
+        draws = random.uniform(low, high, size)
+    elif distribution == 'lognormal':
+        sigma = LOGNORMAL_SIGMA if _missing(sigma) else sigma
+        draws = random.lognormal(math.log(max(delivery_lead_time, 1e-9)) - sigma ** 2 / 2, sigma, size)
+    else:
+        check_lead_time(distribution, history)
+        draws = random.choice(parse_history(history), size)
+    return np.clip(np.ceil(draws), 1, MAX_LEAD_DAYS).astype(int)
+
+
+def lead_time_spec(row):
+    """Keyword arguments for sample_lead_days from one materials row, or None for a fixed lead time."""
+    spec = {name: row.get(column) for name, column in LEAD_TIME_COLUMNS.items()}
+    spec['distribution'] = normalize_distribution(spec.pop('lead_distribution'))
+    if spec['distribution'] == 'fixed':
+        return None
+    return {'distribution': spec['distribution'], 'low': spec['lead_low'], 'high': spec['lead_high'],
+            'sigma': spec['lead_sigma'], 'history': spec['lead_history']}
+
+
+def lead_time_params(materials_df):
+    """The lead-time columns of a materials frame as parameter vectors, fixed where absent or blank."""
+    rows = len(materials_df)
+    params = {'lead_distribution': np.full(rows, 'fixed', dtype=object)}
+    if LEAD_TIME_COLUMNS['lead_distribution'] in materials_df:
+        params['lead_distribution'] = np.array(
+            [normalize_distribution(value) for value in materials_df[LEAD_TIME_COLUMNS['lead_distribution']]],
+            dtype=object)
+    for name in ('lead_low', 'lead_high', 'lead_sigma'):
+        column = LEAD_TIME_COLUMNS[name]
+        params[name] = (materials_df[column].to_numpy(dtype=float) if column in materials_df
+                        else np.full(rows, np.nan))
+    column = LEAD_TIME_COLUMNS['lead_history']
+    params['lead_history'] = (materials_df[column].to_numpy(dtype=object) if column in materials_df
+                              else np.full(rows, None, dtype=object))
+    return params
+
+
+def batch_lead_days(params, rngs=None):
+    """Per-order lead days as a (materials, orders) matrix, or None when every material is fixed.
+
+    With at most one order in transit and a lead time of at least a day, a
+    material places at most sim_days orders, so each row holds enough draws
+    for its whole horizon. Rows draw from their material's Generator, or in
+    row order from the global NumPy stream without rngs; fixed rows repeat
+    their lead_days and draw nothing.
+    """
+    stochastic = np.flatnonzero(params['lead_distribution'] != 'fixed')
+    if not len(stochastic):
+        return None
+    lead_days = np.repeat(params['lead_days'][:, None], max(params['sim_days'].max(initial=0), 1), axis=1)
+    for idx in stochastic:
+        sim_days = params['sim_days'][idx]
+        lead_days[idx, :sim_days] = sample_lead_days(
+            None if rngs is None else rngs[idx], params['delivery_lead_time'][idx], sim_days,
+            params['lead_distribution'][idx], params['lead_low'][idx], params['lead_high'][idx],
+            params['lead_sigma'][idx], params['lead_history'][idx])
+    return lead_days
+
+
+def replication_lead_days(rngs, delivery_lead_time, sim_days, lead_time=None):
+    """Per-order lead days for Monte Carlo replications.
+
+    The fixed arrival offset when lead_time is None, otherwise a
+    (replications, sim_days) matrix with one row drawn from each replication
+    stream; lead_time holds sample_lead_days keyword arguments.
+    """
+    if lead_time is None or normalize_distribution(lead_time.get('distribution')) == 'fixed':
+        return arrival_offset(delivery_lead_time)
+    lead_days = np.empty((len(rngs), max(sim_days, 1)), dtype=int)
+    for row, rng in enumerate(rngs):
+        lead_days[row] = sample_lead_days(rng, delivery_lead_time, lead_days.shape[1], **lead_time)
+    return lead_days
@@ -0,0 +1,107 @@
+import numpy as np
+
+from .ddmrp import week_bucket_index
+from .kernel import replenish_batch
+from .leadtime import replication_lead_days
+from .rng import replication_rngs, replication_uniform
+
+BAND_PERCENTILES = [5, 50, 95]
+
+
+def receive_batch(consumption, beginning_inventory, received_qty):
+    """Inventory rows that consume their own demand but receive orders placed elsewhere.
+
+    Used for the v2 page, where the Avg stream decides when to order and
+    both streams get the deliveries.
+    """
+    rows, sim_days = consumption.shape
+    levels = np.empty((rows, sim_days))
+    inventory = np.full(rows, beginning_inventory, dtype=float)
+    for day in range(sim_days):
+        inventory = np.maximum(0, inventory - consumption[:, day]) + received_qty[:, day]
+        levels[:, day] = inventory
+    return levels
+
+
+def summarize_replications(levels, ordered, critical_level, max_qty):
+    """Risk statistics over a (replications, days) block of unclipped levels."""
+    displayed = np.minimum(levels, max_qty)
+    p5, p50, p95 = np.percentile(displayed, BAND_PERCENTILES, axis=0)
+    below_critical = levels < critical_level
+    stockout_days = (levels <= 0).sum(axis=1)
+    order_counts = ordered.sum(axis=1)
+    return {
+        'p5': p5,
+        'p50': p50,
+        'p95': p95,
+        'daily_prob_below_critical': below_critical.mean(axis=0),
+        'prob_below_critical': below_critical.any(axis=1).mean(),
+        'expected_stockout_days': stockout_days.mean(),
+        'prob_stockout': (stockout_days > 0).mean(),
+        'order_count_distribution': np.bincount(order_counts) / len(order_counts),
+        'replications': len(levels),
+    }
+
+
+def monte_carlo_inventory(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
+                          monthly_usage_avg, beginning_inventory, sim_days, replications, seed=None,
+                          lead_time=None):
+    """Monte Carlo version of the Inventory Simulation page model.
+
+    Daily consumption is uniform between 0.8x and 1.25x the average, as on
+    the page, with each replication drawn from its own seeded stream. With a
+    lead_time spec (sample_lead_days keyword arguments) each replication also
+    draws its per-order lead times, after its consumption.
+    """
+    rngs = replication_rngs(seed, replications)
+    daily_avg_use = monthly_usage_avg / 30
+    consumption = replication_uniform(rngs, daily_avg_use / 1.25, daily_avg_use * 1.25, sim_days)
+    lead_days = replication_lead_days(rngs, delivery_lead_time, sim_days, lead_time)
+    levels, _, _, ordered, _ = replenish_batch(consumption, np.full(replications, beginning_inventory),
+                                               rop, max_qty, moq, qty_per_package, lead_days)
+    return summarize_replications(levels, ordered, critical_level, max_qty)
+
+
+def monte_carlo_inventory_v2(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
+                             monthly_usage_avg, actual_monthly_usage, beginning_inventory, sim_days,
+                             replications, seed=None, lead_time=None):
+    """Monte Carlo version of the Inventory Simulation V2 page model.
+
+    Orders are planned on the Avg stream and received by both streams, so
+    the risk statistics describe the Actual stream.
+    """
+    rngs = replication_rngs(seed, replications)
+    daily_avg_use = monthly_usage_avg / 30
+    consumption_avg = replication_uniform(rngs, daily_avg_use / 1.25, daily_avg_use * 1.25, sim_days)
+    consumption_actual = replication_uniform(rngs, actual_monthly_usage / 37.5, actual_monthly_usage / 22.5,
+                                             sim_days)
+    lead_days = replication_lead_days(rngs, delivery_lead_time, sim_days, lead_time)
+    _, _, received_qty, ordered, _ = replenish_batch(consumption_avg, np.full(replications, beginning_inventory),
+                                                     rop, max_qty, moq, qty_per_package, lead_days)
+    levels = receive_batch(consumption_actual, beginning_inventory, received_qty)
+    return summarize_replications(levels, ordered, critical_level, max_qty)
+
+
+def monte_carlo_ddmrp(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
+                      current_usage, w1, w2, w3, w4, w5, tol, beginning_inventory, sim_days,
+                      start_date, replications, seed=None, material_id=None, lead_time=None, profile=None):
+    """Monte Carlo version of the batch page Actual stream.
+
+    Week-bucket demand is shared by every replication; only the tolerance
+    factors are redrawn. With a material_id the replication streams are
+    spawned below that material's batch stream. A profile (the material's
+    DemandProfiles.take row) with history replaces the week buckets: every
+    replication resamples its demand path from the history instead.
+    """
+    rngs = replication_rngs(seed, replications, material_id)
+    if profile is not None and profile.has_history[0]:
+        consumption = profile.demand(np.zeros(replications, dtype=int), start_date,
+                                     replication_uniform(rngs, 0, 1, sim_days))
+    else:
+        weekly_proportions = np.array([w1, w2, w3, w4, w5], dtype=float)[week_bucket_index(start_date, sim_days)]
+        base_daily_use = (current_usage * weekly_proportions) / 6
+        consumption = base_daily_use * replication_uniform(rngs, 1 - tol, 1 + tol, sim_days)
+    lead_days = replication_lead_days(rngs, delivery_lead_time, sim_days, lead_time)
+    levels, _, _, ordered, _ = replenish_batch(consumption, np.full(replications, beginning_inventory),
+                                               rop, max_qty, moq, qty_per_package, lead_days)
+    return summarize_replications(levels, ordered, critical_level, max_qty)
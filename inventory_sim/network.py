@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from .kernel import batch_consumption, material_arrays
+from .leadtime import batch_lead_days
+from .rng import material_rngs
+
+# Replenishment edges: the supplying node and the node it replenishes, by Material Name,
+# with an optional lead time that replaces the receiving node's own
+NETWORK_SHEET = 'Network'
+EDGE_COLUMNS = ['From', 'To']
+EDGE_LEAD_TIME = 'Lead Time (days)'
+
+
+def read_network_sheet(source, sheet=NETWORK_SHEET):
+    """The replenishment edges from a workbook sheet, or None when the workbook has no such sheet.
+
+    Raises ValueError when the sheet lacks the From or To column.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with pd.ExcelFile(source) as workbook:
+        if sheet not in workbook.sheet_names:
+            return None
+        edges_df = workbook.parse(sheet)
+    edges_df.columns = [str(column).strip() for column in edges_df.columns]
+    missing_columns = [column for column in EDGE_COLUMNS if column not in edges_df.columns]
+    if missing_columns:
+        raise ValueError(f"{sheet} sheet is missing required columns: {', '.join(missing_columns)}.")
+    return edges_df.dropna(subset=EDGE_COLUMNS)
+
+
+def network_topology(node_names, edges_df):
+    """Supplier position of every node (-1 for an outside supplier) and its echelon depth.
+
+    Roots are at depth 0 and each edge goes one level down. Raises
+    ValueError for duplicate node names, edges naming unknown nodes, a node
+    with two suppliers, or a cycle.
+    """
+    names = pd.Index(pd.Series(node_names, dtype=object).astype(str))
+    if not names.is_unique:
+        raise ValueError(f"Node names must be unique: {', '.join(names[names.duplicated()].unique()[:5])}.")
+    source = names.get_indexer(edges_df['From'].astype(str))
+    target = names.get_indexer(edges_df['To'].astype(str))
+    unknown = edges_df.loc[(source < 0) | (target < 0), EDGE_COLUMNS].to_numpy().ravel()
+    if len(unknown):
+        raise ValueError(f"Edges name unknown nodes: {', '.join(sorted(set(map(str, unknown)) - set(names))[:5])}.")
+    if len(np.unique(target)) < len(target):
+        raise ValueError("Each node can have only one supplier.")
+
+    supplier = np.full(len(names), -1)
+    supplier[target] = source
+    # Walk every node up to its root at once; a walk still going after len(names) steps is a cycle
+    depth = np.zeros(len(names), dtype=int)
+    current = supplier.copy()
+    for _ in range(len(names)):
+        climbing = current >= 0
+        if not climbing.any():
+            break
+        depth += climbing
+        current = np.where(climbing, supplier[np.maximum(current, 0)], -1)
+    else:
+        if (current >= 0).any():
+            raise ValueError("Replenishment edges form a cycle.")
+    return supplier, depth
+
+
+def _ship(waiting, supplier, request_day, request_qty, inventory):
+    # Whole orders, oldest first (then by node), while the supplier's stock covers them and every order before
+    order = np.lexsort((waiting, request_day[waiting], supplier[waiting]))
+    waiting = waiting[order]
+    source = supplier[waiting]
+    total = np.cumsum(request_qty[waiting])
+    first = np.concatenate(([True], source[1:] != source[:-1]))
+    group_start = np.maximum.accumulate(np.where(first, total - request_qty[waiting], 0))
+    return waiting[total - group_start <= inventory[source]]
+
+
+def simulate_network(nodes_df, edges_df, start_date, seed=None):
+    """Simulate a replenishment network with every node advanced in lockstep.
+
+    nodes_df holds one stock point per row in the batch template columns,
+    named by Material Name; edges_df has From and To columns naming a
+    supplier and the node it replenishes. Nodes without an incoming edge
+    order from an outside supplier, exactly as in the batch kernel (Actual
+    stream). A node supplied by another node places its order with that
+    node instead: each day, deepest echelon first, suppliers ship waiting
+    orders whole and oldest first while their stock lasts, the shipment
+    leaves their inventory and arrives after the receiving node's lead
+    time (or the edge's), and then the echelon makes its own reorder
+    decisions. At most one order per node is open, waiting or in transit.
+
+    Every node runs to the longest Simulation Days; external demand stops
+    at each node's own horizon. Returns a dict of nodes x days arrays.
+    """
+    params = material_arrays(nodes_df)
+    supplier, depth = network_topology(nodes_df['Material Name'], edges_df)
+    if EDGE_LEAD_TIME in edges_df:
+        lead_time = pd.to_numeric(edges_df[EDGE_LEAD_TIME], errors='coerce').to_numpy(dtype=float)
+        target = pd.Index(nodes_df['Material Name'].astype(str)).get_indexer(edges_df['To'].astype(str))
+        given = ~np.isnan(lead_time)
+        params['delivery_lead_time'] = params['delivery_lead_time'].copy()
+        params['delivery_lead_time'][target[given]] = lead_time[given]
+        params['lead_days'] = np.maximum(1, np.ceil(params['delivery_lead_time'])).astype(int)
+
+    rngs = None if seed is None else material_rngs(seed, nodes_df.index)
+    consumption, _ = batch_consumption(params, start_date, rngs)
+    order_leads = batch_lead_days(params, rngs)
+    nodes, sim_days = consumption.shape
+    rop, max_qty, moq, qty_per_package = params['rop'], params['max_qty'], params['moq'], params['qty_per_package']
+
+    levels = np.empty((nodes, sim_days))
+    shipped_qty = np.zeros((nodes, sim_days))
+    order_qty = np.zeros((nodes, sim_days))
+    received_qty = np.zeros((nodes, sim_days))
+    ordered = np.zeros((nodes, sim_days), dtype=bool)
+    received = np.zeros((nodes, sim_days), dtype=bool)
+    waiting_days = np.zeros((nodes, sim_days), dtype=bool)
+
+    inventory = params['beginning_inventory'].copy()
+    due_day = np.full(nodes, -1)
+    due_qty = np.zeros(nodes)
+    waiting = np.zeros(nodes, dtype=bool)
+    request_day = np.zeros(nodes, dtype=int)
+    request_qty = np.zeros(nodes)
+    request_lead = np.zeros(nodes, dtype=int)
+    order_count = np.zeros(nodes, dtype=int)
+    internal = supplier >= 0
+    echelons = [(np.flatnonzero(depth == level), (depth == level + 1) & internal)
+                for level in range(depth.max(initial=0), -1, -1)]
+
+    for day in range(sim_days):
+        inventory = np.maximum(0, inventory - consumption[:, day])
+
+        arriving = due_day == day
+        inventory += np.where(arriving, due_qty, 0.0)
+        due_day[arriving] = -1
+        received[:, day] = arriving
+        received_qty[:, day] = np.where(arriving, due_qty, 0.0)
+
+        for members, supplied in echelons:
+            # Ship what this echelon's customers are waiting for, before it decides on its own order
+            customers = np.flatnonzero(waiting & supplied)
+            if len(customers):
+                shipped = _ship(customers, supplier, request_day, request_qty, inventory)
+                outbound = np.bincount(supplier[shipped], weights=request_qty[shipped], minlength=nodes)
+                inventory -= outbound
+                shipped_qty[:, day] += outbound
+                waiting[shipped] = False
+                due_day[shipped] = day + request_lead[shipped]
+                due_qty[shipped] = request_qty[shipped]
+
+            reorder = members[(inventory[members] <= rop[members]) & (due_day[members] < 0) & ~waiting[members]]
+            if not len(reorder):
+                continue
+            qty = np.maximum(moq[reorder], np.ceil((max_qty[reorder] - inventory[reorder]) / qty_per_package[reorder])
+                             * qty_per_package[reorder])
+            qty = np.minimum(qty, max_qty[reorder] - inventory[reorder])
+            lead = (params['lead_days'][reorder] if order_leads is None
+                    else order_leads[reorder, np.minimum(order_count[reorder], order_leads.shape[1] - 1)])
+            order_count[reorder] += 1
+            ordered[reorder, day] = True
+            order_qty[reorder, day] = qty
+
+            outside = ~internal[reorder]
+            due_day[reorder[outside]] = day + lead[outside]
+            due_qty[reorder[outside]] = qty[outside]
+            inside = reorder[~outside]
+            waiting[inside] = True
+            request_day[inside] = day
+            request_qty[inside] = qty[~outside]
+            request_lead[inside] = lead[~outside]
+
+        levels[:, day] = inventory
+        waiting_days[:, day] = waiting
+
+    return {'params': params, 'start_date': start_date, 'material_ids': nodes_df.index.to_numpy(),
+            'node_names': nodes_df['Material Name'].astype(str).to_numpy(), 'supplier': supplier, 'depth': depth,
+            'consumption': consumption, 'inventory': levels, 'shipped_qty': shipped_qty, 'order_qty': order_qty,
+            'received_qty': received_qty, 'ordered': ordered, 'received': received, 'waiting': waiting_days}
+
+
+def network_summary(result):
+    """One row of headline figures per node of a simulate_network result."""
+    params = result['params']
+    levels = result['inventory']
+    supplier = result['supplier']
+    names = result['node_names']
+    displayed = np.minimum(levels, params['max_qty'][:, None])
+    return pd.DataFrame({
+        'Node': names,
+        'Supplier': np.where(supplier >= 0, names[np.maximum(supplier, 0)], 'External'),
+        'Echelon': result['depth'],
+        'Ending Inventory': displayed[:, -1] if levels.shape[1] else params['beginning_inventory'],
+        'Minimum Inventory': displayed.min(axis=1, initial=np.inf),
+        'Days Below Critical': (levels < params['critical_level'][:, None]).sum(axis=1),
+        'Stockout Days': (levels <= 0).sum(axis=1),
+        'Orders': result['ordered'].sum(axis=1),
+        'Shipped Downstream': result['shipped_qty'].sum(axis=1),
+        'Days Waiting on Supplier': result['waiting'].sum(axis=1),
+    })
+
+
+def echelon_inventory(result):
+    """Daily inventory summed per echelon, one column per depth, indexed by date."""
+    depth = result['depth']
+    levels = np.minimum(result['inventory'], result['params']['max_qty'][:, None])
+    totals = np.zeros((depth.max(initial=0) + 1, levels.shape[1]))
+    np.add.at(totals, depth, levels)
+    dates = pd.date_range(result['start_date'], periods=levels.shape[1], freq='D', name='Date')
+    return pd.DataFrame(totals.T, index=dates, columns=[f'Echelon {level}' for level in range(len(totals))])
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from .kernel import replenish_batch
+from .leadtime import replication_lead_days
+from .rng import replication_rngs, replication_uniform
+
+# Rows (candidates x replications) advanced together per kernel call
+SWEEP_CHUNK_ROWS = 50000
+
+
+def policy_grid(rop_values, max_qty_values, moq_values):
+    """Every (ROP, Max Qty, MOQ) combination with Max Qty at or above ROP."""
+    rop, max_qty, moq = (grid.ravel() for grid in np.meshgrid(np.unique(rop_values), np.unique(max_qty_values),
+                                                                np.unique(moq_values), indexing='ij'))
+    valid = max_qty >= rop
+    return rop[valid], max_qty[valid], moq[valid]
+
+
+def sweep_policies(rop_values, max_qty_values, moq_values, delivery_lead_time, qty_per_package,
+                   monthly_usage_avg, beginning_inventory, inventory_value, sim_days,
+                   replications=50, holding_rate=0.25, order_cost=0.0, seed=None, lead_time=None):
+    """Evaluate a grid of policies on the Inventory Simulation page model.
+
+    Every candidate sees the same replications of daily consumption, and of
+    per-order lead times when lead_time gives a distribution (common random
+    numbers), and candidates x replications go through the batch kernel as
+    one array, in row chunks. Returns one row per candidate with
+    its service level, average inventory, order count and cost over the
+    horizon. Service level is the share of days with stock on hand. Cost is
+    holding cost (annual rate on average inventory value) plus a fixed cost
+    per order.
+    """
+    daily_avg_use = monthly_usage_avg / 30
+    rngs = replication_rngs(seed, replications)
+    consumption = replication_uniform(rngs, daily_avg_use / 1.25, daily_avg_use * 1.25, sim_days)
+    lead_days = replication_lead_days(rngs, delivery_lead_time, sim_days, lead_time)
+    rop, max_qty, moq = policy_grid(rop_values, max_qty_values, moq_values)
+
+    service = np.empty(len(rop))
+    avg_inventory = np.empty(len(rop))
+    order_count = np.empty(len(rop))
+    per_chunk = max(1, SWEEP_CHUNK_ROWS // replications)
+    for start in range(0, len(rop), per_chunk):
+        stop = min(start + per_chunk, len(rop))
+        candidates = stop - start
+        levels, _, _, ordered, _ = replenish_batch(
+            np.tile(consumption, (candidates, 1)),
+            np.full(candidates * replications, beginning_inventory, dtype=float),
+            np.repeat(rop[start:stop], replications),
+            np.repeat(max_qty[start:stop], replications),
+            np.repeat(moq[start:stop], replications),
+            qty_per_package, lead_days if np.ndim(lead_days) == 0 else np.tile(lead_days, (candidates, 1))
+        )
+        levels = levels.reshape(candidates, replications, sim_days)
+        service[start:stop] = (levels > 0).mean(axis=(1, 2))
+        avg_inventory[start:stop] = np.minimum(levels, max_qty[start:stop, None, None]).mean(axis=(1, 2))
+        order_count[start:stop] = ordered.reshape(candidates, replications, sim_days).sum(axis=2).mean(axis=1)
+
+    holding_cost = avg_inventory * inventory_value * holding_rate * sim_days / 365
+    return pd.DataFrame({
+        'ROP': rop,
+        'Max Qty': max_qty,
+        'MOQ': moq,
+        'Service Level': service,
+        'Average Inventory': avg_inventory,
+        'Orders': order_count,
+        'Holding Cost': holding_cost,
+        'Ordering Cost': order_count * order_cost,
+        'Total Cost': holding_cost + order_count * order_cost,
+    })
+
+
+def best_policy(sweep, target_service):
+    """Cheapest candidate meeting the service target, or None if none does."""
+    feasible = sweep[sweep['Service Level'] >= target_service]
+    if feasible.empty:
+        return None
+    return feasible.loc[feasible['Total Cost'].idxmin()]
+
+
+def cost_surface(sweep, target_service):
+    """ROP x Max Qty table of the cheapest feasible cost over MOQ (NaN where nothing meets the target)."""
+    feasible = sweep[sweep['Service Level'] >= target_service]
+    surface = feasible.pivot_table(index='ROP', columns='Max Qty', values='Total Cost', aggfunc='min')
+    return surface.reindex(index=np.unique(sweep['ROP']), columns=np.unique(sweep['Max Qty']))
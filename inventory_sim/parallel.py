@@ -0,0 +1,140 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .kernel import simulate_materials_batch
+
+# Per-material matrices in a batch result, padded with these when merging chunks
+_MATRIX_FILL = {
+    'consumption_actual': 0.0, 'consumption_avg': 0.0,
+    'inventory_actual': 0.0, 'inventory_avg': 0.0,
+    'order_qty_actual': 0.0, 'order_qty_avg': 0.0,
+    'received_qty_actual': 0.0, 'received_qty_avg': 0.0,
+    'ordered_actual': False, 'ordered_avg': False,
+    'received_actual': False, 'received_avg': False,
+}
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def chunk_bounds(num_materials, workers, chunks_per_worker=4, chunk_size=None):
+    """Split row positions into contiguous (start, stop) chunks.
+
+    A few chunks per worker keeps the pool busy when some materials have
+    much longer horizons than others. chunk_size fixes the rows per chunk
+    instead, e.g. for finer progress.
+    """
+    if num_materials == 0:
+        return [(0, 0)]
+    size = chunk_size or max(1, math.ceil(num_materials / (workers * chunks_per_worker)))
+    return [(start, min(start + size, num_materials)) for start in range(0, num_materials, size)]
+
+
+def _simulate_chunk(chunk_df, start_date, seed, profiles=None):
+    return simulate_materials_batch(chunk_df, start_date, seed, profiles)
+
+
+def _chunk_args(materials_df, start, stop, profiles):
+    chunk_df = materials_df.iloc[start:stop]
+    # Each task only carries the history profiles of its own materials
+    return chunk_df, None if profiles is None else profiles.take(pd.unique(chunk_df['Material Name']))
+
+
+def iter_batch_parallel(materials_df, start_date, seed, workers=None, profiles=None, chunk_size=None):
+    """Simulate materials in chunks on a process pool, yielding results as they finish.
+
+    Yields ((start, stop), chunk_result) in completion order. Every material
+    draws from its own seeded stream, so the output is identical for any
+    worker count. With one worker the chunks run in-process. profiles
+    (DemandProfiles) drives the Actual demand of materials with history.
+    chunk_size is passed on to chunk_bounds.
+    """
+    workers = workers or default_workers()
+    bounds = chunk_bounds(len(materials_df), workers, chunk_size=chunk_size)
+
+    if workers == 1:
+        for start, stop in bounds:
+            chunk_df, chunk_profiles = _chunk_args(materials_df, start, stop, profiles)
+            yield (start, stop), _simulate_chunk(chunk_df, start_date, seed, chunk_profiles)
+        return
+
+    # Spawned workers avoid forking the threaded Streamlit server process
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {}
+        for start, stop in bounds:
+            chunk_df, chunk_profiles = _chunk_args(materials_df, start, stop, profiles)
+            futures[pool.submit(_simulate_chunk, chunk_df, start_date, seed, chunk_profiles)] = (start, stop)
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # A consumer that stops early (a cancelled job) leaves queued chunks unstarted
+            pool.shutdown(cancel_futures=True)
+
+
+def merge_batch_results(chunks):
+    """Stitch ((start, stop), result) chunks back into one batch result in row order."""
+    chunks = sorted(chunks, key=lambda chunk: chunk[0][0])
+    results = [result for _, result in chunks]
+    rows = sum(len(result['material_ids']) for result in results)
+    width = max((result['inventory_actual'].shape[1] for result in results), default=0)
+
+    merged = {
+        'params': {name: np.concatenate([result['params'][name] for result in results])
+                   for name in results[0]['params']},
+        'start_date': results[0]['start_date'],
+        'material_ids': np.concatenate([result['material_ids'] for result in results]),
+    }
+    for name, fill in _MATRIX_FILL.items():
+        matrix = np.full((rows, width), fill)
+        row = 0
+        for result in results:
+            part = result[name]
+            matrix[row:row + part.shape[0], :part.shape[1]] = part
+            row += part.shape[0]
+        merged[name] = matrix
+    merged['order_leads'] = _merge_order_leads(results, merged['params']['lead_days'], width)
+    return merged
+
+
+def _merge_order_leads(results, lead_days, width):
+    # Chunks where every lead time was fixed carry None; their rows repeat the fixed lead days
+    if all(result.get('order_leads') is None for result in results):
+        return None
+    order_leads = np.repeat(lead_days[:, None], max(width, 1), axis=1)
+    row = 0
+    for result in results:
+        rows = len(result['material_ids'])
+        if result.get('order_leads') is not None:
+            order_leads[row:row + rows, :result['order_leads'].shape[1]] = result['order_leads']
+        row += rows
+    return order_leads
+
+
+def simulate_materials_parallel(materials_df, start_date, seed, workers=None, profiles=None):
+    """Run iter_batch_parallel to completion and return one merged batch result."""
+    return merge_batch_results(list(iter_batch_parallel(materials_df, start_date, seed, workers, profiles)))
+
+
+def split_batch_result(result):
+    """Break a batch result into single-material results trimmed to each horizon."""
+    pieces = []
+    for idx, sim_days in enumerate(result['params']['sim_days']):
+        piece = {
+            'params': {name: values[idx:idx + 1] for name, values in result['params'].items()},
+            'start_date': result['start_date'],
+            'material_ids': result['material_ids'][idx:idx + 1],
+        }
+        for name in _MATRIX_FILL:
+            piece[name] = result[name][idx:idx + 1, :sim_days]
+        order_leads = result.get('order_leads')
+        piece['order_leads'] = None if order_leads is None else order_leads[idx:idx + 1, :max(sim_days, 1)]
+        pieces.append(piece)
+    return pieces
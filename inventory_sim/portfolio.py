@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from .kernel import horizon_mask
+
+# Materials reduced at a time, so temporaries stay a fixed size however large the batch
+PORTFOLIO_CHUNK_ROWS = 2000
+
+# Daily portfolio series: flows are summed over a week, stocks are read on its last day
+FLOW_COLUMNS = ['Orders Placed', 'Order Value', 'Cash Outflow']
+STOCK_COLUMNS = ['Inventory Value', 'Open POs', 'Open PO Value', 'Materials Below Critical', 'Active Materials']
+
+
+def chunk_totals(result, stream='actual', start=0, stop=None):
+    """Per-day portfolio totals of rows start:stop of a batch result.
+
+    Inventory is valued at the displayed (Max Qty capped) level. A purchase
+    order is open from its order day until the day before it arrives, and
+    its cash goes out on the delivery day. Days past a material's own
+    horizon are left out.
+    """
+    params = result['params']
+    rows = slice(start, stop)
+    sim_days = params['sim_days'][rows]
+    active = horizon_mask(sim_days)
+    width = active.shape[1]
+    value = params['inventory_value'][rows, None]
+
+    levels = result[f'inventory_{stream}'][rows, :width]
+    order_qty = result[f'order_qty_{stream}'][rows, :width]
+    received_qty = result[f'received_qty_{stream}'][rows, :width]
+    ordered = result[f'ordered_{stream}'][rows, :width] & active
+    # At most one order is in transit per material, so the running difference is 0 or 1
+    in_transit = np.cumsum(ordered, axis=1) - np.cumsum(result[f'received_{stream}'][rows, :width], axis=1)
+    in_transit = (in_transit > 0) & active
+    open_qty = np.cumsum(order_qty, axis=1) - np.cumsum(received_qty, axis=1)
+
+    return {
+        'Inventory Value': (np.minimum(levels, params['max_qty'][rows, None]) * value * active).sum(axis=0),
+        'Orders Placed': ordered.sum(axis=0),
+        'Order Value': (order_qty * value * ordered).sum(axis=0),
+        'Cash Outflow': (received_qty * value * active).sum(axis=0),
+        'Open POs': in_transit.sum(axis=0),
+        'Open PO Value': (open_qty * value * in_transit).sum(axis=0),
+        'Materials Below Critical': ((levels < params['critical_level'][rows, None]) & active).sum(axis=0),
+        'Active Materials': active.sum(axis=0),
+    }
+
+
+def portfolio_daily(results, start_date, stream='actual', chunk_rows=PORTFOLIO_CHUNK_ROWS):
+    """Daily portfolio series over every material of one or more batch results.
+
+    results is a batch result dict or an iterable of them (e.g. the chunks
+    of iter_batch_parallel). Rows are reduced chunk_rows at a time into
+    running day vectors, so memory beyond the inputs grows with the number
+    of days, not the number of materials.
+    """
+    if isinstance(results, dict):
+        results = [results]
+    totals = {}
+    for result in results:
+        count = len(result['params']['sim_days'])
+        for start in range(0, count, chunk_rows):
+            for column, values in chunk_totals(result, stream, start, start + chunk_rows).items():
+                running = totals.get(column, np.zeros(0))
+                if len(values) > len(running):
+                    running = np.pad(running, (0, len(values) - len(running)))
+                running[:len(values)] += values
+                totals[column] = running
+
+    columns = STOCK_COLUMNS[:1] + FLOW_COLUMNS + STOCK_COLUMNS[1:]
+    days = len(totals.get(columns[0], ()))
+    frame = pd.DataFrame({column: totals.get(column, np.zeros(0)) for column in columns},
+                         index=pd.date_range(start_date, periods=days, freq='D', name='Date'))
+    count_columns = ['Orders Placed', 'Open POs', 'Materials Below Critical', 'Active Materials']
+    frame[count_columns] = frame[count_columns].astype(int)
+    return frame
+
+
+def portfolio_weekly(daily):
+    """Roll the daily series up to weeks starting on Monday, with np.add.reduceat."""
+    if daily.empty:
+        return daily.copy()
+    week_starts = np.flatnonzero(daily.index.weekday == 0)
+    starts = np.union1d([0], week_starts)
+    ends = np.append(starts[1:], len(daily)) - 1
+
+    weekly = pd.DataFrame(index=daily.index[starts])
+    for column in FLOW_COLUMNS:
+        weekly[column] = np.add.reduceat(daily[column].to_numpy(), starts)
+    for column in STOCK_COLUMNS:
+        weekly[column] = daily[column].to_numpy()[ends]
+    weekly.index.name = 'Week'
+    return weekly
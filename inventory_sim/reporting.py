@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Points per plotted series above which charts are downsampled
+CHART_MAX_POINTS = 600
+# Reporting periods whose last day gets a row in period-end tables
+REPORTING_BUCKETS = ('week', 'month', 'quarter')
+
+
+def simulation_dates(start_date, sim_days):
+    """Row dates of a simulation frame: the start row followed by one row per simulated day."""
+    days = pd.date_range(start_date, periods=sim_days, freq='D')
+    return pd.DatetimeIndex([start_date]).append(days)
+
+
+def month_end_mask(dates):
+    """Rows that fall on the last day of a month, by calendar arithmetic on the date index."""
+    return np.asarray(pd.DatetimeIndex(dates).is_month_end)
+
+
+def period_end_days(start_date, sim_days, bucket='month'):
+    """Day offsets (day 0 is start_date) of the last day of every reporting period in a horizon.
+
+    bucket is one of REPORTING_BUCKETS; weeks end on Sunday, like the
+    Monday weeks of portfolio_weekly.
+    """
+    dates = pd.date_range(start_date, periods=sim_days, freq='D')
+    if bucket == 'week':
+        ends = dates.weekday == 6
+    elif bucket == 'month':
+        ends = dates.is_month_end
+    elif bucket == 'quarter':
+        ends = dates.is_quarter_end
+    else:
+        raise ValueError(f"Unknown reporting bucket {bucket!r}; expected one of: {', '.join(REPORTING_BUCKETS)}.")
+    return np.flatnonzero(ends)
+
+
+def period_end_positions(start_date, sim_days, bucket='month'):
+    """Rows of a simulation frame holding the end-of-day position of every period-end day.
+
+    Row 0 of the frame is the start row, so day d is row d + 1; gather
+    the rows with df.take instead of matching dates.
+    """
+    return period_end_days(start_date, sim_days, bucket) + 1
+
+
+def lttb_indices(y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of an evenly spaced series.
+
+    Returns the positions of at most threshold points that keep the visual
+    shape of y, always including the first and last point.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.floor(np.arange(threshold - 1) * every) + 1).astype(int)
+    bounds[-1] = n - 1
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = bounds[bucket], bounds[bucket + 1]
+        next_stop = bounds[bucket + 2] if bucket + 2 < len(bounds) else n
+        next_x = (stop + next_stop - 1) / 2
+        next_y = y[stop:next_stop].mean()
+        candidates = np.arange(start, stop)
+        areas = np.abs((previous - next_x) * (y[candidates] - y[previous])
+                       - (previous - candidates) * (next_y - y[previous]))
+        previous = candidates[np.argmax(areas)]
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_frame(df, columns, threshold=CHART_MAX_POINTS, keep=None):
+    """Rows of df needed to draw the given series with at most about threshold points each.
+
+    The LTTB picks of every column are merged so all series stay aligned on
+    one x axis; rows flagged in keep (e.g. markers) are always retained.
+    """
+    if len(df) <= threshold:
+        return df
+    rows = np.unique(np.concatenate([lttb_indices(df[column].to_numpy(), threshold) for column in columns]))
+    if keep is not None:
+        rows = np.union1d(rows, np.flatnonzero(np.asarray(keep)))
+    return df.iloc[rows]
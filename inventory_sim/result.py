@@ -0,0 +1,143 @@
+import numpy as np
+
+from .ddmrp import build_outputs
+from .kernel import MATERIAL_COLUMNS, order_arrivals
+
+STREAMS = ('actual', 'avg')
+# One purchase order of one stream: batch row, order day, arrival day and quantity
+ORDER_DTYPE = np.dtype([('row', np.int32), ('order_day', np.int32), ('arrival_day', np.int32),
+                        ('qty', np.float32)])
+
+
+def order_records(result, stream):
+    """The orders of one stream of a batch result as an ORDER_DTYPE record array, in row then day order."""
+    rows, days = np.nonzero(result[f'ordered_{stream}'])
+    records = np.empty(len(rows), dtype=ORDER_DTYPE)
+    records['row'] = rows
+    records['order_day'] = days
+    records['arrival_day'] = order_arrivals(result, rows, days)
+    records['qty'] = result[f'order_qty_{stream}'][rows, days]
+    return records
+
+
+class CompactBatch:
+    """A batch result that keeps only what varies from day to day.
+
+    Parameters are stored once per material, both inventory streams as one
+    float32 (streams, materials, days) array and orders as a small record
+    array per stream: roughly an eighth of the dict of float64 matrices.
+    The per-day matrices, DataFrames and annotation dicts are rebuilt on
+    demand, for the materials actually displayed.
+    """
+
+    __slots__ = ('params', 'start_date', 'material_ids', 'levels', 'orders')
+
+    def __init__(self, params, start_date, material_ids, levels, orders):
+        self.params = params
+        self.start_date = start_date
+        self.material_ids = material_ids
+        self.levels = levels
+        self.orders = orders
+
+    @classmethod
+    def from_batch(cls, result):
+        """Compact a simulate_materials_batch result (consumption matrices are not kept)."""
+        levels = np.stack([result[f'inventory_{stream}'] for stream in STREAMS]).astype(np.float32)
+        return cls(result['params'], result['start_date'], result['material_ids'], levels,
+                   {stream: order_records(result, stream) for stream in STREAMS})
+
+    @classmethod
+    def concat(cls, batches):
+        """Stack compact batches in order, padding shorter horizons with zero levels."""
+        batches = list(batches)
+        width = max((batch.levels.shape[2] for batch in batches), default=0)
+        levels = np.zeros((len(STREAMS), sum(len(batch) for batch in batches), width), dtype=np.float32)
+        orders = {stream: [] for stream in STREAMS}
+        row = 0
+        for batch in batches:
+            levels[:, row:row + len(batch), :batch.levels.shape[2]] = batch.levels
+            for stream in STREAMS:
+                records = batch.orders[stream].copy()
+                records['row'] += row
+                orders[stream].append(records)
+            row += len(batch)
+        return cls({name: np.concatenate([batch.params[name] for batch in batches]) for name in batches[0].params},
+                   batches[0].start_date, np.concatenate([batch.material_ids for batch in batches]), levels,
+                   {stream: np.concatenate(records) for stream, records in orders.items()})
+
+    def __len__(self):
+        return len(self.material_ids)
+
+    @property
+    def nbytes(self):
+        return (self.levels.nbytes + sum(records.nbytes for records in self.orders.values())
+                + sum(values.nbytes for values in self.params.values()))
+
+    def split(self):
+        """One compact batch per material, trimmed to its own horizon."""
+        pieces = []
+        bounds = {stream: np.searchsorted(records['row'], np.arange(len(self) + 1))
+                  for stream, records in self.orders.items()}
+        for idx, sim_days in enumerate(self.params['sim_days']):
+            orders = {}
+            for stream, records in self.orders.items():
+                piece = records[bounds[stream][idx]:bounds[stream][idx + 1]]
+                piece = piece[piece['order_day'] < sim_days]
+                piece['row'] = 0
+                orders[stream] = piece
+            pieces.append(CompactBatch({name: values[idx:idx + 1] for name, values in self.params.items()},
+                                       self.start_date, self.material_ids[idx:idx + 1],
+                                       self.levels[:, idx:idx + 1, :sim_days].copy(), orders))
+        return pieces
+
+    def to_batch(self):
+        """Expand into the dict of float64 matrices the batch helpers take, minus consumption."""
+        rows, width = self.levels.shape[1:]
+        result = {'params': self.params, 'start_date': self.start_date, 'material_ids': self.material_ids}
+        for position, stream in enumerate(STREAMS):
+            records = self.orders[stream]
+            records = records[records['order_day'] < width]
+            result[f'inventory_{stream}'] = self.levels[position].astype(float)
+            order_qty = np.zeros((rows, width))
+            order_qty[records['row'], records['order_day']] = records['qty']
+            ordered = np.zeros((rows, width), dtype=bool)
+            ordered[records['row'], records['order_day']] = True
+            delivered = records[records['arrival_day'] < width]
+            received_qty = np.zeros((rows, width))
+            received_qty[delivered['row'], delivered['arrival_day']] = delivered['qty']
+            received = np.zeros((rows, width), dtype=bool)
+            received[delivered['row'], delivered['arrival_day']] = True
+            result[f'order_qty_{stream}'] = order_qty
+            result[f'received_qty_{stream}'] = received_qty
+            result[f'ordered_{stream}'] = ordered
+            result[f'received_{stream}'] = received
+        result['order_leads'] = self._order_leads(width)
+        return result
+
+    def _order_leads(self, width):
+        # Per-order lead days for to_batch, or None when every order took its material's fixed lead time
+        leads = {stream: records['arrival_day'] - records['order_day'] for stream, records in self.orders.items()}
+        if all((leads[stream] == self.params['lead_days'][records['row']]).all()
+               for stream, records in self.orders.items()):
+            return None
+        order_leads = np.repeat(self.params['lead_days'][:, None], max(width, 1), axis=1)
+        for stream, records in self.orders.items():
+            rows = records['row']
+            order_leads[rows, np.arange(len(rows)) - np.searchsorted(rows, rows)] = leads[stream]
+        return order_leads
+
+    def outputs(self, idx):
+        """The single-material return tuple of simulate_ddmrp_inventory for one row, built on request."""
+        sim_days = self.params['sim_days'][idx]
+        scalar = {name: self.params[name][idx] for name in MATERIAL_COLUMNS if name != 'sim_days'}
+        orders = []
+        for stream in STREAMS:
+            records = self.orders[stream]
+            records = records[(records['row'] == idx) & (records['order_day'] < sim_days)]
+            orders.append([(day, arrival, float(qty)) for day, arrival, qty
+                           in zip(records['order_day'].tolist(), records['arrival_day'].tolist(), records['qty'])])
+        levels = self.levels[:, idx, :sim_days].astype(float)
+        return build_outputs(self.start_date, sim_days, scalar['beginning_inventory'], scalar['rop'],
+                             scalar['max_qty'], scalar['critical_level'], scalar['delivery_lead_time'],
+                             scalar['inventory_value'], scalar['monthly_usage_avg'] / 30,
+                             levels[0], levels[1], orders[0], orders[1])
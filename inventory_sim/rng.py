@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def material_rng(seed, material_id):
+    """Generator for one material, keyed by the run seed and the material's id.
+
+    This is the stream the seeded batch kernel gives that material, so a
+    single material can be rerun on its own and checked against a batch run.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(int(material_id),)))
+
+
+def material_rngs(seed, material_ids):
+    """One independent Generator per material, keyed by seed and material id.
+
+    A material's stream depends only on the seed and its own id, so results
+    do not change with chunking or with the number of workers.
+    """
+    return [material_rng(seed, material_id) for material_id in material_ids]
+
+
+def replication_rngs(seed, replications, material_id=None):
+    """One counter-based (Philox) Generator per Monte Carlo replication.
+
+    All replications share a Philox key derived from the seed, below the
+    material's own stream key when a material_id is given, and replication i
+    starts its counter at i << 128, so the streams never overlap. Replication
+    i depends only on the seed and i: adding replications leaves the first
+    ones unchanged, and no SeedSequence.spawn is needed per replication.
+    """
+    key = np.random.SeedSequence(seed, spawn_key=() if material_id is None else (int(material_id),))
+    key = key.generate_state(2, np.uint64)
+    return [np.random.Generator(np.random.Philox(key=key, counter=[0, 0, replication, 0]))
+            for replication in range(replications)]
+
+
+def replication_uniform(rngs, low, high, sim_days):
+    """A (replications, sim_days) block of uniform draws, one row per replication stream."""
+    draws = np.empty((len(rngs), sim_days))
+    for row, rng in enumerate(rngs):
+        draws[row] = rng.uniform(low, high, sim_days)
+    return draws
+
+
+def resolve_rng(rng):
+    """The legacy global NumPy stream when rng is None, otherwise rng itself."""
+    return np.random if rng is None else rng
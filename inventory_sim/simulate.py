@@ -0,0 +1,159 @@
+import heapq
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from .reporting import simulation_dates
+from .rng import resolve_rng
+
+
+def simulate_inventory(rop, max_qty, critical_level, moq, 
+                       delivery_lead_time, qty_per_package, monthly_usage_avg, 
+                       beginning_inventory, inventory_value, sim_days=90, start_date=None, rng=None):
+    """Inventory Simulation page model: one stream drawn within +/-25% of the monthly average."""
+    if start_date is None:
+        start_date = datetime.now()
+    daily_avg_use = monthly_usage_avg / 30
+    inventory = beginning_inventory
+    inventory_levels = [inventory]
+    pending_orders = []  # min-heap of (delivery_date, order_seq, quantity, order_day)
+    order_seq = 0
+    order_annotations = []
+
+    daily_consumption = resolve_rng(rng).uniform(daily_avg_use / 1.25, 
+                                                 daily_avg_use * 1.25, 
+                                                 sim_days)
+
+    for day in range(sim_days):
+        current_date = start_date + timedelta(days=day)
+        inventory = max(0, inventory - daily_consumption[day])
+        
+        # Check for delivered orders
+        while pending_orders and pending_orders[0][0] <= current_date:
+            delivery_date, _, qty, order_date = heapq.heappop(pending_orders)
+            inventory += qty
+            order_amount = qty * inventory_value
+            order_annotations.append({
+                'x': delivery_date,
+                'y': inventory,
+                'text': f'Order: {int(qty)}\n({order_amount:,.0f})',
+                'showarrow': True,
+                'arrowhead': 1,
+                'ax': 20,
+                'ay': -30
+            })
+        
+        # Check if inventory falls below ROP and place order if needed
+        # Only future deliveries remain in the heap, so the earliest one tells whether an order is in transit
+        if inventory <= rop and not (pending_orders and
+                                     pending_orders[0][0] < current_date + timedelta(days=delivery_lead_time)):
+            actual_order_qty = max(moq, 
+                                 np.ceil((max_qty - inventory) / qty_per_package) * qty_per_package)
+            actual_order_qty = min(actual_order_qty, max_qty - inventory)
+            
+            delivery_date = current_date + timedelta(days=delivery_lead_time)
+            heapq.heappush(pending_orders, (delivery_date, order_seq, actual_order_qty, current_date))
+            order_seq += 1
+
+        inventory_levels.append(min(inventory, max_qty))
+
+    dates = simulation_dates(start_date, sim_days)
+    df = pd.DataFrame({
+        'Date': dates,
+        'Inventory': inventory_levels,
+        'ROP': rop,
+        'Max_Qty': max_qty,
+        'Critical_Level': critical_level
+    })
+    
+    order_dates = sorted(d[3] for d in pending_orders)
+    if len(order_dates) > 1:
+        avg_cycle = np.mean([(order_dates[i+1] - order_dates[i]).days 
+                           for i in range(len(order_dates)-1)])
+    else:
+        avg_cycle = None
+
+    return df, avg_cycle, daily_avg_use, order_annotations
+
+
+def simulate_inventory_v2(rop, max_qty, critical_level, moq, 
+                          delivery_lead_time, qty_per_package, monthly_usage_avg, 
+                          actual_monthly_usage, beginning_inventory, inventory_value, 
+                          sim_days=90, start_date=None, rng=None):
+    """Inventory Simulation V2 page model: orders follow the Avg stream and are received by both."""
+    if start_date is None:
+        start_date = datetime.now()
+    daily_avg_use = monthly_usage_avg / 30
+    inventory_avg = beginning_inventory
+    inventory_actual = beginning_inventory
+    inventory_levels_avg = [inventory_avg]
+    inventory_levels_actual = [inventory_actual]
+    pending_orders = []  # min-heap of (delivery_date, order_seq, quantity, order_day)
+    order_seq = 0
+    order_annotations = []
+
+    # Generate daily consumption for both average and actual
+    random = resolve_rng(rng)
+    daily_consumption_avg = random.uniform(daily_avg_use / 1.25, 
+                                           daily_avg_use * 1.25, 
+                                           sim_days)
+    daily_consumption_actual = random.uniform(actual_monthly_usage / 37.5,  # 1.25 * 30
+                                              actual_monthly_usage / 22.5,  # 0.75 * 30
+                                              sim_days)
+
+    for day in range(sim_days):
+        current_date = start_date + timedelta(days=day)
+        
+        # Update both inventories
+        inventory_avg = max(0, inventory_avg - daily_consumption_avg[day])
+        inventory_actual = max(0, inventory_actual - daily_consumption_actual[day])
+        
+        # Check for delivered orders (same for both simulations)
+        while pending_orders and pending_orders[0][0] <= current_date:
+            delivery_date, _, qty, order_date = heapq.heappop(pending_orders)
+            inventory_avg += qty
+            inventory_actual += qty
+            order_amount = qty * inventory_value
+            order_annotations.append({
+                'x': delivery_date,
+                'y': inventory_avg,
+                'text': f'Order: {int(qty)}\n({order_amount:,.0f})',
+                'showarrow': True,
+                'arrowhead': 1,
+                'ax': 20,
+                'ay': -30
+            })
+        
+        # Check if inventory falls below ROP and place order if needed (using avg inventory)
+        # Only future deliveries remain in the heap, so the earliest one tells whether an order is in transit
+        if inventory_avg <= rop and not (pending_orders and
+                                         pending_orders[0][0] < current_date + timedelta(days=delivery_lead_time)):
+            actual_order_qty = max(moq, 
+                                 np.ceil((max_qty - inventory_avg) / qty_per_package) * qty_per_package)
+            actual_order_qty = min(actual_order_qty, max_qty - inventory_avg)
+            
+            delivery_date = current_date + timedelta(days=delivery_lead_time)
+            heapq.heappush(pending_orders, (delivery_date, order_seq, actual_order_qty, current_date))
+            order_seq += 1
+
+        inventory_levels_avg.append(min(inventory_avg, max_qty))
+        inventory_levels_actual.append(min(inventory_actual, max_qty))
+
+    dates = simulation_dates(start_date, sim_days)
+    df = pd.DataFrame({
+        'Date': dates,
+        'Inventory_Avg': inventory_levels_avg,
+        'Inventory_Actual': inventory_levels_actual,
+        'ROP': rop,
+        'Max_Qty': max_qty,
+        'Critical_Level': critical_level
+    })
+    
+    order_dates = sorted(d[3] for d in pending_orders)
+    if len(order_dates) > 1:
+        avg_cycle = np.mean([(order_dates[i+1] - order_dates[i]).days 
+                           for i in range(len(order_dates)-1)])
+    else:
+        avg_cycle = None
+
+    return df, avg_cycle, daily_avg_use, order_annotations
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from .kernel import simulate_materials_batch
+from .leadtime import LEAD_TIME_COLUMNS, check_lead_time
+
+# Columns of the batch simulation template, in template order
+TEMPLATE_COLUMNS = [
+    'Material Name',
+    'Monthly Usage Average',
+    'Current Usage',
+    'Beginning Inventory',
+    'Lead Time (days)',
+    'Critical Level',
+    'Re-Order Point (ROP)',
+    'Maximum Quantity',
+    'Inventory Value per UoM',
+    'Quantity per Package',
+    'Minimum Order Quantity (MOQ)',
+    'Simulation Days',
+    'W1', 'W2', 'W3', 'W4', 'W5',
+    'TOL'
+]
+# Read when the sheet has them; blank cells fall back to a fixed lead time
+OPTIONAL_COLUMNS = list(LEAD_TIME_COLUMNS.values())
+TEXT_COLUMNS = ['Material Name', LEAD_TIME_COLUMNS['lead_distribution'], LEAD_TIME_COLUMNS['lead_history']]
+INTEGER_COLUMNS = ['Simulation Days']
+
+
+def _open_rows(source):
+    # read_only mode streams rows from the sheet XML instead of building every cell object
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = next(rows, ())
+    return workbook, [str(name).strip() if name is not None else '' for name in header], rows
+
+
+def read_header(source):
+    """Column names from the first row of the active sheet."""
+    workbook, header, _ = _open_rows(source)
+    workbook.close()
+    return header
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def read_numeric_column(source, column):
+    """Stream one column as floats, skipping blanks and non-numeric cells."""
+    workbook, header, rows = _open_rows(source)
+    try:
+        position = header.index(column)
+        values = (_to_number(row[position]) for row in rows if position < len(row) and row[position] is not None)
+        data = np.fromiter(values, dtype=float)
+    finally:
+        workbook.close()
+    return pd.Series(data[~np.isnan(data)], name=column)
+
+
+class MaterialStream:
+    """Iterate a materials workbook as typed DataFrame chunks of the template columns.
+
+    Only the template columns are kept, plus whichever optional lead-time
+    columns the sheet has. Cells are coerced while streaming. Rows with a
+    non-numeric or missing parameter, or an unusable lead-time distribution,
+    are skipped and their sheet row numbers collected in skipped_rows;
+    blank optional cells are kept and completely blank rows are ignored. Accepted rows are
+    labelled 0, 1, 2, ... across chunks, like a RangeIndex from read_excel.
+    """
+
+    def __init__(self, source, chunk_size=5000, columns=TEMPLATE_COLUMNS, optional_columns=OPTIONAL_COLUMNS):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.skipped_rows = []
+        header = read_header(source)
+        self.missing_columns = [column for column in columns if column not in header]
+        self.required_columns = list(columns)
+        self.columns = self.required_columns + [column for column in optional_columns
+                                                if column in header and column not in self.required_columns]
+
+    def __iter__(self):
+        if self.missing_columns:
+            raise ValueError(f"Excel file is missing required columns: {', '.join(self.missing_columns)}.")
+        self.skipped_rows = []
+        workbook, header, rows = _open_rows(self.source)
+        positions = [header.index(column) for column in self.columns]
+        numeric = [column not in TEXT_COLUMNS for column in self.columns]
+        required = [column in self.required_columns for column in self.columns]
+        distribution = self._position(LEAD_TIME_COLUMNS['lead_distribution'])
+        history = self._position(LEAD_TIME_COLUMNS['lead_history'])
+        try:
+            buffer = []
+            next_label = 0
+            for sheet_row, row in enumerate(rows, start=2):
+                values = [row[position] if position < len(row) else None for position in positions]
+                if all(value is None for value in values):
+                    continue
+                values = [_to_number(value) if is_numeric else ('' if value is None else str(value))
+                          for value, is_numeric in zip(values, numeric)]
+                if any(is_numeric and is_required and np.isnan(value)
+                       for value, is_numeric, is_required in zip(values, numeric, required)):
+                    self.skipped_rows.append(sheet_row)
+                    continue
+                if distribution is not None:
+                    try:
+                        check_lead_time(values[distribution], None if history is None else values[history])
+                    except ValueError:
+                        self.skipped_rows.append(sheet_row)
+                        continue
+                buffer.append(values)
+                if len(buffer) == self.chunk_size:
+                    yield self._frame(buffer, next_label)
+                    next_label += len(buffer)
+                    buffer = []
+            if buffer:
+                yield self._frame(buffer, next_label)
+        finally:
+            workbook.close()
+
+    def _position(self, column):
+        return self.columns.index(column) if column in self.columns else None
+
+    def _frame(self, buffer, first_label):
+        chunk = pd.DataFrame(buffer, columns=self.columns,
+                             index=pd.RangeIndex(first_label, first_label + len(buffer)))
+        for column in self.columns:
+            if column in INTEGER_COLUMNS:
+                chunk[column] = chunk[column].astype(int)
+            elif column not in TEXT_COLUMNS:
+                chunk[column] = chunk[column].astype(float)
+        return chunk
+
+    def read(self):
+        """All accepted rows as one frame of the template and optional columns."""
+        chunks = list(self)
+        if not chunks:
+            return pd.DataFrame({column: pd.Series(dtype=object if column in TEXT_COLUMNS else float)
+                                 for column in self.columns})
+        return pd.concat(chunks)
+
+
+def simulate_workbook(source, start_date, seed, chunk_size=5000):
+    """Feed a materials workbook to the batch kernel chunk by chunk.
+
+    Yields (chunk_df, batch_result) pairs; callers that reduce each chunk
+    before asking for the next keep peak memory at one chunk.
+    """
+    for chunk in MaterialStream(source, chunk_size):
+        yield chunk, simulate_materials_batch(chunk, start_date, seed)
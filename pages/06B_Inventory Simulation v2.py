@@ -3,83 +3,10 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from datetime import datetime, timedelta, date
-
-def simulate_ddmrp_inventory(rop, max_qty, critical_level, moq, 
-                           delivery_lead_time, qty_per_package, monthly_usage_avg, 
-                           actual_monthly_usage, beginning_inventory, inventory_value, 
-                           sim_days=90, start_date=datetime.now()):
-    daily_avg_use = monthly_usage_avg / 30
-    inventory_avg = beginning_inventory
-    inventory_actual = beginning_inventory
-    dates = [start_date]
-    inventory_levels_avg = [inventory_avg]
-    inventory_levels_actual = [inventory_actual]
-    pending_orders = []  # (delivery_date, quantity, order_day)
-    order_annotations = []
-
-    # Generate daily consumption for both average and actual
-    daily_consumption_avg = np.random.uniform(daily_avg_use / 1.25, 
-                                            daily_avg_use * 1.25, 
-                                            sim_days)
-    daily_consumption_actual = np.random.uniform(actual_monthly_usage / 37.5,  # 1.25 * 30
-                                               actual_monthly_usage / 22.5,  # 0.75 * 30
-                                               sim_days)
-
-    for day in range(sim_days):
-        current_date = start_date + timedelta(days=day)
-        dates.append(current_date)
-        
-        # Update both inventories
-        inventory_avg = max(0, inventory_avg - daily_consumption_avg[day])
-        inventory_actual = max(0, inventory_actual - daily_consumption_actual[day])
-        
-        # Check for delivered orders (same for both simulations)
-        for delivery_date, qty, order_date in pending_orders[:]:
-            if current_date >= delivery_date:
-                inventory_avg += qty
-                inventory_actual += qty
-                order_amount = qty * inventory_value
-                order_annotations.append({
-                    'x': delivery_date,
-                    'y': inventory_avg,
-                    'text': f'Order: {int(qty)}\n({order_amount:,.0f})',
-                    'showarrow': True,
-                    'arrowhead': 1,
-                    'ax': 20,
-                    'ay': -30
-                })
-                pending_orders.remove((delivery_date, qty, order_date))
-        
-        # Check if inventory falls below ROP and place order if needed (using avg inventory)
-        if inventory_avg <= rop and not any(current_date < d[0] < current_date + timedelta(days=delivery_lead_time) 
-                                     for d in pending_orders):
-            actual_order_qty = max(moq, 
-                                 np.ceil((max_qty - inventory_avg) / qty_per_package) * qty_per_package)
-            actual_order_qty = min(actual_order_qty, max_qty - inventory_avg)
-            
-            delivery_date = current_date + timedelta(days=delivery_lead_time)
-            pending_orders.append((delivery_date, actual_order_qty, current_date))
-
-        inventory_levels_avg.append(min(inventory_avg, max_qty))
-        inventory_levels_actual.append(min(inventory_actual, max_qty))
-
-    df = pd.DataFrame({
-        'Date': dates,
-        'Inventory_Avg': inventory_levels_avg,
-        'Inventory_Actual': inventory_levels_actual,
-        'ROP': [rop] * len(dates),
-        'Max_Qty': [max_qty] * len(dates),
-        'Critical_Level': [critical_level] * len(dates)
-    })
-    
-    order_dates = [d[2] for d in pending_orders]
-    if len(order_dates) > 1:
-        avg_cycle = np.mean([(order_dates[i+1] - order_dates[i]).days 
-                           for i in range(len(order_dates)-1)])
-    else:
-        avg_cycle = None
-
-    return df, avg_cycle, daily_avg_use, order_annotations
+from inventory_sim import monte_carlo_inventory_v2, simulate_inventory_v2
+from inventory_sim.leadtime import LEAD_TIME_DISTRIBUTIONS, check_lead_time
+from inventory_sim.reporting import downsample_frame, period_end_positions
+from inventory_sim.charts import annotation_layer, inventory_figure, monte_carlo_figure
 
 st.header("Inventory Simulation")
 
@@ -164,10 +91,20 @@ with col_left:
     with col1:
       sim_days = st.number_input("Simulation Days", 
                                    min_value=30, 
-                                   max_value=365, 
+                                   max_value=1825, 
                                    value=90, 
                                    step=1)
 
+    with col2:
+      seed = st.number_input("Random Seed",
+                             min_value=0,
+                             value=0,
+                             step=1,
+                             help="The same seed replays the same consumption; change it to draw a new scenario")
+      webgl_charts = st.toggle("WebGL Charts",
+                               value=sim_days > 365,
+                               help="Draw the trend with WebGL traces and merge order labels; faster for long horizons")
+
 # Right column: Chart and Results
 with col_right:
     start_date_input = st.date_input("Simulation Start Date", 
@@ -177,28 +114,24 @@ with col_right:
     
     start_date = datetime.combine(start_date_input, datetime.min.time())
 
-    df, avg_cycle, daily_avg_use, order_annotations = simulate_ddmrp_inventory(
+    df, avg_cycle, daily_avg_use, order_annotations = simulate_inventory_v2(
         rop, max_qty, critical_level, moq, 
         delivery_lead_time, qty_per_package, monthly_usage_avg, 
         actual_monthly_usage, beginning_inventory, inventory_value, 
-        sim_days, start_date
+        sim_days, start_date, rng=np.random.default_rng(seed)
     )
     
-    end_date = start_date + timedelta(days=sim_days)
-    current_date = start_date.replace(day=1)
-    month_end_dates = []
-    
-    while current_date <= end_date:
-        next_month = current_date.replace(day=28) + timedelta(days=4)
-        last_day = next_month - timedelta(days=next_month.day)
-        if last_day >= start_date and last_day <= end_date:
-            month_end_dates.append(last_day)
-        current_date = (last_day + timedelta(days=1)).replace(day=1)
-
-    month_end_df = df[df['Date'].isin(month_end_dates)].copy()
+    # Month-end rows for markers and table, gathered by position from the day offsets
+    month_end_df = df.take(period_end_positions(start_date, sim_days))
     
-    fig = px.line(df, x='Date', y=['Inventory_Avg', 'Inventory_Actual', 'ROP', 'Max_Qty', 'Critical_Level'],
-                 title=f'Inventory Simulation (Starting {start_date.strftime("%Y-%m-%d")})')
+    title = f'Inventory Simulation (Starting {start_date.strftime("%Y-%m-%d")})'
+    if webgl_charts:
+        fig = inventory_figure(df, ['Inventory_Avg', 'Inventory_Actual'], title, rop, max_qty, critical_level)
+        order_annotations = annotation_layer(fig, order_annotations, 'Orders')
+    else:
+        fig = px.line(downsample_frame(df, ['Inventory_Avg', 'Inventory_Actual']), x='Date', 
+                      y=['Inventory_Avg', 'Inventory_Actual', 'ROP', 'Max_Qty', 'Critical_Level'],
+                      title=title)
     
     fig.add_scatter(
         x=month_end_df['Date'],
@@ -259,26 +192,62 @@ with col_left:
     st.latex(order_qty_formula)
 
 with col_right:
-    interval_data = []
-    current_date = start_date.replace(day=1)
-    
-    while current_date <= end_date:
-        next_month = current_date.replace(day=28) + timedelta(days=4)
-        last_day = next_month - timedelta(days=next_month.day)
-        
-        if last_day >= start_date and last_day <= end_date:
-            qty_avg = df.loc[df['Date'] == last_day, 'Inventory_Avg'].iloc[0] if not df[df['Date'] == last_day].empty else 0
-            qty_actual = df.loc[df['Date'] == last_day, 'Inventory_Actual'].iloc[0] if not df[df['Date'] == last_day].empty else 0
-            value_avg = qty_avg * inventory_value
-            value_actual = qty_actual * inventory_value
-            interval_data.append({
-                'Date': last_day.strftime('%Y-%m-%d'),
-                'Inv Qty (Avg)': f"{qty_avg:,.0f}",
-                'Inv Value (Avg)': f"{value_avg:,.0f}",
-                'Inv Qty (Actual)': f"{qty_actual:,.0f}",
-                'Inv Value (Actual)': f"{value_actual:,.0f}"
-            })
-        current_date = (last_day + timedelta(days=1)).replace(day=1)
-
-    interval_df = pd.DataFrame(interval_data)
+    interval_df = pd.DataFrame({
+        'Date': month_end_df['Date'].dt.strftime('%Y-%m-%d'),
+        'Inv Qty (Avg)': month_end_df['Inventory_Avg'].map('{:,.0f}'.format),
+        'Inv Value (Avg)': (month_end_df['Inventory_Avg'] * inventory_value).map('{:,.0f}'.format),
+        'Inv Qty (Actual)': month_end_df['Inventory_Actual'].map('{:,.0f}'.format),
+        'Inv Value (Actual)': (month_end_df['Inventory_Actual'] * inventory_value).map('{:,.0f}'.format),
+    })
     st.table(interval_df)
+
+st.markdown("---")
+st.subheader("Lead Time Variability")
+lead_distribution = st.selectbox("Lead Time Distribution", LEAD_TIME_DISTRIBUTIONS,
+                                 help="How each order's lead time is drawn in the Monte Carlo runs")
+lead_time = None
+if lead_distribution == 'uniform':
+    lead_low, lead_high = st.slider("Lead Time Range (days)", 1, 240,
+                                    (max(1, round(delivery_lead_time * 0.6)), round(delivery_lead_time * 1.4)))
+    lead_time = {'distribution': 'uniform', 'low': lead_low, 'high': lead_high}
+elif lead_distribution == 'lognormal':
+    lead_sigma = st.slider("Lead Time Sigma", 0.05, 1.5, 0.25, step=0.05,
+                           help="Shape of the lognormal; its mean stays at the Lead Time above")
+    lead_time = {'distribution': 'lognormal', 'sigma': lead_sigma}
+elif lead_distribution == 'empirical':
+    lead_history = st.text_input("Observed Lead Times (days)",
+                                 f"{max(1, delivery_lead_time - 2)}, {delivery_lead_time}, {delivery_lead_time}, "
+                                 f"{delivery_lead_time + 3}, {delivery_lead_time * 2}")
+    try:
+        check_lead_time('empirical', lead_history)
+        lead_time = {'distribution': 'empirical', 'history': lead_history}
+    except ValueError:
+        st.error("Enter the observed lead times as comma-separated numbers.")
+
+st.markdown("---")
+st.subheader("Monte Carlo")
+if st.toggle("Monte Carlo mode"):
+    replications = st.number_input("Replications", 
+                                   min_value=100, 
+                                   max_value=20000, 
+                                   value=1000, 
+                                   step=100)
+    mc_summary = monte_carlo_inventory_v2(
+        rop, max_qty, critical_level, moq, 
+        delivery_lead_time, qty_per_package, monthly_usage_avg, 
+        actual_monthly_usage, beginning_inventory, sim_days, replications, seed,
+        lead_time=lead_time
+    )
+    mc_dates = [start_date + timedelta(days=day) for day in range(sim_days)]
+
+    col_mc1, col_mc2, col_mc3 = st.columns(3)
+    col_mc1.metric("P(Actual below Critical Level)", f"{mc_summary['prob_below_critical']:.1%}")
+    col_mc2.metric("Expected Stockout Days", f"{mc_summary['expected_stockout_days']:.1f}")
+    col_mc3.metric("P(stockout)", f"{mc_summary['prob_stockout']:.1%}")
+
+    st.plotly_chart(monte_carlo_figure(mc_dates, mc_summary, rop, max_qty, critical_level,
+                                       f'Actual Inventory Bands over {replications:,} Runs'),
+                    use_container_width=True)
+
+    st.write("Order Count Distribution")
+    st.bar_chart(pd.DataFrame({'Share of Runs': mc_summary['order_count_distribution']}))
@@ -3,70 +3,10 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 from datetime import datetime, timedelta, date
-
-def simulate_ddmrp_inventory(rop, max_qty, critical_level, moq, 
-                           delivery_lead_time, qty_per_package, monthly_usage_avg, 
-                           beginning_inventory, inventory_value, sim_days=90, start_date=datetime.now()):
-    daily_avg_use = monthly_usage_avg / 30
-    inventory = beginning_inventory
-    dates = [start_date]
-    inventory_levels = [inventory]
-    pending_orders = []  # (delivery_date, quantity, order_day)
-    order_annotations = []
-
-    daily_consumption = np.random.uniform(daily_avg_use / 1.25, 
-                                        daily_avg_use * 1.25, 
-                                        sim_days)
-
-    for day in range(sim_days):
-        current_date = start_date + timedelta(days=day)
-        dates.append(current_date)
-        inventory = max(0, inventory - daily_consumption[day])
-        
-        # Check for delivered orders
-        for delivery_date, qty, order_date in pending_orders[:]:
-            if current_date >= delivery_date:
-                inventory += qty
-                order_amount = qty * inventory_value
-                order_annotations.append({
-                    'x': delivery_date,
-                    'y': inventory,
-                    'text': f'Order: {int(qty)}\n({order_amount:,.0f})',
-                    'showarrow': True,
-                    'arrowhead': 1,
-                    'ax': 20,
-                    'ay': -30
-                })
-                pending_orders.remove((delivery_date, qty, order_date))
-        
-        # Check if inventory falls below ROP and place order if needed
-        if inventory <= rop and not any(current_date < d[0] < current_date + timedelta(days=delivery_lead_time) 
-                                     for d in pending_orders):
-            actual_order_qty = max(moq, 
-                                 np.ceil((max_qty - inventory) / qty_per_package) * qty_per_package)
-            actual_order_qty = min(actual_order_qty, max_qty - inventory)
-            
-            delivery_date = current_date + timedelta(days=delivery_lead_time)
-            pending_orders.append((delivery_date, actual_order_qty, current_date))
-
-        inventory_levels.append(min(inventory, max_qty))
-
-    df = pd.DataFrame({
-        'Date': dates,
-        'Inventory': inventory_levels,
-        'ROP': [rop] * len(dates),
-        'Max_Qty': [max_qty] * len(dates),
-        'Critical_Level': [critical_level] * len(dates)
-    })
-    
-    order_dates = [d[2] for d in pending_orders]
-    if len(order_dates) > 1:
-        avg_cycle = np.mean([(order_dates[i+1] - order_dates[i]).days 
-                           for i in range(len(order_dates)-1)])
-    else:
-        avg_cycle = None
-
-    return df, avg_cycle, daily_avg_use, order_annotations
+from inventory_sim import best_policy, cost_surface, monte_carlo_inventory, simulate_inventory, sweep_policies
+from inventory_sim.leadtime import LEAD_TIME_DISTRIBUTIONS, check_lead_time
+from inventory_sim.reporting import downsample_frame, period_end_positions
+from inventory_sim.charts import annotation_layer, inventory_figure, monte_carlo_figure, policy_heatmap
 
 st.header("Inventory Simulation 1")
 
@@ -145,10 +85,20 @@ with col_left:
     with col1:
       sim_days = st.number_input("Simulation Days", 
                                    min_value=30, 
-                                   max_value=365, 
+                                   max_value=1825, 
                                    value=90, 
                                    step=1)
 
+    with col2:
+      seed = st.number_input("Random Seed",
+                             min_value=0,
+                             value=0,
+                             step=1,
+                             help="The same seed replays the same consumption; change it to draw a new scenario")
+      webgl_charts = st.toggle("WebGL Charts",
+                               value=sim_days > 365,
+                               help="Draw the trend with WebGL traces and merge order labels; faster for long horizons")
+
 # Right column: Chart and Results
 with col_right:
     start_date_input = st.date_input("Simulation Start Date", 
@@ -160,29 +110,23 @@ with col_right:
     start_date = datetime.combine(start_date_input, datetime.min.time())
 
     # Run simulation with start_date parameter
-    df, avg_cycle, daily_avg_use, order_annotations = simulate_ddmrp_inventory(
+    df, avg_cycle, daily_avg_use, order_annotations = simulate_inventory(
         rop, max_qty, critical_level, moq, 
         delivery_lead_time, qty_per_package, monthly_usage_avg, 
-        beginning_inventory, inventory_value, sim_days, start_date
+        beginning_inventory, inventory_value, sim_days, start_date, rng=np.random.default_rng(seed)
     )
     
-    # Calculate end-of-month dates for markers and table
-    end_date = start_date + timedelta(days=sim_days)
-    current_date = start_date.replace(day=1)
-    month_end_dates = []
+    # Month-end rows for markers and table, gathered by position from the day offsets
+    month_end_df = df.take(period_end_positions(start_date, sim_days))
     
-    while current_date <= end_date:
-        next_month = current_date.replace(day=28) + timedelta(days=4)
-        last_day = next_month - timedelta(days=next_month.day)
-        if last_day >= start_date and last_day <= end_date:
-            month_end_dates.append(last_day)
-        current_date = (last_day + timedelta(days=1)).replace(day=1)
-
-    # Filter DataFrame for month-end dates only for markers
-    month_end_df = df[df['Date'].isin(month_end_dates)].copy()
-    
-    fig = px.line(df, x='Date', y=['Inventory', 'ROP', 'Max_Qty', 'Critical_Level'],
-                 title=f'Inventory Simulation (Starting {start_date.strftime("%Y-%m-%d")})')
+    # Long horizons are downsampled so the chart payload stays small
+    title = f'Inventory Simulation (Starting {start_date.strftime("%Y-%m-%d")})'
+    if webgl_charts:
+        fig = inventory_figure(df, ['Inventory'], title, rop, max_qty, critical_level)
+        order_annotations = annotation_layer(fig, order_annotations, 'Orders')
+    else:
+        fig = px.line(downsample_frame(df, ['Inventory']), x='Date', y=['Inventory', 'ROP', 'Max_Qty', 'Critical_Level'],
+                      title=title)
     
     # Add markers for month ends on the Inventory line
     fig.add_scatter(
@@ -232,25 +176,98 @@ with col_left:
     st.latex(order_qty_formula)
 
 with col_right:
-    # Calculate end-of-month dates within simulation period
-    interval_data = []
-    current_date = start_date.replace(day=1)  # Start from beginning of month
-    
-    while current_date <= end_date:
-        # Get last day of current month
-        next_month = current_date.replace(day=28) + timedelta(days=4)
-        last_day = next_month - timedelta(days=next_month.day)
-        
-        if last_day >= start_date and last_day <= end_date:
-            # Find the inventory for this exact date
-            qty = df.loc[df['Date'] == last_day, 'Inventory'].iloc[0] if not df[df['Date'] == last_day].empty else 0
-            value = qty * inventory_value
-            interval_data.append({
-                'Date': last_day.strftime('%Y-%m-%d'),
-                'Inventory Quantity': f"{qty:,.0f}",
-                'Inventory Value': f"{value:,.0f}"
-            })
-        current_date = (last_day + timedelta(days=1)).replace(day=1)  # Move to next month
-
-    interval_df = pd.DataFrame(interval_data)
+    interval_df = pd.DataFrame({
+        'Date': month_end_df['Date'].dt.strftime('%Y-%m-%d'),
+        'Inventory Quantity': month_end_df['Inventory'].map('{:,.0f}'.format),
+        'Inventory Value': (month_end_df['Inventory'] * inventory_value).map('{:,.0f}'.format),
+    })
     st.table(interval_df)
+
+st.markdown("---")
+st.subheader("Lead Time Variability")
+lead_distribution = st.selectbox("Lead Time Distribution", LEAD_TIME_DISTRIBUTIONS,
+                                 help="How each order's lead time is drawn in the Monte Carlo runs and the optimizer")
+lead_time = None
+if lead_distribution == 'uniform':
+    lead_low, lead_high = st.slider("Lead Time Range (days)", 1, 240,
+                                    (max(1, round(delivery_lead_time * 0.6)), round(delivery_lead_time * 1.4)))
+    lead_time = {'distribution': 'uniform', 'low': lead_low, 'high': lead_high}
+elif lead_distribution == 'lognormal':
+    lead_sigma = st.slider("Lead Time Sigma", 0.05, 1.5, 0.25, step=0.05,
+                           help="Shape of the lognormal; its mean stays at the Lead Time above")
+    lead_time = {'distribution': 'lognormal', 'sigma': lead_sigma}
+elif lead_distribution == 'empirical':
+    lead_history = st.text_input("Observed Lead Times (days)",
+                                 f"{max(1, delivery_lead_time - 2)}, {delivery_lead_time}, {delivery_lead_time}, "
+                                 f"{delivery_lead_time + 3}, {delivery_lead_time * 2}")
+    try:
+        check_lead_time('empirical', lead_history)
+        lead_time = {'distribution': 'empirical', 'history': lead_history}
+    except ValueError:
+        st.error("Enter the observed lead times as comma-separated numbers.")
+
+st.markdown("---")
+st.subheader("Monte Carlo")
+if st.toggle("Monte Carlo mode"):
+    replications = st.number_input("Replications", 
+                                   min_value=100, 
+                                   max_value=20000, 
+                                   value=1000, 
+                                   step=100)
+    mc_summary = monte_carlo_inventory(
+        rop, max_qty, critical_level, moq, 
+        delivery_lead_time, qty_per_package, monthly_usage_avg, 
+        beginning_inventory, sim_days, replications, seed,
+        lead_time=lead_time
+    )
+    mc_dates = [start_date + timedelta(days=day) for day in range(sim_days)]
+
+    col_mc1, col_mc2, col_mc3 = st.columns(3)
+    col_mc1.metric("P(below Critical Level)", f"{mc_summary['prob_below_critical']:.1%}")
+    col_mc2.metric("Expected Stockout Days", f"{mc_summary['expected_stockout_days']:.1f}")
+    col_mc3.metric("P(stockout)", f"{mc_summary['prob_stockout']:.1%}")
+
+    st.plotly_chart(monte_carlo_figure(mc_dates, mc_summary, rop, max_qty, critical_level,
+                                       f'Inventory Bands over {replications:,} Runs'),
+                    use_container_width=True)
+
+    st.write("Order Count Distribution")
+    st.bar_chart(pd.DataFrame({'Share of Runs': mc_summary['order_count_distribution']}))
+
+st.markdown("---")
+st.subheader("Policy Optimizer")
+if st.toggle("Optimizer mode"):
+    col_opt1, col_opt2 = st.columns(2)
+    with col_opt1:
+        rop_range = st.slider("ROP Range", 0, 9000, (0, min(max(2 * rop_default, 10), 9000)))
+        max_qty_range = st.slider("Max Qty Range", 0, 9000, (min(rop_default, 9000), min(max(2 * max_qty_default, 10), 9000)))
+        moq_range = st.slider("MOQ Range", 0, 500, (0, moq))
+        grid_points = st.slider("Grid Points per Parameter", 3, 40, 15)
+    with col_opt2:
+        target_service = st.slider("Target Service Level", 0.50, 1.00, 0.95, step=0.01)
+        holding_rate = st.number_input("Annual Holding Rate", min_value=0.0, max_value=2.0, value=0.25, step=0.01)
+        order_cost = st.number_input("Cost per Order", min_value=0.0, value=50.0, step=1.0)
+        opt_replications = st.number_input("Replications per Candidate", min_value=10, max_value=500, value=50, step=10)
+
+    sweep = sweep_policies(
+        np.linspace(*rop_range, grid_points).round(),
+        np.linspace(*max_qty_range, grid_points).round(),
+        np.linspace(*moq_range, min(grid_points, 5)).round(),
+        delivery_lead_time, qty_per_package, monthly_usage_avg,
+        beginning_inventory, inventory_value, sim_days,
+        replications=opt_replications, holding_rate=holding_rate, order_cost=order_cost, seed=seed,
+        lead_time=lead_time
+    )
+    best = best_policy(sweep, target_service)
+    st.write(f"Evaluated {len(sweep):,} policies over {opt_replications} runs each")
+    if best is None:
+        st.warning("No policy in the grid meets the target service level. Widen the ROP or Max Qty range.")
+    else:
+        col_best1, col_best2, col_best3, col_best4 = st.columns(4)
+        col_best1.metric("ROP", f"{best['ROP']:,.0f}")
+        col_best2.metric("Max Qty", f"{best['Max Qty']:,.0f}")
+        col_best3.metric("MOQ", f"{best['MOQ']:,.0f}")
+        col_best4.metric("Service Level", f"{best['Service Level']:.1%}")
+        st.write(f"Total Cost over the horizon: {best['Total Cost']:,.0f}")
+    st.plotly_chart(policy_heatmap(cost_surface(sweep, target_service), best), use_container_width=True)
+    st.dataframe(sweep[sweep['Service Level'] >= target_service].nsmallest(20, 'Total Cost'))
@@ -1,228 +1,235 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
+import uuid
 from datetime import datetime, timedelta, date
 from io import BytesIO
+from inventory_sim import (DemandProfiles, IncrementalBatch, MaterialStream, batch_summary, default_workers,
+                           load_materials_cached, material_outputs, monte_carlo_ddmrp, portfolio_daily,
+                           portfolio_weekly, read_history_sheet)
+from inventory_sim.cache import content_hash, history_cache
+from inventory_sim.columnar import (FORMAT_EXTENSIONS, FORMAT_MIME_TYPES, format_from_name, period_end_table,
+                                    read_history_table, read_materials_table, results_table, write_table)
+from inventory_sim.charts import annotation_layer, inventory_figure, monte_carlo_figure, portfolio_dashboard
+from inventory_sim.constrained import PRIORITY_RULES, period_spend, simulate_materials_constrained
+from inventory_sim.jobs import batch_jobs
+from inventory_sim.leadtime import lead_time_spec
+from inventory_sim.network import echelon_inventory, network_summary, read_network_sheet, simulate_network
+from inventory_sim.reporting import REPORTING_BUCKETS, downsample_frame, period_end_positions
 
-def simulate_ddmrp_inventory(rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package, 
-                            monthly_usage_avg, current_usage, w1, w2, w3, w4, w5, tol, 
-                            beginning_inventory, inventory_value, sim_days, start_date=datetime.now()):
-    daily_avg_use = monthly_usage_avg / 30 
-    inventory_actual = beginning_inventory
-    inventory_avg = beginning_inventory
-    dates = [start_date]
-    inventory_actual_levels = [inventory_actual]
-    inventory_avg_levels = [inventory_avg]
-    pending_orders_actual = []  # (delivery_date, quantity, order_day) for Inventory_Actual
-    pending_orders_avg = []     # (delivery_date, quantity, order_day) for Inventory_Avg
-    order_annotations = []
-    critical_crossings = []  # Store (date, inventory_actual) when crossing critical_level going down
-
-    for day in range(sim_days):
-        current_date = start_date + timedelta(days=day)
-        dates.append(current_date)
-        previous_inventory_actual = inventory_actual
-        previous_inventory_avg = inventory_avg
-        
-        # Determine which week (W1-W5) this day belongs to in the month
-        days_into_month = (current_date - start_date.replace(day=1)).days % 30
-        if days_into_month < 6:  # Week 1 (days 0-5)
-            weekly_proportion = w1
-        elif days_into_month < 12:  # Week 2 (days 6-11)
-            weekly_proportion = w2
-        elif days_into_month < 18:  # Week 3 (days 12-17)
-            weekly_proportion = w3
-        elif days_into_month < 24:  # Week 4 (days 18-23)
-            weekly_proportion = w4
-        else:  # Week 5 (days 24-29)
-            weekly_proportion = w5
-        
-        # Calculate daily consumption for Inventory_Actual with tolerance
-        base_daily_use = (current_usage * weekly_proportion) / 6
-        tolerance_factor = np.random.uniform(1 - tol, 1 + tol)
-        daily_consumption_actual = base_daily_use * tolerance_factor
-        
-        # Update inventories
-        inventory_actual = max(0, inventory_actual - daily_consumption_actual)
-        inventory_avg = max(0, inventory_avg - daily_avg_use)
-        
-        # Check for delivered orders for Inventory_Actual
-        for delivery_date, qty, order_date in pending_orders_actual[:]:
-            if current_date >= delivery_date:
-                inventory_actual += qty
-                order_amount = qty * inventory_value
-                order_annotations.append({
-                    'x': delivery_date,
-                    'y': inventory_actual,
-                    'text': f'Actual Order: {int(qty)}\n({order_amount:,.0f})',
-                    'showarrow': True,
-                    'arrowhead': 1,
-                    'ax': 20,
-                    'ay': -30,
-                    'font': {'color': 'green', 'size': 10},
-                    'bgcolor': 'rgba(255, 255, 255, 0.8)',
-                    'bordercolor': 'green',
-                    'borderwidth': 1
-                })
-                pending_orders_actual.remove((delivery_date, qty, order_date))
-        
-        # Check for delivered orders for Inventory_Avg
-        for delivery_date, qty, order_date in pending_orders_avg[:]:
-            if current_date >= delivery_date:
-                inventory_avg += qty
-                order_amount = qty * inventory_value
-                order_annotations.append({
-                    'x': delivery_date,
-                    'y': inventory_avg,
-                    'text': f'Avg Order: {int(qty)}\n({order_amount:,.0f})',
-                    'showarrow': True,
-                    'arrowhead': 1,
-                    'ax': 20,
-                    'ay': -30,
-                    'font': {'color': 'purple', 'size': 10},
-                    'bgcolor': 'rgba(255, 255, 255, 0.8)',
-                    'bordercolor': 'purple',
-                    'borderwidth': 1
-                })
-                pending_orders_avg.remove((delivery_date, qty, order_date))
-        
-        # Check if Inventory_Actual falls below ROP and place order
-        if inventory_actual <= rop and not any(current_date < d[0] < current_date + timedelta(days=delivery_lead_time) 
-                                            for d in pending_orders_actual):
-            actual_order_qty = max(moq, 
-                                 np.ceil((max_qty - inventory_actual) / qty_per_package) * qty_per_package)
-            actual_order_qty = min(actual_order_qty, max_qty - inventory_actual)
-            delivery_date = current_date + timedelta(days=delivery_lead_time)
-            pending_orders_actual.append((delivery_date, actual_order_qty, current_date))
-
-        # Check if Inventory_Avg falls below ROP and place order
-        if inventory_avg <= rop and not any(current_date < d[0] < current_date + timedelta(days=delivery_lead_time) 
-                                         for d in pending_orders_avg):
-            avg_order_qty = max(moq, 
-                               np.ceil((max_qty - inventory_avg) / qty_per_package) * qty_per_package)
-            avg_order_qty = min(avg_order_qty, max_qty - inventory_avg)
-            delivery_date = current_date + timedelta(days=delivery_lead_time)
-            pending_orders_avg.append((delivery_date, avg_order_qty, current_date))
-
-        # Detect crossing below critical_level when inventory_actual is going down
-        if (inventory_actual <= critical_level and 
-            (day == 0 or (previous_inventory_actual > critical_level and inventory_actual < previous_inventory_actual))):
-            critical_crossings.append((current_date, inventory_actual))
-
-        inventory_actual_levels.append(min(inventory_actual, max_qty))
-        inventory_avg_levels.append(min(inventory_avg, max_qty))
-
-    df = pd.DataFrame({
-        'Date': dates,
-        'Inventory_Actual': inventory_actual_levels,
-        'Inventory_Avg': inventory_avg_levels,
-        'ROP': [rop] * len(dates),
-        'Max_Qty': [max_qty] * len(dates),
-        'Critical_Level': [critical_level] * len(dates)
+# Finished materials summarized while a batch job is still running
+PARTIAL_ROWS = 1000
+
+# Read an uploaded materials file into the template columns; cached by content hash so reruns skip this
+def read_materials(file_bytes, file_format):
+    if file_format != 'xlsx':
+        return read_materials_table(BytesIO(file_bytes), file_format)
+    stream = MaterialStream(BytesIO(file_bytes))
+    if stream.missing_columns:
+        return None, stream.missing_columns, []
+    materials_df = stream.read()
+    return materials_df, [], stream.skipped_rows
+
+# Fit demand history profiles from a History sheet or a separate history file; None when there is no history
+def read_profiles(file_bytes, file_format):
+    try:
+        if file_format == 'xlsx':
+            history = read_history_sheet(BytesIO(file_bytes))
+        else:
+            history = read_history_table(BytesIO(file_bytes), file_format)
+    except ValueError as error:
+        return None, str(error)
+    return (None if history is None else DemandProfiles.fit(history)), None
+
+# Reporting period choices: labels for the selectbox and the period-end table heading
+BUCKET_LABELS = {'week': 'Week-End', 'month': 'Month-End', 'quarter': 'Quarter-End'}
+
+# Chart and period-end table for one material of a batch result
+def build_material_view(batch_result, materials_data, material_idx, start_date, webgl=False, bucket='month'):
+    row = materials_data.iloc[material_idx]
+    material_name = row['Material Name']
+    max_qty = row['Maximum Quantity']
+    inventory_value = row['Inventory Value per UoM']
+    sim_days = int(row['Simulation Days'])
+
+    df, avg_cycle, daily_avg_use, order_annotations, critical_crossing_annotations, critical_gap_annotations, critical_crossings = material_outputs(
+        batch_result, material_idx
+    )
+
+    # Long horizons are downsampled for the browser; critical crossing rows are always kept
+    keep = df['Critical_Crossing_Line'].notna() if 'Critical_Crossing_Line' in df.columns else None
+    title = f'Inventory Simulation for {material_name} (Starting {start_date.strftime("%Y-%m-%d")})'
+    if webgl:
+        fig = inventory_figure(df, ['Inventory_Actual', 'Inventory_Avg'], title, row['Re-Order Point (ROP)'],
+                               max_qty, row['Critical Level'], keep=keep)
+        order_annotations = annotation_layer(fig, order_annotations, 'Orders')
+        critical_crossing_annotations = annotation_layer(fig, critical_crossing_annotations, 'Critical Crossings')
+        critical_gap_annotations = annotation_layer(fig, critical_gap_annotations, 'Critical Gaps')
+    else:
+        fig = px.line(downsample_frame(df, ['Inventory_Actual', 'Inventory_Avg'], keep=keep), x='Date',
+                      y=['Inventory_Actual', 'Inventory_Avg', 'ROP', 'Max_Qty', 'Critical_Level'],
+                      title=title)
+
+    month_end_df = df.take(period_end_positions(start_date, sim_days))
+    fig.add_scatter(
+        x=month_end_df['Date'],
+        y=month_end_df['Inventory_Actual'],
+        mode='markers',
+        marker=dict(symbol='circle', size=10, color='grey', opacity=0.7),
+        name='Month End',
+        hovertemplate='%{x|%Y-%m-%d}<br>Inventory: %{y:.0f}'
+    )
+
+    if critical_crossings:
+        crossing_dates = [crossing[0] for crossing in critical_crossings]
+        crossing_values = [crossing[1] for crossing in critical_crossings]
+        fig.add_scatter(
+            x=crossing_dates,
+            y=crossing_values,
+            mode='markers',
+            marker=dict(symbol='x', size=10, color='blue'),
+            name='Critical Crossing',
+            hovertemplate='%{x|%Y-%m-%d}<br>Inventory: %{y:.0f}'
+        )
+
+    if 'Critical_Crossing_Line' in df.columns:
+        # Only the crossing rows: the rest of the column is NaN and would be sent to the browser for nothing
+        gap_line = df.loc[keep, ['Date', 'Critical_Crossing_Line']]
+        fig.add_scatter(
+            x=gap_line['Date'],
+            y=gap_line['Critical_Crossing_Line'],
+            mode='lines',
+            line=dict(color='red', dash='dash'),
+            name='Gap Line',
+            hoverinfo='skip'
+        )
+
+    all_annotations = order_annotations + critical_crossing_annotations + critical_gap_annotations
+    fig.update_layout(
+        yaxis_title="Inventory Qty",
+        legend_title="Metrics",
+        xaxis_title="Date",
+        yaxis=dict(range=[0, max(max_qty, df['Inventory_Actual'].max(), df['Inventory_Avg'].max()) * 1.1]),
+        annotations=all_annotations,
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.2,
+            xanchor="center",
+            x=0.5,
+            traceorder="normal",
+            itemsizing="constant",
+            itemwidth=80,
+            font=dict(size=10)
+        )
+    )
+
+    # Period-end positions from the day offsets, gathered in one take
+    period_end_df = df.take(period_end_positions(start_date, sim_days, bucket))
+    interval_df = pd.DataFrame({
+        'Date': period_end_df['Date'].dt.strftime('%Y-%m-%d'),
+        'Inventory Quantity': period_end_df['Inventory_Actual'].map('{:,.0f}'.format),
+        'Inventory Value': (period_end_df['Inventory_Actual'] * inventory_value).map('{:,.0f}'.format),
     })
-    
-    order_dates_actual = [d[2] for d in pending_orders_actual]
-    if len(order_dates_actual) > 1:
-        avg_cycle_actual = np.mean([(order_dates_actual[i+1] - order_dates_actual[i]).days 
-                                   for i in range(len(order_dates_actual)-1)])
+    return material_name, fig, interval_df, bucket
+
+def render_material(material_name, fig, interval_df, bucket):
+    # Create a single row with 2 columns: chart on left, table on right
+    col_chart, col_table = st.columns([1, 1])
+    with col_chart:
+        st.plotly_chart(fig, use_container_width=True)
+    with col_table:
+        st.write(f"{BUCKET_LABELS[bucket]} Inventory for {material_name}")
+        st.dataframe(interval_df)
+
+# Progress, throughput and the first finished materials of a background batch job, redrawn every second
+# without rerunning the page; the whole page reruns once the job is done
+@st.fragment(run_every=1.0)
+def render_job(job_id, material_names, owner):
+    job = batch_jobs.get(job_id)
+    if job is None or job.state == 'done':
+        st.rerun()
+    st.progress(job.done / max(job.total, 1), text=f"Simulated {job.done:,} of {job.total:,} materials")
+    col_rate, col_elapsed, col_remaining = st.columns(3)
+    col_rate.metric("Throughput", f"{job.throughput:,.0f} materials/s")
+    col_elapsed.metric("Elapsed", f"{job.elapsed:,.0f} s")
+    remaining = (job.total - job.done) / job.throughput if job.throughput else None
+    col_remaining.metric("Remaining", "-" if remaining is None else f"{remaining:,.0f} s")
+    if job.state == 'running':
+        if st.button("Cancel Run") and batch_jobs.release(job_id, owner).owners:
+            st.info("Another session is following this run, so it keeps going for them.")
     else:
-        avg_cycle_actual = None
-
-    # Annotations for critical crossings (markers with date and value)
-    critical_crossing_annotations = []
-    for crossing_date, crossing_inventory in critical_crossings:
-        critical_crossing_annotations.append({
-            'x': crossing_date,
-            'y': crossing_inventory,
-            'text': f'{crossing_date.strftime("%Y-%m-%d")}\n{crossing_inventory:.0f}',
-            'showarrow': True,
-            'arrowhead': 1,
-            'ax': 0,
-            'ay': -40,
-            'font': {'color': 'blue', 'size': 10},
-            'bgcolor': 'rgba(255, 255, 255, 0.8)',
-            'bordercolor': 'blue',
-            'borderwidth': 1
-        })
-
-    # Calculate time gaps and horizontal lines between critical crossings
-    critical_gap_annotations = []
-    if len(critical_crossings) > 1:
-        for i in range(1, len(critical_crossings)):
-            prev_date, prev_inventory = critical_crossings[i-1]
-            curr_date, curr_inventory = critical_crossings[i]
-            gap_days = (curr_date - prev_date).days
-            mid_date = prev_date + timedelta(days=gap_days // 2)
-            critical_gap_annotations.append({
-                'x': mid_date,
-                'y': critical_level,
-                'text': f'<- {gap_days} days ->',
-                'showarrow': False,
-                'font': {'color': 'red', 'size': 12},
-                'bgcolor': 'rgba(255, 255, 255, 0.8)',
-                'bordercolor': 'red',
-                'borderwidth': 1
-            })
-            df['Critical_Crossing_Line'] = np.nan
-            df.loc[df['Date'].isin([prev_date, curr_date]), 'Critical_Crossing_Line'] = critical_level
-
-    return df, avg_cycle_actual, daily_avg_use, order_annotations, critical_crossing_annotations, critical_gap_annotations, critical_crossings
-
-# Function to convert DataFrame to Excel bytes
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Sheet1')
-    excel_data = output.getvalue()
-    return excel_data
+        if job.state == 'failed':
+            st.error(f"The batch run failed: {job.error}")
+        else:
+            st.warning(f"Run cancelled after {job.done:,} of {job.total:,} materials.")
+        if st.button("Resume Run"):
+            st.session_state['batch_job_restart'] = True
+            st.rerun()
+    partial = job.partial(limit=PARTIAL_ROWS)
+    if partial is not None:
+        positions, finished = partial
+        st.caption(f"First {len(positions):,} finished materials")
+        st.dataframe(batch_summary(finished.to_batch(), material_names[positions]))
 
 st.subheader("Batch Inventory Simulation")
 
-# Updated Excel column names
-excel_template_columns = [
-    'Material Name',
-    'Monthly Usage Average',
-    'Current Usage',
-    'Beginning Inventory',
-    'Lead Time (days)',
-    'Critical Level',
-    'Re-Order Point (ROP)',
-    'Maximum Quantity',
-    'Inventory Value per UoM',
-    'Quantity per Package',
-    'Minimum Order Quantity (MOQ)',
-    'Simulation Days',
-    'W1', 'W2', 'W3', 'W4', 'W5',
-    'TOL'
-]
-
-# File uploader for Excel
-uploaded_file = st.file_uploader("Upload Excel File", type=["xlsx"])
+# File uploader for Excel, Parquet or Arrow materials files
+uploaded_file = st.file_uploader("Upload Materials File", type=["xlsx", "parquet", "arrow", "feather"])
+history_file = st.file_uploader("Upload Demand History (optional)", type=["xlsx", "parquet", "arrow", "feather"],
+                                help="Daily issues as Material Name, Date, Quantity (a History sheet in a workbook). "
+                                     "Without it, a History sheet in the materials workbook is used if present.")
+export_format = st.selectbox("Export Format", list(FORMAT_EXTENSIONS),
+                             format_func={'xlsx': 'Excel', 'parquet': 'Parquet', 'arrow': 'Arrow IPC'}.get)
 
 if uploaded_file is not None:
-    materials_df = pd.read_excel(uploaded_file)
-    if 'Simulation Days' in materials_df.columns:
-        materials_df['Simulation Days'] = materials_df['Simulation Days'].astype(int)
-    
-    required_columns = excel_template_columns
-    missing_columns = [col for col in required_columns if col not in materials_df.columns]
+    input_format = format_from_name(uploaded_file.name)
+    materials_df, missing_columns, skipped_rows = load_materials_cached(
+        uploaded_file.getvalue(), lambda file_bytes: read_materials(file_bytes, input_format)
+    )
     if missing_columns:
-        st.error(f"Excel file is missing required columns: {', '.join(missing_columns)}.")
+        st.error(f"Materials file is missing required columns: {', '.join(missing_columns)}.")
     else:
+        if skipped_rows:
+            st.warning(f"Skipped {len(skipped_rows)} row(s) with missing or non-numeric values "
+                       f"({'sheet rows' if input_format == 'xlsx' else 'rows'} {', '.join(map(str, skipped_rows[:20]))}{', ...' if len(skipped_rows) > 20 else ''}).")
+        # Materials with history resample their Actual demand from it instead of W1-W5 and TOL
+        history_source = history_file if history_file is not None else (
+            uploaded_file if input_format == 'xlsx' else None)
+        profiles, history_error = None, None
+        if history_source is not None:
+            profiles, history_error = load_materials_cached(
+                history_source.getvalue(),
+                lambda file_bytes: read_profiles(file_bytes, format_from_name(history_source.name)),
+                cache=history_cache
+            )
+        if history_error:
+            st.error(history_error)
+        elif history_file is not None and profiles is None:
+            st.error("The history workbook has no History sheet.")
+
         with st.expander("Preview and Edit Materials Data"):
             edited_df = st.data_editor(materials_df, num_rows="dynamic")
             materials_data = edited_df
             original_filename = uploaded_file.name
             base_name = original_filename.rsplit('.', 1)[0]
-            new_filename = f"{base_name}_edited.xlsx"
-            excel_data = to_excel(edited_df)
-            st.download_button(
-                label="Download Edited Data as Excel",
-                data=excel_data,
-                file_name=new_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            new_filename = f"{base_name}_edited.{FORMAT_EXTENSIONS[export_format]}"
+
+            # Build the export bytes only on request, and reuse them while the data and format are unchanged;
+            # the hash covers the column names and every row hash in order, not just their sum
+            edited_hash = (content_hash('\x1f'.join(map(str, edited_df.columns)).encode()
+                                        + pd.util.hash_pandas_object(edited_df, index=True).to_numpy().tobytes()),
+                           export_format)
+            if st.button("Prepare Edited Data for Download"):
+                st.session_state['edited_export'] = (edited_hash, write_table(edited_df, export_format))
+            prepared_hash, export_data = st.session_state.get('edited_export', (None, None))
+            if prepared_hash == edited_hash:
+                st.download_button(
+                    label="Download Edited Data",
+                    data=export_data,
+                    file_name=new_filename,
+                    mime=FORMAT_MIME_TYPES[export_format]
+                )
 
         start_date_input = st.date_input("Simulation Start Date", 
                                         value=date.today(),
@@ -230,124 +237,220 @@ if uploaded_file is not None:
                                         max_value=date.today() + timedelta(days=365))
         start_date = datetime.combine(start_date_input, datetime.min.time())
 
+        col_workers, col_seed = st.columns(2)
+        with col_workers:
+            workers = st.number_input("Parallel Workers",
+                                      min_value=1,
+                                      max_value=default_workers(),
+                                      value=1,
+                                      step=1)
+        with col_seed:
+            seed = st.number_input("Random Seed", min_value=0, value=0, step=1)
+        webgl_charts = st.toggle("WebGL Charts", value=True,
+                                 help="Draw trends with WebGL traces and merge order labels; faster for long horizons")
+
         num_materials = len(materials_data)
         num_rows = (num_materials + 1) // 2
 
         # Calculate number of materials (no need for num_rows since it's one row per material)
         num_materials = len(materials_data)
 
-        # Simulation and visualization with one row per material
-        for material_idx in range(num_materials):
-            # Create a single row with 2 columns: chart on left, table on right
-            col_chart, col_table = st.columns([1, 1])  # 3:1 ratio for chart:table width
-
-            with col_chart:
-                row = materials_data.iloc[material_idx]
-                material_name = row['Material Name']
-                monthly_usage_avg = row['Monthly Usage Average']
-                current_usage = row['Current Usage']
-                beginning_inventory = row['Beginning Inventory']
-                delivery_lead_time = row['Lead Time (days)']
-                critical_level = row['Critical Level']
-                rop = row['Re-Order Point (ROP)']
-                max_qty = row['Maximum Quantity']
-                inventory_value = row['Inventory Value per UoM']
-                qty_per_package = row['Quantity per Package']
-                moq = row['Minimum Order Quantity (MOQ)']
-                sim_days = int(row['Simulation Days'])
-                w1, w2, w3, w4, w5 = row['W1'], row['W2'], row['W3'], row['W4'], row['W5']
-                tol = row['TOL']
-
-                df, avg_cycle, daily_avg_use, order_annotations, critical_crossing_annotations, critical_gap_annotations, critical_crossings = simulate_ddmrp_inventory(
-                    rop, max_qty, critical_level, moq, delivery_lead_time, qty_per_package,
-                    monthly_usage_avg, current_usage, w1, w2, w3, w4, w5, tol,
-                    beginning_inventory, inventory_value, sim_days, start_date
-                )
+        # Simulate materials in chunks (in parallel when workers > 1), then summarize and visualize the visible page.
+        # Only rows inserted or edited since the last run are re-simulated; the rest come from the session or cache
+        incremental = st.session_state.setdefault('batch_incremental', IncrementalBatch())
+        views = st.session_state.setdefault('batch_views', {})
+        # The run is a background job keyed by its inputs, so reruns from other widgets pick it up instead of
+        # restarting it; this session lets go of a job for superseded inputs, which stops it unless another
+        # session with the same inputs still follows it
+        session_id = st.session_state.setdefault('batch_session_id', uuid.uuid4().hex)
+        job = batch_jobs.submit(materials_data, start_date, seed, workers, profiles,
+                                restart=st.session_state.pop('batch_job_restart', False),
+                                held=incremental.held_pieces(materials_data, start_date, seed, profiles),
+                                owner=session_id)
+        previous_job_id = st.session_state.get('batch_job_id')
+        if previous_job_id is not None and previous_job_id != job.job_id:
+            batch_jobs.release(previous_job_id, session_id)
+        st.session_state['batch_job_id'] = job.job_id
+        if job.state != 'done':
+            render_job(job.job_id, materials_data['Material Name'].to_numpy(), session_id)
+            st.stop()
+        batch_result = incremental.adopt(materials_data, start_date, seed, job.pieces(), profiles)
+        if profiles is not None:
+            st.caption(f"Demand history drives {batch_result['params']['history'].sum():,} of {num_materials:,} "
+                       f"materials ({len(profiles):,} materials in the history).")
 
-                fig = px.line(df, x='Date', y=['Inventory_Actual', 'Inventory_Avg', 'ROP', 'Max_Qty', 'Critical_Level'],
-                              title=f'Inventory Simulation for {material_name} (Starting {start_date.strftime("%Y-%m-%d")})')
-                
-                end_date = start_date + timedelta(days=sim_days)
-                current_date = start_date.replace(day=1)
-                month_end_dates = []
-                while current_date <= end_date:
-                    next_month = current_date.replace(day=28) + timedelta(days=4)
-                    last_day = next_month - timedelta(days=next_month.day)
-                    if last_day >= start_date and last_day <= end_date:
-                        month_end_dates.append(last_day)
-                    current_date = (last_day + timedelta(days=1)).replace(day=1)
-                
-                month_end_df = df[df['Date'].isin(month_end_dates)].copy()
-                fig.add_scatter(
-                    x=month_end_df['Date'],
-                    y=month_end_df['Inventory_Actual'],
-                    mode='markers',
-                    marker=dict(symbol='circle', size=10, color='grey', opacity=0.7),
-                    name='Month End',
-                    hovertemplate='%{x|%Y-%m-%d}<br>Inventory: %{y:.0f}'
-                )
+        st.subheader("Summary")
+        st.dataframe(batch_summary(batch_result, materials_data['Material Name']))
 
-                if critical_crossings:
-                    crossing_dates = [crossing[0] for crossing in critical_crossings]
-                    crossing_values = [crossing[1] for crossing in critical_crossings]
-                    fig.add_scatter(
-                        x=crossing_dates,
-                        y=crossing_values,
-                        mode='markers',
-                        marker=dict(symbol='x', size=10, color='blue'),
-                        name='Critical Crossing',
-                        hovertemplate='%{x|%Y-%m-%d}<br>Inventory: %{y:.0f}'
-                    )
-
-                if 'Critical_Crossing_Line' in df.columns:
-                    fig.add_scatter(
-                        x=df['Date'],
-                        y=df['Critical_Crossing_Line'],
-                        mode='lines',
-                        line=dict(color='red', dash='dash'),
-                        name='Gap Line',
-                        hoverinfo='skip'
-                    )
-
-                all_annotations = order_annotations + critical_crossing_annotations + critical_gap_annotations
-                fig.update_layout(
-                    yaxis_title="Inventory Qty",
-                    legend_title="Metrics",
-                    xaxis_title="Date",
-                    yaxis=dict(range=[0, max(max_qty, df['Inventory_Actual'].max(), df['Inventory_Avg'].max()) * 1.1]),
-                    annotations=all_annotations,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="top",
-                        y=-0.2,
-                        xanchor="center",
-                        x=0.5,
-                        traceorder="normal",
-                        itemsizing="constant",
-                        itemwidth=80,
-                        font=dict(size=10)
-                    )
-                )
-                st.plotly_chart(fig, use_container_width=True)
-
-            with col_table:
-                interval_data = []
-                current_date = start_date.replace(day=1)
-                while current_date <= end_date:
-                    next_month = current_date.replace(day=28) + timedelta(days=4)
-                    last_day = next_month - timedelta(days=next_month.day)
-                    if last_day >= start_date and last_day <= end_date:
-                        qty = df.loc[df['Date'] == last_day, 'Inventory_Actual'].iloc[0] if not df[df['Date'] == last_day].empty else 0
-                        value = qty * inventory_value
-                        interval_data.append({
-                            'Date': last_day.strftime('%Y-%m-%d'),
-                            'Inventory Quantity': f"{qty:,.0f}",
-                            'Inventory Value': f"{value:,.0f}"
-                        })
-                    current_date = (last_day + timedelta(days=1)).replace(day=1)
-                
-                interval_df = pd.DataFrame(interval_data)
-                st.write(f"Month-End Inventory for {material_name})")
-                st.dataframe(interval_df)
+        # Portfolio totals across all materials, reduced day by day from the batch arrays
+        st.subheader("Portfolio")
+        portfolio = portfolio_daily(batch_result, start_date)
+        if not portfolio.empty:
+            col_value, col_cash, col_critical = st.columns(3)
+            col_value.metric("Peak Inventory Value", f"{portfolio['Inventory Value'].max():,.0f}")
+            col_cash.metric("Total Cash Outflow", f"{portfolio['Cash Outflow'].sum():,.0f}")
+            col_critical.metric("Most Materials Below Critical", f"{portfolio['Materials Below Critical'].max():,}")
+            st.plotly_chart(portfolio_dashboard(portfolio, portfolio_weekly(portfolio)), use_container_width=True)
+
+        # Long-form results (material, date, actual, avg, orders), serialized only on request
+        results_key = (incremental.context, tuple(incremental.hashes.items()), export_format)
+        if st.button("Prepare Simulation Results for Download"):
+            st.session_state['results_export'] = (
+                results_key, write_table(results_table(batch_result, materials_data['Material Name']), export_format)
+            )
+        prepared_key, results_data = st.session_state.get('results_export', (None, None))
+        if prepared_key == results_key:
+            st.download_button(
+                label="Download Simulation Results",
+                data=results_data,
+                file_name=f"{base_name}_results.{FORMAT_EXTENSIONS[export_format]}",
+                mime=FORMAT_MIME_TYPES[export_format]
+            )
+
+        # Positions at the end of each week, month or quarter, for the material tables and a compact download
+        reporting_bucket = st.selectbox("Reporting Period", REPORTING_BUCKETS, index=1, format_func=BUCKET_LABELS.get)
+        report_key = results_key + (reporting_bucket,)
+        if st.button(f"Prepare {BUCKET_LABELS[reporting_bucket]} Report for Download"):
+            st.session_state['period_export'] = (
+                report_key,
+                write_table(period_end_table(batch_result, materials_data['Material Name'], reporting_bucket),
+                            export_format)
+            )
+        prepared_key, report_data = st.session_state.get('period_export', (None, None))
+        if prepared_key == report_key:
+            st.download_button(
+                label=f"Download {BUCKET_LABELS[reporting_bucket]} Report",
+                data=report_data,
+                file_name=f"{base_name}_{reporting_bucket}_end.{FORMAT_EXTENSIONS[export_format]}",
+                mime=FORMAT_MIME_TYPES[export_format]
+            )
+
+        # Only the visible page (or the picked materials) gets charts and tables
+        selected_materials = st.multiselect("Show Materials", range(num_materials),
+                                            format_func=lambda idx: str(materials_data.iloc[idx]['Material Name']))
+        if selected_materials:
+            visible_materials = selected_materials
+        else:
+            col_page_size, col_page = st.columns(2)
+            with col_page_size:
+                page_size = st.selectbox("Materials per Page", [5, 10, 20, 50], index=1)
+            num_pages = max(1, -(-num_materials // page_size))
+            with col_page:
+                page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1)
+            st.caption(f"Page {page} of {num_pages}")
+            visible_materials = range((page - 1) * page_size, min(page * page_size, num_materials))
+
+        # Charts of unchanged materials are reused; stale ones are dropped as rows change
+        for label in list(views):
+            if views[label][0] != (incremental.view_key(label), webgl_charts, reporting_bucket):
+                del views[label]
+        for material_idx in visible_materials:
+            label = materials_data.index[material_idx]
+            if label not in views:
+                views[label] = ((incremental.view_key(label), webgl_charts, reporting_bucket),
+                                build_material_view(batch_result, materials_data, material_idx, start_date,
+                                                    webgl_charts, reporting_bucket))
+            render_material(*views[label][1])
+
+        # Warehouses and sites linked by a Network sheet (From, To, optional Lead Time (days)), simulated together
+        st.markdown("---")
+        st.subheader("Network")
+        network_file = st.file_uploader("Upload Network Workbook (optional)", type=["xlsx"],
+                                        help="A Network sheet of From and To Material Names, one row per "
+                                             "replenishment edge. Without it, a Network sheet in the materials "
+                                             "workbook is used if present.")
+        network_source = network_file if network_file is not None else (
+            uploaded_file if input_format == 'xlsx' else None)
+        edges_df = None
+        if network_source is not None:
+            try:
+                edges_df = read_network_sheet(BytesIO(network_source.getvalue()))
+            except ValueError as error:
+                st.error(str(error))
+            if edges_df is None and network_file is not None:
+                st.error("The network workbook has no Network sheet.")
+        if edges_df is not None and st.toggle("Simulate network"):
+            try:
+                network_result = simulate_network(materials_data, edges_df, start_date, seed)
+            except ValueError as error:
+                st.error(str(error))
+            else:
+                st.caption(f"{len(edges_df):,} replenishment edges across "
+                           f"{network_result['depth'].max(initial=0) + 1} echelons.")
+                st.dataframe(network_summary(network_result))
+                st.line_chart(echelon_inventory(network_result))
+
+        # All materials' daily reorder requests share one weekly purchase budget and ordering capacity
+        st.markdown("---")
+        st.subheader("Procurement Constraints")
+        if num_materials and st.toggle("Constrained ordering"):
+            col_budget, col_capacity, col_priority = st.columns(3)
+            with col_budget:
+                weekly_budget = st.number_input("Weekly Budget", min_value=0.0, value=0.0, step=1000.0,
+                                                help="Purchase value per Monday week; 0 for no limit")
+            with col_capacity:
+                weekly_capacity = st.number_input("Weekly Capacity (UoM)", min_value=0.0, value=0.0, step=100.0,
+                                                  help="Quantity ordered per Monday week; 0 for no limit")
+            with col_priority:
+                priority = st.selectbox("Priority", PRIORITY_RULES,
+                                        format_func={'urgency': 'Critical-level urgency',
+                                                     'value': 'Highest order value'}.get)
+            constrained_result = simulate_materials_constrained(
+                materials_data, start_date, seed, weekly_budget or None, weekly_capacity or None, priority, profiles
+            )
+            constrained_summary = batch_summary(constrained_result, materials_data['Material Name'])
+            constrained_summary['Deferred Days'] = constrained_result['deferred_actual'].sum(axis=1)
+            constrained_summary['Rejected Days'] = constrained_result['rejected_actual'].sum(axis=1)
+            oversize_materials = (constrained_summary['Rejected Days'] > 0).sum()
+            if oversize_materials:
+                st.warning(f"{oversize_materials:,} material(s) need an order larger than a whole week's budget or "
+                           "capacity; those orders are rejected (see Rejected Days).")
+            unconstrained_summary = batch_summary(batch_result, materials_data['Material Name'])
+            col_deferred, col_critical, col_stockout = st.columns(3)
+            col_deferred.metric("Deferred Requests", f"{constrained_summary['Deferred Days'].sum():,}")
+            for column, name in ((col_critical, 'Days Below Critical'), (col_stockout, 'Stockout Days')):
+                extra_days = constrained_summary[name].sum() - unconstrained_summary[name].sum()
+                column.metric(name, f"{constrained_summary[name].sum():,}", delta=f"{extra_days:+,}",
+                              delta_color="inverse")
+            weekly_spend = period_spend(constrained_result)
+            st.write("Weekly Spend")
+            st.bar_chart(weekly_spend['Order Value'])
+            st.dataframe(weekly_spend)
+            st.dataframe(constrained_summary)
+
+        st.markdown("---")
+        st.subheader("Monte Carlo")
+        if num_materials and st.toggle("Monte Carlo mode"):
+            mc_idx = st.selectbox("Material", range(num_materials),
+                                  format_func=lambda idx: str(materials_data.iloc[idx]['Material Name']))
+            replications = st.number_input("Replications",
+                                           min_value=100,
+                                           max_value=20000,
+                                           value=1000,
+                                           step=100)
+            row = materials_data.iloc[mc_idx]
+            mc_sim_days = int(row['Simulation Days'])
+            mc_summary = monte_carlo_ddmrp(
+                row['Re-Order Point (ROP)'], row['Maximum Quantity'], row['Critical Level'],
+                row['Minimum Order Quantity (MOQ)'], row['Lead Time (days)'], row['Quantity per Package'],
+                row['Current Usage'], row['W1'], row['W2'], row['W3'], row['W4'], row['W5'], row['TOL'],
+                row['Beginning Inventory'], mc_sim_days, start_date, replications, seed,
+                material_id=materials_data.index[mc_idx], lead_time=lead_time_spec(row),
+                profile=None if profiles is None else profiles.take([row['Material Name']])
+            )
+            mc_dates = [start_date + timedelta(days=day) for day in range(mc_sim_days)]
+
+            col_mc1, col_mc2, col_mc3 = st.columns(3)
+            col_mc1.metric("P(below Critical Level)", f"{mc_summary['prob_below_critical']:.1%}")
+            col_mc2.metric("Expected Stockout Days", f"{mc_summary['expected_stockout_days']:.1f}")
+            col_mc3.metric("P(stockout)", f"{mc_summary['prob_stockout']:.1%}")
+
+            st.plotly_chart(monte_carlo_figure(mc_dates, mc_summary, row['Re-Order Point (ROP)'],
+                                               row['Maximum Quantity'], row['Critical Level'],
+                                               f'Inventory Bands for {row["Material Name"]} over {replications:,} Runs'),
+                            use_container_width=True)
+
+            st.write("Order Count Distribution")
+            st.bar_chart(pd.DataFrame({'Share of Runs': mc_summary['order_count_distribution']}))
 else:
     st.info("Please upload an Excel file to start the simulation.")
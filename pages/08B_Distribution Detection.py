@@ -1,10 +1,10 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+from inventory_sim import read_header, read_numeric_column
 warnings.filterwarnings('ignore')
 
 # Distribution fitting functions
@@ -48,19 +48,17 @@ def main():
     
     if uploaded_file is not None:
         try:
-            # Read Excel file with explicit engine specification
-            df = pd.read_excel(uploaded_file, engine='openpyxl')
+            # Read only the header row, then stream just the selected column
+            columns = [column for column in read_header(uploaded_file) if column]
             
             # Display available columns
-            st.write("Available columns:", df.columns.tolist())
+            st.write("Available columns:", columns)
             
             # Column selection
-            selected_column = st.selectbox("Select a column to analyze", df.columns)
+            selected_column = st.selectbox("Select a column to analyze", columns)
             
-            # Get data and handle null values
-            data = df[selected_column].dropna()
-            # Convert to numeric, coercing errors to NaN, then drop them
-            data = pd.to_numeric(data, errors='coerce').dropna()
+            # Numeric values of the column; blanks and text are skipped while streaming
+            data = read_numeric_column(uploaded_file, selected_column)
             
             if len(data) > 0:
                 # Create figure
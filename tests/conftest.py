@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def materials():
+    """Factory for a materials frame of count identical template rows, with columns overridden by keyword."""
+    def make(count, **overrides):
+        materials_df = pd.DataFrame({
+            'Material Name': [f'M{idx}' for idx in range(count)],
+            'Monthly Usage Average': 300.0, 'Current Usage': 300.0, 'Beginning Inventory': 100.0,
+            'Lead Time (days)': 7.0, 'Critical Level': 50.0, 'Re-Order Point (ROP)': 80.0,
+            'Maximum Quantity': 400.0, 'Inventory Value per UoM': 10.0, 'Quantity per Package': 1.0,
+            'Minimum Order Quantity (MOQ)': 0.0, 'Simulation Days': 90,
+            'W1': 1.0, 'W2': 1.0, 'W3': 1.0, 'W4': 1.0, 'W5': 1.0, 'TOL': 0.1,
+        })
+        for column, values in overrides.items():
+            materials_df[column] = values
+        return materials_df
+    return make
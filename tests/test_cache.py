@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from inventory_sim.cache import LRUCache, simulate_materials_cached
+
+
+def test_results_cache_stays_under_its_byte_budget(materials):
+    materials_df = materials(20, **{'Simulation Days': 1825})
+    unbounded = LRUCache(max_entries=100)
+    simulate_materials_cached(materials_df, datetime(2024, 1, 1), 1, cache=unbounded, compact=True)
+    budget = unbounded.nbytes // 2
+
+    cache = LRUCache(max_entries=100, max_bytes=budget)
+    simulate_materials_cached(materials_df, datetime(2024, 1, 1), 1, cache=cache, compact=True)
+
+    assert len(unbounded) == 20
+    assert 0 < len(cache) < 20
+    assert 0 < cache.nbytes <= budget
+    cache.clear()
+    assert cache.nbytes == 0
@@ -0,0 +1,40 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from inventory_sim.columnar import read_materials_table
+
+
+def parquet_bytes(materials_df):
+    buffer = BytesIO()
+    pq.write_table(pa.Table.from_pandas(materials_df, preserve_index=False), buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_rows_with_missing_parameters_are_skipped_and_reported(materials):
+    materials_df = materials(5, **{'Simulation Days': 90.0})
+    materials_df.loc[1, 'Simulation Days'] = np.nan
+    materials_df.loc[2, 'TOL'] = np.nan
+    materials_df.loc[3] = np.nan
+
+    read_df, missing_columns, skipped_rows = read_materials_table(parquet_bytes(materials_df), 'parquet')
+
+    assert missing_columns == []
+    assert skipped_rows == [2, 3]
+    assert read_df['Material Name'].tolist() == ['M0', 'M4']
+    assert read_df['Simulation Days'].dtype == int
+    assert read_df.index.tolist() == [0, 1]
+
+
+def test_unusable_lead_time_distribution_is_skipped(materials):
+    materials_df = materials(2)
+    materials_df['Lead Time Distribution'] = ['empirical', 'fixed']
+
+    read_df, _, skipped_rows = read_materials_table(parquet_bytes(materials_df), 'parquet')
+
+    assert skipped_rows == [1]
+    assert read_df['Material Name'].tolist() == ['M1']
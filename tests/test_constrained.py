@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import numpy as np
+
+from inventory_sim.constrained import allocate, period_spend, simulate_materials_constrained
+
+START_DATE = datetime(2024, 5, 6)
+
+
+def test_allocate_skips_requests_that_do_not_fit():
+    approved = allocate(np.arange(4), np.array([5.0, 50.0, 3.0, 2.0]), np.ones(4), 10.0, np.inf)
+    assert approved.tolist() == [True, False, True, True]
+
+
+def test_oversize_request_is_rejected_without_blocking_others(materials):
+    # M0 is the most urgent and its MOQ alone (5,000 x 10) is worth more than the weekly budget
+    materials_df = materials(20, **{'Beginning Inventory': [0.0] + [100.0] * 19,
+                                    'Minimum Order Quantity (MOQ)': [5000.0] + [0.0] * 19,
+                                    'Maximum Quantity': [6000.0] + [400.0] * 19})
+    result = simulate_materials_constrained(materials_df, START_DATE, seed=1, budget=20000)
+
+    assert not result['ordered_actual'][0].any()
+    assert result['rejected_actual'][0].any()
+    assert not result['deferred_actual'][0].any()
+    assert result['ordered_actual'][1:].sum() > 0
+    assert (period_spend(result)['Order Value'] <= 20000).all()
+
+
+def test_no_limits_match_the_batch_kernel(materials):
+    from inventory_sim.kernel import simulate_materials_batch
+
+    materials_df = materials(10)
+    constrained = simulate_materials_constrained(materials_df, START_DATE, seed=3)
+    batch = simulate_materials_batch(materials_df, START_DATE, seed=3)
+    assert np.array_equal(constrained['inventory_actual'], batch['inventory_actual'])
+    assert not constrained['rejected_actual'].any()
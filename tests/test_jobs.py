@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from inventory_sim.cache import LRUCache
+from inventory_sim.jobs import JOB_CHUNK_SIZE, JobRegistry
+from inventory_sim.parallel import chunk_bounds
+
+START_DATE = datetime(2024, 1, 1)
+
+
+def test_job_chunks_have_a_fixed_size():
+    bounds = chunk_bounds(2 * JOB_CHUNK_SIZE + 1, 1, chunk_size=JOB_CHUNK_SIZE)
+    assert [stop - start for start, stop in bounds] == [JOB_CHUNK_SIZE, JOB_CHUNK_SIZE, 1]
+
+
+def test_shared_job_is_cancelled_only_when_every_owner_releases_it(materials):
+    registry = JobRegistry()
+    materials_df = materials(10 * JOB_CHUNK_SIZE, **{'Simulation Days': 365})
+    cache = LRUCache(max_entries=100000)
+    job = registry.submit(materials_df, START_DATE, 1, cache=cache, owner='first')
+    assert registry.submit(materials_df, START_DATE, 1, cache=cache, owner='second') is job
+
+    registry.release(job.job_id, 'first')
+    assert job.owners == {'second'}
+    registry.release(job.job_id, 'second')
+    assert job.wait(timeout=60)
+    assert job.state == 'cancelled'
+    assert job.done < job.total